@@ -0,0 +1,92 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import URLPattern, URLResolver
+
+from .instrumentation import instrument_thread
+
+# Маршруты чтения, которые в режиме ASGI обслуживаются асинхронно.
+ASYNC_ROUTES = frozenset((
+    'recipes-list',
+    'recipes-detail',
+    'recipes-download-shopping-cart',
+    'recipes-shopping-list',
+    'recipes-feed',
+    'ingredients-list',
+    'ingredients-detail',
+    'tags-list',
+    'tags-detail',
+    'users-subscriptions',
+))
+
+# В Django 3.2 нет асинхронного ORM, поэтому синхронные представления
+# выполняются в отдельном ограниченном пуле потоков. Размер пула -
+# предел одновременных обращений к БД из одного процесса (и число
+# соединений с БД, которые процесс держит открытыми).
+executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'ASYNC_DB_THREADS', 16),
+    thread_name_prefix='async-db',
+)
+
+
+def run_view(view, request, *args, **kwargs):
+    """
+    Выполняет синхронное представление в потоке пула.
+    Ответ рендерится здесь же, а потоковый ответ отдаётся как есть:
+    в Django 3.2 обработчик ASGI перебирает его в цикле событий по мере
+    отправки клиенту. Запросы к БД там запрещены, поэтому генератор
+    потокового ответа асинхронного маршрута должен получать данные
+    из БД до возврата из представления.
+    Соединения с БД закрываются по правилам CONN_MAX_AGE, как в конце
+    обычного запроса: сигналы запроса выполняются в другом потоке.
+    Запросы потока попадают в счётчик QueryCountMiddleware запроса.
+    """
+    close_old_connections()
+    instrument_thread()
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_view(view):
+    """Асинхронная обёртка синхронного представления."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await sync_to_async(
+            partial(run_view, view),
+            thread_sensitive=False,
+            executor=executor,
+        )(request, *args, **kwargs)
+    return wrapper
+
+
+def async_patterns(patterns, names=ASYNC_ROUTES):
+    """
+    Копия списка маршрутов, в которой представления маршрутов
+    с именами из names заменены асинхронными обёртками.
+    Вложенные include обходятся рекурсивно.
+    """
+    result = []
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            url_patterns = async_patterns(pattern.url_patterns, names)
+            if url_patterns != pattern.url_patterns:
+                pattern = URLResolver(
+                    pattern.pattern, url_patterns,
+                    pattern.default_kwargs, pattern.app_name,
+                    pattern.namespace,
+                )
+        elif isinstance(pattern, URLPattern) and pattern.name in names:
+            pattern = URLPattern(
+                pattern.pattern, async_view(pattern.callback),
+                pattern.default_args, pattern.name,
+            )
+        result.append(pattern)
+    return result
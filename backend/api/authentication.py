@@ -0,0 +1,38 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import SAFE_METHODS
+
+from .cache import token_cache
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication с кешем токенов: при чтении токен и пользователь
+    берутся из кеша, из БД - только при промахе.
+    Запросы на запись всегда читают токен и пользователя из БД
+    и обновляют кеш: представления сохраняют request.user целиком
+    (смена пароля, профиль), и устаревшая копия из кеша затёрла бы
+    изменения, сделанные после её сохранения, например счётчики.
+    Записи удаляются из кеша при удалении токена (выход из системы)
+    и при изменении пользователя (пароль, профиль, деактивация),
+    см. api.signals.
+    """
+
+    use_cache = True
+
+    def authenticate(self, request):
+        self.use_cache = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key) if self.use_cache else None
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(token)
+            return user, token
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        return token.user, token
@@ -0,0 +1,218 @@
+from hashlib import md5, sha256
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .catalogue import (
+    TAGS_CATALOGUE, get_catalogue_version, ingredients_index
+)
+
+RECIPE_CACHE_ALIAS = getattr(settings, 'RECIPE_CACHE_ALIAS', 'recipes')
+TOKEN_CACHE_ALIAS = getattr(settings, 'TOKEN_CACHE_ALIAS', 'tokens')
+
+
+class CacheCounters:
+    """
+    Счётчики попаданий и промахов, хранятся в самом кеше.
+    Для LocMemCache счётчики свои у каждого процесса.
+    """
+
+    names = ('hits', 'misses')
+
+    def __init__(self, alias, key):
+        self.alias = alias
+        self.key = key
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def count(self, name, value=1):
+        if not value:
+            return
+        key = self.key.format(name)
+        if not self.cache.add(key, value, None):
+            try:
+                self.cache.incr(key, value)
+            except ValueError:
+                self.cache.set(key, value, None)
+
+    def get(self):
+        values = self.cache.get_many(
+            [self.key.format(name) for name in self.names]
+        )
+        return {
+            name: values.get(self.key.format(name), 0) for name in self.names
+        }
+
+    def reset(self):
+        self.cache.delete_many([self.key.format(name) for name in self.names])
+
+
+class RecipeRepresentationCache:
+    """
+    Кеш представлений рецептов, не зависящих от пользователя.
+    Ключ представления включает версию рецепта, дату его изменения,
+    версии справочников тегов и ингредиентов и адрес сайта
+    (ссылки на изображения абсолютные).
+    Версия рецепта - случайная строка: при сбросе она заменяется
+    новой, поэтому вытеснение версии из кеша не оживляет старые данные.
+    """
+
+    version_key = 'recipe-version:{}'
+    representation_key = 'recipe:{}:{}'
+    stats_key = 'recipe-cache:{}'
+    user_fields = ('is_favorited', 'is_in_shopping_cart')
+
+    def __init__(self, alias=RECIPE_CACHE_ALIAS):
+        self.alias = alias
+        self.counters = CacheCounters(alias, self.stats_key)
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _versions(self, recipe_ids):
+        keys = {self.version_key.format(pk): pk for pk in recipe_ids}
+        versions = {
+            keys[key]: version
+            for key, version in self.cache.get_many(keys).items()
+        }
+        missing = {
+            key: uuid4().hex for key, pk in keys.items()
+            if pk not in versions
+        }
+        if missing:
+            self.cache.set_many(missing, None)
+            versions.update(
+                (keys[key], version) for key, version in missing.items()
+            )
+        return versions
+
+    def _keys(self, recipes, request):
+        versions = self._versions(recipe.id for recipe in recipes)
+        common = (
+            get_catalogue_version(TAGS_CATALOGUE),
+            get_catalogue_version(ingredients_index.catalogue),
+            request.build_absolute_uri('/') if request else '',
+        )
+        return {
+            self.representation_key.format(
+                recipe.id,
+                md5(repr(
+                    (versions[recipe.id], recipe.updated_at) + common
+                ).encode()).hexdigest()
+            ): recipe.id
+            for recipe in recipes
+        }
+
+    def get_many(self, recipes, request=None):
+        """
+        Возвращает ({id рецепта: представление}, ключи для set_many).
+        Представления найденных рецептов загружаются одним обращением
+        к кешу.
+        """
+        keys = self._keys(recipes, request)
+        found = {
+            keys[key]: data
+            for key, data in self.cache.get_many(keys).items()
+        }
+        self._count('hits', len(found))
+        self._count('misses', len(keys) - len(found))
+        return found, keys
+
+    def set_many(self, representations, keys):
+        """Сохраняет представления рецептов, убирая поля пользователя."""
+        self.cache.set_many({
+            key: self.strip(representations[pk])
+            for key, pk in keys.items() if pk in representations
+        })
+
+    def strip(self, data):
+        """
+        Копия представления без флагов пользователя.
+        Поля остаются на своих местах со значением None,
+        чтобы порядок полей в ответе не зависел от кеша.
+        """
+        data = dict(data, **dict.fromkeys(self.user_fields))
+        data['author'] = dict(data['author'], is_subscribed=None)
+        return data
+
+    def invalidate(self, recipe_ids):
+        """
+        Сбрасывает кеш рецептов после фиксации транзакции:
+        иначе параллельный запрос успел бы закешировать старые данные.
+        """
+        recipe_ids = set(recipe_ids)
+        if recipe_ids:
+            transaction.on_commit(lambda: self.cache.set_many({
+                self.version_key.format(pk): uuid4().hex
+                for pk in recipe_ids
+            }, None))
+
+    def _count(self, name, value):
+        self.counters.count(name, value)
+
+    def stats(self):
+        """Число попаданий и промахов кеша."""
+        return self.counters.get()
+
+    def reset_stats(self):
+        self.counters.reset()
+
+
+recipe_cache = RecipeRepresentationCache()
+
+
+class TokenCache:
+    """
+    Токены авторизации вместе с пользователями.
+    Кеш общий для всех процессов (Memcached, см. настройку CACHES
+    и проверку api.E001), время жизни записей задаётся его настройками.
+    Ключ - хеш токена, сам токен в ключ кеша не попадает.
+    """
+
+    token_key = 'token:{}'
+    stats_key = 'token-cache:{}'
+
+    def __init__(self, alias=TOKEN_CACHE_ALIAS):
+        self.alias = alias
+        self.counters = CacheCounters(alias, self.stats_key)
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _key(self, key):
+        return self.token_key.format(sha256(key.encode()).hexdigest())
+
+    def get(self, key):
+        """Токен с загруженным пользователем или None."""
+        token = self.cache.get(self._key(key))
+        self.counters.count('misses' if token is None else 'hits')
+        return token
+
+    def set(self, token):
+        self.cache.set(self._key(token.key), token)
+
+    def evict(self, keys):
+        """
+        Удаляет токены из кеша сразу и ещё раз после фиксации
+        транзакции: параллельный запрос мог успеть закешировать
+        старые данные.
+        """
+        keys = [self._key(key) for key in keys]
+        if keys:
+            self.cache.delete_many(keys)
+            transaction.on_commit(lambda: self.cache.delete_many(keys))
+
+    def stats(self):
+        return self.counters.get()
+
+    def reset_stats(self):
+        self.counters.reset()
+
+
+token_cache = TokenCache()
@@ -0,0 +1,193 @@
+from bisect import bisect_left
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from recipes.models import CatalogueVersion, Ingredient, Tag
+
+TAGS_CATALOGUE = 'tags'
+
+
+class CatalogueVersions:
+    """
+    Версии справочников из таблицы CatalogueVersion: общие для всех
+    процессов. Процесс перечитывает их одним запросом не чаще раза
+    в CATALOGUE_VERSION_TTL секунд, так что изменение справочника
+    видно остальным процессам не позже чем через это время.
+    Читаются из основной БД: реплика может отставать.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._versions = {}
+        self._loaded = None
+
+    def get(self, name):
+        """Пара (версия, дата изменения) справочника."""
+        ttl = getattr(settings, 'CATALOGUE_VERSION_TTL', 1)
+        with self._lock:
+            if (
+                self._loaded is None or monotonic() - self._loaded > ttl
+                or name not in self._versions
+            ):
+                self._load()
+            if name not in self._versions:
+                row, _ = CatalogueVersion.objects.using(
+                    DEFAULT_DB_ALIAS
+                ).get_or_create(name=name)
+                self._versions[name] = (row.version, row.updated_at)
+            return self._versions[name]
+
+    def bump(self, name):
+        """
+        Увеличивает версию справочника после фиксации транзакции:
+        иначе параллельный запрос успел бы прочитать старые данные
+        под новой версией, и они остались бы в кешах и индексах.
+        """
+        transaction.on_commit(lambda: self._bump(name))
+
+    def _bump(self, name):
+        CatalogueVersion.objects.get_or_create(name=name)
+        CatalogueVersion.objects.filter(name=name).update(
+            version=F('version') + 1, updated_at=timezone.now()
+        )
+        with self._lock:
+            self._load()
+
+    def clear(self):
+        """Забывает версии: следующее обращение читает их из БД."""
+        with self._lock:
+            self._versions = {}
+            self._loaded = None
+
+    def _load(self):
+        self._versions = {
+            name: (version, updated_at)
+            for name, version, updated_at in CatalogueVersion.objects.using(
+                DEFAULT_DB_ALIAS
+            ).values_list('name', 'version', 'updated_at')
+        }
+        self._loaded = monotonic()
+
+
+catalogue_versions = CatalogueVersions()
+
+
+def get_catalogue_version(name):
+    """Текущая версия справочника (ингредиентов, тегов)."""
+    return catalogue_versions.get(name)[0]
+
+
+def get_catalogue_updated_at(name):
+    """Дата последнего изменения справочника."""
+    return catalogue_versions.get(name)[1]
+
+
+def bump_catalogue_version(name):
+    """Увеличивает версию справочника после фиксации изменений."""
+    catalogue_versions.bump(name)
+
+
+class IngredientPrefixIndex:
+    """
+    Индекс ингредиентов в памяти процесса для автодополнения.
+    Хранит отсортированный массив названий, приведённых casefold(),
+    и отвечает на поиск по началу названия двумя бинарными поисками.
+    Индекс перестраивается, если изменилась версия справочника.
+    """
+
+    catalogue = 'ingredients'
+
+    def __init__(self):
+        self._lock = Lock()
+        self._version = None
+        self._index = ((), ())
+
+    def build(self):
+        """Загружает ингредиенты одним запросом и собирает индекс."""
+        with self._lock:
+            version = get_catalogue_version(self.catalogue)
+            rows = sorted(
+                (name.casefold(), name, pk, measurement_unit)
+                for pk, name, measurement_unit in
+                Ingredient.objects.values_list(
+                    'id', 'name', 'measurement_unit'
+                ).order_by()
+            )
+            self._index = (
+                tuple(row[0] for row in rows),
+                tuple(
+                    {'id': pk, 'name': name, 'measurement_unit': unit}
+                    for _, name, pk, unit in rows
+                ),
+            )
+            self._version = version
+
+    def invalidate(self):
+        """Помечает индекс устаревшим в текущем процессе."""
+        self._version = None
+
+    def search(self, prefix=''):
+        """Ингредиенты, название которых начинается с prefix."""
+        if self._version != get_catalogue_version(self.catalogue):
+            self.build()
+        keys, items = self._index
+        prefix = prefix.casefold()
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + chr(0x10FFFF), start)
+        return items[start:end]
+
+
+ingredients_index = IngredientPrefixIndex()
+
+
+class TagBitsIndex:
+    """
+    Биты тегов в маске Recipe.tags_mask, в памяти процесса:
+    фильтр по тегам не обращается к справочнику тегов.
+    Индекс перестраивается, если изменилась версия справочника.
+    """
+
+    catalogue = TAGS_CATALOGUE
+
+    def __init__(self):
+        self._lock = Lock()
+        self._version = None
+        self._bits = {}
+
+    def build(self):
+        with self._lock:
+            version = get_catalogue_version(self.catalogue)
+            self._bits = dict(
+                Tag.objects.values_list('slug', 'bit').order_by()
+            )
+            self._version = version
+
+    def invalidate(self):
+        """Помечает индекс устаревшим в текущем процессе."""
+        self._version = None
+
+    def mask(self, slugs):
+        """
+        Возвращает маску тегов по слагам и список слагов тегов,
+        которым не хватило бита. Неизвестные слаги пропускаются.
+        """
+        if self._version != get_catalogue_version(self.catalogue):
+            self.build()
+        bits = self._bits
+        mask, without_bit = 0, []
+        for slug in slugs:
+            if slug not in bits:
+                continue
+            if bits[slug] is None:
+                without_bit.append(slug)
+            else:
+                mask |= 1 << bits[slug]
+        return mask, without_bit
+
+
+tag_bits = TagBitsIndex()
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from .cache import TOKEN_CACHE_ALIAS
+
+# Кеши, которые у каждого процесса свои.
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.filebased.FileBasedCache',
+)
+
+
+@register(Tags.security, Tags.caches)
+def check_token_cache(app_configs, **kwargs):
+    """
+    Кеш токенов должен быть общим: удаление отозванного токена
+    из кеша одного процесса не видно остальным.
+    """
+    backend = settings.CACHES.get(TOKEN_CACHE_ALIAS, {}).get('BACKEND')
+    if backend in LOCAL_CACHE_BACKENDS:
+        return [Error(
+            f'Кеш токенов {TOKEN_CACHE_ALIAS!r} ({backend}) свой у каждого '
+            'процесса: отозванные токены будут приниматься другими '
+            'процессами до истечения TOKEN_CACHE_TIMEOUT.',
+            hint='Задайте MEMCACHED_LOCATION или используйте DummyCache.',
+            id='api.E001',
+        )]
+    return []
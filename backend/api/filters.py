@@ -1,7 +1,11 @@
+from django import forms
+from django.db.models import F, Q
 from django_filters import rest_framework as filters
-from rest_framework.filters import OrderingFilter
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
 
-from recipes.models import FavoriteRecipe, Ingredient, Recipe, ShopingCart, Tag
+from recipes.models import Ingredient, Recipe
+from recipes.search import search_recipes
+from .catalogue import tag_bits
 
 
 class IngredientsFilter(filters.FilterSet):
@@ -19,12 +23,23 @@ class IngredientsFilter(filters.FilterSet):
         fields = ('name',)
 
 
+class SlugsField(forms.MultipleChoiceField):
+    """Список слагов без проверки по справочнику."""
+
+    def valid_value(self, value):
+        return True
+
+
+class TagsFilter(filters.MultipleChoiceFilter):
+    field_class = SlugsField
+
+
 class RecipeFilter(filters.FilterSet):
-    tags = filters.ModelMultipleChoiceFilter(
-        queryset=Tag.objects.all(),
-        field_name='tags__slug',
-        to_field_name='slug',
-    )
+    """
+    Фильтры рецептов. Все условия - предикаты по строке рецепта
+    (маска тегов, автор, аннотации вьюсета), без JOIN и дублей.
+    """
+    tags = TagsFilter(method='filter_tags')
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
@@ -37,31 +52,68 @@ class RecipeFilter(filters.FilterSet):
         model = Recipe
         fields = ('author', 'tags')
 
-    def filter_is_favorited(self, queryset, name, value):
-        user = self.request.user
-
-        if FavoriteRecipe.objects.filter(user=user).exists():
-            return queryset.filter(favorite_recipe__user=user)
+    def filter_tags(self, queryset, name, slugs):
+        """
+        Рецепты хотя бы с одним из тегов: побитовое И с маской
+        Recipe.tags_mask. Теги без бита (больше MAX_TAG_BITS тегов)
+        проверяются подзапросом.
+        """
+        mask, without_bit = tag_bits.mask(slugs)
+        condition = Q()
+        if mask:
+            queryset = queryset.alias(
+                tag_hits=F('tags_mask').bitand(mask)
+            )
+            condition |= Q(tag_hits__gt=0)
+        if without_bit:
+            condition |= Q(id__in=Recipe.tags.through.objects.filter(
+                tag__slug__in=without_bit
+            ).values('recipe_id'))
+        if not condition:
+            return queryset.none()
+        return queryset.filter(condition)
 
-        return queryset.none()
+    def filter_is_favorited(self, queryset, name, value):
+        """Использует аннотацию is_favorited из RecipesViewSet."""
+        return queryset.filter(is_favorited=value)
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
-        user = self.request.user
-
-        if ShopingCart.objects.filter(user=user).exists():
-            return queryset.filter(shoppingcart_recipe__user=user)
-
-        return queryset.none()
+        """Использует аннотацию is_in_shopping_cart из RecipesViewSet."""
+        return queryset.filter(is_in_shopping_cart=value)
 
     def filter_is_subscribed(self, queryset, name, value):
         user = self.request.user
         return queryset.filter(author=user)
 
 
+class RecipeSearchFilter(BaseFilterBackend):
+    """
+    Полнотекстовый поиск рецептов по названию и описанию
+    (параметр 'search'). Добавляет аннотацию search_rank.
+    """
+    search_param = 'search'
+
+    def get_search_text(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        text = self.get_search_text(request)
+        if not text:
+            return queryset
+        return search_recipes(queryset, text)
+
+
 class RecipeOrderingFilter(OrderingFilter):
+    ordering_fields = (
+        'id', 'name', 'cooking_time', 'favorites_count', 'cart_count',
+    )
+
     def get_default_ordering(self, view):
         """
         Определяет значение сортировки по умолчанию.
-        Сортировка по убыванию ID.
+        Сортировка по убыванию ID, при поиске -
+        сначала по релевантности.
         """
+        if RecipeSearchFilter().get_search_text(view.request):
+            return ['-search_rank', '-id']
         return ['-id']
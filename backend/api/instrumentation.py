@@ -0,0 +1,119 @@
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Счётчик запросов текущего HTTP-запроса. Переменная контекста
+# переходит в потоки sync_to_async, поэтому в режиме ASGI запросы
+# представления из потока пула попадают в счётчик своего запроса.
+active_recorder = ContextVar('query_recorder', default=None)
+
+
+class QueryRecorder:
+    """
+    Обёртка connection.execute_wrapper: считает SQL-запросы,
+    их суммарное время и повторы одинакового SQL.
+    Запросы сравниваются по тексту без параметров, поэтому
+    N+1 выглядит как один отпечаток с большим числом повторов.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.connect_duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += perf_counter() - started
+            self.count += 1
+            self.fingerprints[sql] += 1
+
+    @property
+    def duplicates(self):
+        """Отпечатки запросов, выполненных больше одного раза."""
+        return {
+            sql: count for sql, count in self.fingerprints.items()
+            if count > 1
+        }
+
+
+@contextmanager
+def record_queries():
+    """
+    Записывает запросы ко всем подключениям внутри блока with
+    и время получения соединений (ожидание пула и подключение),
+    если его считает бэкенд БД (backend.postgresql).
+    """
+    recorder = QueryRecorder()
+    started = connect_duration()
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            yield recorder
+    finally:
+        recorder.connect_duration = connect_duration() - started
+
+
+def connect_duration():
+    return sum(
+        getattr(connection, 'connect_duration', 0.0)
+        for connection in connections.all()
+    )
+
+
+def record_in_context(execute, sql, params, many, context):
+    """Обёртка соединений: пишет запрос в счётчик текущего контекста."""
+    recorder = active_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def instrument(connection, **kwargs):
+    if record_in_context not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_in_context)
+
+
+def instrument_thread():
+    """
+    Добавляет record_in_context к соединениям текущего потока,
+    если запросы записываются: соединения потока могли быть открыты
+    до включения записи.
+    """
+    if active_recorder.get() is not None:
+        for connection in connections.all():
+            instrument(connection)
+
+
+def instrument_connections():
+    """
+    Добавляет record_in_context к соединениям текущего потока
+    и ко всем соединениям, которые будут открыты в любом потоке.
+    """
+    connection_created.connect(instrument, dispatch_uid='query_recorder')
+    for connection in connections.all():
+        instrument(connection)
+
+
+@contextmanager
+def record_request_queries():
+    """
+    Записывает запросы в блоке with, в том числе выполненные
+    в потоках sync_to_async (см. instrument_connections
+    и instrument_thread).
+    Время получения соединений считает бэкенд БД (backend.postgresql).
+    """
+    recorder = QueryRecorder()
+    token = active_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        active_recorder.reset(token)
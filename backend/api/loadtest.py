@@ -0,0 +1,398 @@
+import json
+import random
+import re
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from statistics import median
+from time import monotonic, perf_counter
+
+from django.db import connections
+from django.test import Client
+
+VARIABLE = re.compile(r'{{(\w+)}}')
+# Скрипты тестов коллекции сохраняют переменные двумя способами:
+# const userId = _.get(responseData, "id"); ... set("userId", userId)
+# set("firstTagId", responseData[0].id)
+SCRIPT_GET = re.compile(
+    r'const (\w+) = _\.get\(responseData, "([\w.]+)"\)'
+)
+SCRIPT_SET = re.compile(
+    r'collectionVariables\.set\(["\'](\w+)["\'],\s*([^;]+?)\)?;?$'
+)
+RESPONSE_PATH = re.compile(
+    r'responseData(?:\[(\d+)\])?((?:\.\w+)*?)(\.slice\(0,\s*1\))?\)?$'
+)
+# Веса папок коллекции в нагрузочной фазе, остальные папки не повторяются.
+DEFAULT_WEIGHTS = {
+    'recipes': 5,
+    'recipe_filters_for_favorite_and_shopping_cart': 2,
+    'ingredients': 2,
+    'tags': 1,
+    'users': 1,
+    'subscriptions': 1,
+    'favorite': 1,
+    'shopping_cart': 1,
+}
+# Переменные с учётными данными: у каждого виртуального пользователя свои.
+IDENTITY_VARIABLES = (
+    'username', 'email', 'secondUserUsername', 'secondUserEmail',
+    'thirdUserUsername', 'thirdUserEmail',
+)
+
+
+@dataclass
+class PostmanRequest:
+    """Запрос коллекции с правилами извлечения переменных из ответа."""
+
+    name: str
+    folder: str
+    method: str
+    url: str
+    headers: dict
+    body: str = None
+    extract: dict = field(default_factory=dict)
+
+    @property
+    def endpoint(self):
+        """Метод и шаблон пути без адреса сервера - ключ статистики."""
+        return f'{self.method} {self.url.replace("{{baseUrl}}", "")}'
+
+
+def parse_extractors(lines):
+    """
+    Правила {переменная: (индекс, путь, первая буква)} из скрипта теста.
+    Поддерживаются только обращения к полям ответа, как в коллекции.
+    """
+    aliases = dict(
+        match.groups() for match in map(SCRIPT_GET.search, lines) if match
+    )
+    extract = {}
+    for line in lines:
+        match = SCRIPT_SET.search(line.strip())
+        if not match:
+            continue
+        variable, expression = match.groups()
+        if expression in aliases:
+            extract[variable] = (None, aliases[expression], False)
+            continue
+        path = RESPONSE_PATH.match(expression)
+        if path:
+            index, attributes, first_letter = path.groups()
+            extract[variable] = (
+                int(index) if index is not None else None,
+                attributes.strip('.'),
+                bool(first_letter),
+            )
+    return extract
+
+
+def auth_headers(auth):
+    if not auth or auth.get('type') != 'apikey':
+        return {}
+    values = {item['key']: item['value'] for item in auth['apikey']}
+    return {values.get('key', 'Authorization'): values.get('value', '')}
+
+
+def load_collection(path):
+    """
+    Читает коллекцию Postman: список PostmanRequest в порядке
+    запуска и значения переменных коллекции.
+    Авторизация наследуется от папок, как в Postman.
+    """
+    with open(path, encoding='utf-8') as file:
+        collection = json.load(file)
+
+    requests = []
+
+    def walk(items, folder, auth):
+        for item in items:
+            item_auth = item.get('request', item).get('auth', auth)
+            if 'item' in item:
+                walk(item['item'], folder or item['name'], item_auth)
+                continue
+            request = item['request']
+            url = request['url']
+            lines = [
+                line for event in item.get('event', ())
+                if event['listen'] == 'test'
+                for line in event['script'].get('exec', ())
+            ]
+            headers = {
+                header['key']: header['value']
+                for header in request.get('header', ())
+                if not header.get('disabled')
+            }
+            headers.update(auth_headers(item_auth))
+            requests.append(PostmanRequest(
+                name=item['name'],
+                folder=folder,
+                method=request['method'],
+                url=url['raw'] if isinstance(url, dict) else url,
+                headers=headers,
+                body=request.get('body', {}).get('raw'),
+                extract=parse_extractors(lines),
+            ))
+
+    walk(collection['item'], None, collection.get('auth'))
+    variables = {
+        variable['key']: variable['value']
+        for variable in collection.get('variable', ())
+    }
+    return requests, variables
+
+
+def unique_identity(variables, tag):
+    """Добавляет метку к логинам и адресам почты (JSON-строкам)."""
+    variables = dict(variables)
+    for name in IDENTITY_VARIABLES:
+        if name not in variables:
+            continue
+        value = json.loads(variables[name])
+        if '@' in value:
+            local, domain = value.split('@', 1)
+            value = f'{local}+{tag}@{domain}'
+        else:
+            value = f'{value}-{tag}'
+        variables[name] = json.dumps(value)
+    return variables
+
+
+class InProcessTransport:
+    """Запросы к WSGI-приложению проекта в том же процессе."""
+
+    def __init__(self):
+        self.client = Client(
+            SERVER_NAME='localhost', raise_request_exception=False
+        )
+
+    def send(self, method, url, headers, body):
+        extra = {
+            'HTTP_' + key.upper().replace('-', '_'): value
+            for key, value in headers.items()
+        }
+        response = self.client.generic(
+            method, url, body or '', content_type='application/json', **extra
+        )
+        content = (
+            b''.join(response.streaming_content) if response.streaming
+            else response.content
+        )
+        return response.status_code, content
+
+    def close(self):
+        connections.close_all()
+
+
+class HttpTransport:
+    """Запросы к запущенному серверу (например, gunicorn)."""
+
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+
+    def send(self, method, url, headers, body):
+        response = self.session.request(
+            method, self.base_url + url,
+            data=(body or '').encode('utf-8'),
+            headers={'Content-Type': 'application/json', **headers},
+        )
+        return response.status_code, response.content
+
+    def close(self):
+        self.session.close()
+
+
+class VirtualUser:
+    """
+    Виртуальный пользователь: свой набор переменных коллекции,
+    свои учётные записи и транспорт.
+    """
+
+    def __init__(self, transport, variables, stats):
+        self.transport = transport
+        self.variables = variables
+        self.stats = stats
+
+    def render(self, template):
+        return VARIABLE.sub(
+            lambda match: str(self.variables.get(match.group(1), '')),
+            template
+        )
+
+    def send(self, request):
+        url = self.render(request.url).replace(
+            self.variables.get('baseUrl', ''), ''
+        )
+        headers = {
+            key: self.render(value) for key, value in request.headers.items()
+        }
+        body = self.render(request.body) if request.body else None
+        started = perf_counter()
+        try:
+            status, content = self.transport.send(
+                request.method, url, headers, body
+            )
+        except Exception:
+            status, content = None, b''
+        self.stats.add(request.endpoint, perf_counter() - started, status)
+        if request.extract and status is not None and status < 400:
+            self.extract(request.extract, content)
+
+    def extract(self, rules, content):
+        try:
+            data = json.loads(content)
+        except ValueError:
+            return
+        for variable, (index, path, first_letter) in rules.items():
+            value = data
+            try:
+                if index is not None:
+                    value = value[index]
+                for key in filter(None, path.split('.')):
+                    value = value[key]
+            except (IndexError, KeyError, TypeError):
+                continue
+            self.variables[variable] = value[:1] if first_letter else value
+
+
+class LoadStats:
+    """Время ответа и коды статусов по эндпоинтам, потокобезопасно."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def add(self, endpoint, duration, status):
+        with self.lock:
+            self.timings[endpoint].append(duration)
+            self.statuses[endpoint][status] += 1
+
+    def report(self, elapsed):
+        """Сводка: пропускная способность, перцентили и доля ошибок."""
+        endpoints = {}
+        total = 0
+        for endpoint, timings in sorted(self.timings.items()):
+            timings = sorted(timings)
+            statuses = self.statuses[endpoint]
+            errors = sum(
+                count for status, count in statuses.items()
+                if status is None or status >= 500
+            )
+            total += len(timings)
+            endpoints[endpoint] = {
+                'requests': len(timings),
+                'rps': round(len(timings) / elapsed, 2) if elapsed else 0,
+                'p50_ms': round(median(timings) * 1000, 2),
+                'p95_ms': round(
+                    timings[int(len(timings) * 0.95)] * 1000, 2
+                ),
+                'p99_ms': round(
+                    timings[int(len(timings) * 0.99)] * 1000, 2
+                ),
+                'error_rate': round(errors / len(timings), 4),
+                'statuses': {
+                    str(status): count for status, count in statuses.items()
+                },
+            }
+        return {
+            'elapsed_s': round(elapsed, 2),
+            'requests': total,
+            'rps': round(total / elapsed, 2) if elapsed else 0,
+            'endpoints': endpoints,
+        }
+
+
+class PostmanLoadRunner:
+    """
+    Нагрузочный прогон коллекции Postman.
+    Каждый виртуальный пользователь выполняет коллекцию по порядку
+    (регистрация, токены, создание рецептов и переменные для остальных
+    запросов), затем все одновременно в течение duration повторяют
+    запросы, выбирая их по весам папок. В конце выполняется папка
+    удаления, созданная коллекцией.
+    """
+
+    teardown_folder = 'delete_requests'
+
+    def __init__(self, requests, variables, weights, transport_factory,
+                 run_tag, include_writes=False, seed=0):
+        self.setup = [
+            request for request in requests
+            if request.folder != self.teardown_folder
+        ]
+        self.teardown = [
+            request for request in requests
+            if request.folder == self.teardown_folder
+        ]
+        self.scenario = [
+            (request, weights.get(request.folder, 0)) for request in requests
+            if weights.get(request.folder, 0)
+            and (include_writes or request.method == 'GET')
+        ]
+        if not self.scenario:
+            raise ValueError('Нет запросов с ненулевым весом.')
+        self.variables = variables
+        self.transport_factory = transport_factory
+        self.run_tag = run_tag
+        self.seed = seed
+
+    def run_user(self, number, duration, barrier, stats):
+        transport = self.transport_factory()
+        user = VirtualUser(
+            transport,
+            unique_identity(self.variables, f'{self.run_tag}-{number}'),
+            stats['setup'],
+        )
+        try:
+            for request in self.setup:
+                user.send(request)
+            barrier.wait()
+
+            user.stats = stats['load']
+            rng = random.Random(self.seed + number)
+            requests, weights = zip(*self.scenario)
+            deadline = monotonic() + duration
+            while monotonic() < deadline:
+                user.send(rng.choices(requests, weights)[0])
+            barrier.wait()
+
+            user.stats = stats['teardown']
+            for request in self.teardown:
+                user.send(request)
+        except BaseException:
+            # Остальные потоки не должны ждать барьер вечно.
+            barrier.abort()
+            raise
+        finally:
+            transport.close()
+
+    def run(self, concurrency, duration):
+        """
+        Возвращает отчёты фаз {'setup', 'load', 'teardown'}.
+        Фазы разделены барьером: нагрузка начинается, когда
+        все пользователи закончили подготовку.
+        """
+        stats = {
+            phase: LoadStats() for phase in ('setup', 'load', 'teardown')
+        }
+        marks = [perf_counter()]
+        barrier = threading.Barrier(
+            concurrency, action=lambda: marks.append(perf_counter())
+        )
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(
+                    self.run_user, number, duration, barrier, stats
+                ) for number in range(concurrency)
+            ]
+            for future in futures:
+                future.result()
+        marks.append(perf_counter())
+        return {
+            phase: stats[phase].report(end - start)
+            for phase, start, end in zip(stats, marks, marks[1:])
+        }
@@ -0,0 +1,183 @@
+import json
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+from statistics import mean, median
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+from api.instrumentation import record_queries
+from recipes.models import (
+    FavoriteRecipe, Follow, Ingredient, Recipe, ShopingCart, Tag
+)
+from users.models import FoodgramUser
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет основные маршруты API тестовым клиентом Django '
+        'на текущих данных (см. generate_dataset): p50/p95 времени ответа, '
+        'число SQL-запросов и пик памяти. Результат сохраняется в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=30)
+        parser.add_argument(
+            '--output',
+            help='Файл результата (по умолчанию bench-<дата>.json).'
+        )
+        parser.add_argument(
+            '--compare', help='JSON прошлого запуска для сравнения.'
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кеши перед каждым запросом.'
+        )
+
+    def get_routes(self):
+        """Маршруты: (имя, путь). Параметры берутся из данных."""
+        recipe = Recipe.objects.order_by('-favorites_count').first()
+        author = FoodgramUser.objects.order_by('-recipes_count').first()
+        slugs = list(Tag.objects.values_list('slug', flat=True)[:2])
+        word = Ingredient.objects.values_list('name', flat=True).first()
+        if recipe is None or word is None:
+            raise CommandError('Нет данных: выполните generate_dataset.')
+        tags = '&'.join(f'tags={slug}' for slug in slugs)
+        return (
+            ('recipes', '/api/recipes/'),
+            ('recipes_page_50', '/api/recipes/?page=50'),
+            ('recipes_tags', f'/api/recipes/?{tags}'),
+            ('recipes_favorited', '/api/recipes/?is_favorited=1'),
+            ('recipes_search', f'/api/recipes/?search={word.split()[0]}'),
+            ('recipe_detail', f'/api/recipes/{recipe.id}/'),
+            ('users', '/api/users/'),
+            ('user_detail', f'/api/users/{author.id}/'),
+            ('users_me', '/api/users/me/'),
+            ('subscriptions', '/api/users/subscriptions/?recipes_limit=3'),
+            ('ingredients', f'/api/ingredients/?name={word[:2]}'),
+            ('download_shopping_cart',
+             '/api/recipes/download_shopping_cart/'),
+        )
+
+    def request(self, client, path):
+        response = client.get(path)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def clear_caches(self):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+
+    def measure(self, client, path, repeat, cold):
+        self.request(client, path)
+        timings, queries = [], []
+        for _ in range(repeat):
+            if cold:
+                self.clear_caches()
+            with record_queries() as recorder:
+                started = perf_counter()
+                response = self.request(client, path)
+                timings.append(perf_counter() - started)
+            queries.append(recorder.count)
+
+        tracemalloc.start()
+        self.request(client, path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            'path': path,
+            'status': response.status_code,
+            'p50_ms': round(median(timings) * 1000, 2),
+            'p95_ms': round(percentile(timings, 0.95) * 1000, 2),
+            'mean_ms': round(mean(timings) * 1000, 2),
+            'queries': int(median(queries)),
+            'peak_kib': round(peak / 1024, 1),
+        }
+
+    def handle(self, *args, **options):
+        user_id = (
+            Follow.objects.values('user').annotate(total=Count('id'))
+            .order_by('-total').values_list('user', flat=True).first()
+        )
+        if user_id is None:
+            raise CommandError('Нет данных: выполните generate_dataset.')
+        token, _ = Token.objects.get_or_create(user_id=user_id)
+        client = Client(
+            SERVER_NAME='localhost', HTTP_AUTHORIZATION=f'Token {token.key}'
+        )
+
+        result = {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'commit': self.get_commit(),
+            'database': connection.vendor,
+            'cold': options['cold'],
+            'repeat': options['repeat'],
+            'dataset': {
+                model._meta.label: model.objects.count()
+                for model in (
+                    FoodgramUser, Recipe, Follow, FavoriteRecipe, ShopingCart
+                )
+            },
+            'routes': {},
+        }
+        for name, path in self.get_routes():
+            stats = self.measure(
+                client, path, options['repeat'], options['cold']
+            )
+            result['routes'][name] = stats
+            self.stdout.write(
+                f'{name:24} {stats["status"]} p50 {stats["p50_ms"]:8.2f} мс '
+                f'p95 {stats["p95_ms"]:8.2f} мс '
+                f'запросов {stats["queries"]:4} '
+                f'память {stats["peak_kib"]:8.1f} КиБ'
+            )
+
+        output = options['output'] or (
+            f'bench-{datetime.now():%Y%m%d-%H%M%S}.json'
+        )
+        with open(output, 'w', encoding='utf-8') as file:
+            json.dump(result, file, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Результат: {output}'))
+
+        if options['compare']:
+            self.compare(options['compare'], result)
+
+    def compare(self, path, result):
+        """Печатает изменение p50, p95 и числа запросов."""
+        with open(path, encoding='utf-8') as file:
+            previous = json.load(file)
+        self.stdout.write(f'Сравнение с {previous.get("commit") or path}:')
+        for name, stats in result['routes'].items():
+            old = previous['routes'].get(name)
+            if old is None:
+                continue
+            self.stdout.write(
+                f'{name:24} '
+                + ' '.join(
+                    f'{field} {old[field]} -> {stats[field]}'
+                    for field in ('p50_ms', 'p95_ms', 'queries')
+                )
+            )
+
+    def get_commit(self):
+        try:
+            return subprocess.run(
+                ('git', 'rev-parse', '--short', 'HEAD'),
+                capture_output=True, text=True, check=True,
+                cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
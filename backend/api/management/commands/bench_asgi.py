@@ -0,0 +1,230 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from statistics import median
+from time import perf_counter, sleep
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Count
+from django.test import RequestFactory, override_settings
+from rest_framework.authtoken.models import Token
+
+from api.catalogue import ingredients_index
+from backend.postgresql.base import pool_stats
+from recipes.models import Ingredient, Recipe, ShopingCart
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность обработчиков WSGI и ASGI '
+        'проекта в одном процессе при большом числе одновременных '
+        'клиентов. WSGI-сервер моделируется ограниченным числом '
+        'синхронных воркеров, ASGI - одним циклом событий с пулом '
+        'потоков ASYNC_DB_THREADS. Медленный клиент моделируется '
+        'задержкой на каждый чанк ответа.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=64)
+        parser.add_argument(
+            '--requests', type=int, default=320,
+            help='Число запросов к маршруту в каждом режиме.'
+        )
+        parser.add_argument(
+            '--wsgi-workers', type=int, default=4,
+            help='Число синхронных воркеров WSGI-сервера.'
+        )
+        parser.add_argument(
+            '--client-delay', type=float, default=0,
+            help='Задержка клиента на чанк ответа, мс.'
+        )
+        parser.add_argument('--output', help='Файл результата (JSON).')
+
+    def get_routes(self):
+        """Маршруты чтения, которые в режиме ASGI асинхронные."""
+        recipe = Recipe.objects.order_by('-favorites_count').first()
+        word = Ingredient.objects.values_list('name', flat=True).first()
+        if recipe is None or word is None:
+            raise CommandError('Нет данных: выполните generate_dataset.')
+        return (
+            ('recipes', '/api/recipes/'),
+            ('recipe_detail', f'/api/recipes/{recipe.id}/'),
+            ('ingredients', f'/api/ingredients/?name={word[:2]}'),
+            ('tags', '/api/tags/'),
+            ('subscriptions', '/api/users/subscriptions/?recipes_limit=3'),
+            ('download_shopping_cart',
+             '/api/recipes/download_shopping_cart/'),
+        )
+
+    def run_wsgi(self, path, token, clients, total, workers, delay):
+        """
+        Клиенты в потоках; обработку выполняет не больше workers
+        потоков одновременно, как у синхронных воркеров gunicorn.
+        Воркер занят и пока отдаёт ответ медленному клиенту.
+        """
+        handler = WSGIHandler()
+        factory = RequestFactory()
+        server = threading.BoundedSemaphore(workers)
+
+        def request():
+            environ = factory.get(
+                path, SERVER_NAME='localhost',
+                HTTP_AUTHORIZATION=f'Token {token}',
+            ).environ
+            statuses = []
+            started = perf_counter()
+            with server:
+                body = handler(
+                    environ,
+                    lambda status, headers, exc_info=None:
+                        statuses.append(int(status.split()[0]))
+                )
+                for chunk in body:
+                    if delay and chunk:
+                        sleep(delay)
+                body.close()
+            return perf_counter() - started, statuses[0]
+
+        def client(count):
+            try:
+                return [request() for _ in range(count)]
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            started = perf_counter()
+            results = pool.map(client, self.split(total, clients))
+            results = [item for chunk in results for item in chunk]
+        return perf_counter() - started, results
+
+    async def run_asgi(self, path, token, clients, total, delay):
+        """Клиенты - сопрограммы в одном цикле событий с ASGIHandler."""
+        handler = ASGIHandler()
+        path, _, query = path.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'query_string': query.encode(),
+            'headers': [
+                (b'host', b'localhost'),
+                (b'authorization', f'Token {token}'.encode()),
+            ],
+            'server': ('localhost', 80),
+            'client': ('127.0.0.1', 0),
+        }
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def request():
+            statuses = []
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+                elif delay and message.get('body'):
+                    await asyncio.sleep(delay)
+
+            started = perf_counter()
+            await handler(dict(scope), receive, send)
+            return perf_counter() - started, statuses[0]
+
+        async def client(count):
+            return [await request() for _ in range(count)]
+
+        started = perf_counter()
+        results = await asyncio.gather(
+            *map(client, self.split(total, clients))
+        )
+        results = [item for chunk in results for item in chunk]
+        return perf_counter() - started, results
+
+    def split(self, total, clients):
+        """Распределяет total запросов между клиентами."""
+        return [
+            total // clients + (number < total % clients)
+            for number in range(clients)
+        ]
+
+    def summary(self, elapsed, results):
+        timings = [timing for timing, _ in results]
+        return {
+            'rps': round(len(results) / elapsed, 1),
+            'p50_ms': round(median(timings) * 1000, 2),
+            'p95_ms': round(percentile(timings, 0.95) * 1000, 2),
+            'errors': sum(status >= 500 for _, status in results),
+        }
+
+    def handle(self, *args, **options):
+        user_id = (
+            ShopingCart.objects.values('user').annotate(total=Count('id'))
+            .order_by('-total').values_list('user', flat=True).first()
+        )
+        if user_id is None:
+            raise CommandError('Нет данных: выполните generate_dataset.')
+        token, _ = Token.objects.get_or_create(user_id=user_id)
+        ingredients_index.build()
+        clients = options['concurrency']
+        total = max(options['requests'], clients)
+        delay = options['client_delay'] / 1000
+
+        result = {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'concurrency': clients,
+            'requests': total,
+            'wsgi_workers': options['wsgi_workers'],
+            'async_db_threads': settings.ASYNC_DB_THREADS,
+            'client_delay_ms': options['client_delay'],
+            'routes': {},
+        }
+        for name, path in self.get_routes():
+            wsgi = self.summary(*self.run_wsgi(
+                path, token.key, clients, total,
+                options['wsgi_workers'], delay
+            ))
+            with override_settings(ROOT_URLCONF='backend.asgi_urls'):
+                asgi = self.summary(*asyncio.run(self.run_asgi(
+                    path, token.key, clients, total, delay
+                )))
+            result['routes'][name] = {'wsgi': wsgi, 'asgi': asgi}
+            self.stdout.write(
+                f'{name:24} '
+                f'WSGI {wsgi["rps"]:8.1f} rps p95 {wsgi["p95_ms"]:9.2f} мс | '
+                f'ASGI {asgi["rps"]:8.1f} rps p95 {asgi["p95_ms"]:9.2f} мс'
+                + (
+                    f' | ошибок {wsgi["errors"]}/{asgi["errors"]}'
+                    if wsgi['errors'] or asgi['errors'] else ''
+                )
+            )
+
+        result['db_pools'] = pool_stats()
+        for key, stats in result['db_pools'].items():
+            self.stdout.write(
+                f'Пул {key}: выдач {stats["acquired"]}, '
+                f'ожиданий {stats["waits"]}, '
+                f'макс. ожидание {stats["wait_max"] * 1000:.1f} мс, '
+                f'таймаутов {stats["timeouts"]}'
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(result, file, ensure_ascii=False, indent=2)
+            self.stdout.write(
+                self.style.SUCCESS(f'Результат: {options["output"]}')
+            )
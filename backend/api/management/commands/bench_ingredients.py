@@ -0,0 +1,63 @@
+import random
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from api.catalogue import ingredients_index
+from api.filters import IngredientsFilter
+from api.serializers import IngredientSerializer
+from recipes.models import Ingredient
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск ингредиентов по началу названия: '
+        'запрос через IngredientsFilter и индекс в памяти процесса.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        names = list(Ingredient.objects.values_list('name', flat=True))
+        if not names:
+            self.stderr.write('Справочник ингредиентов пуст.')
+            return
+
+        rng = random.Random(options['seed'])
+        prefixes = [
+            rng.choice(names)[:rng.randint(1, 3)]
+            for _ in range(options['queries'])
+        ]
+
+        def orm_search(prefix):
+            queryset = IngredientsFilter(
+                {'name': prefix}, queryset=Ingredient.objects.all()
+            ).qs
+            return IngredientSerializer(queryset, many=True).data
+
+        started = perf_counter()
+        ingredients_index.build()
+        build_time = perf_counter() - started
+
+        self.stdout.write(
+            f'Ингредиентов: {len(names)}, запросов: {len(prefixes)}, '
+            f'построение индекса: {build_time * 1000:.1f} мс'
+        )
+        for title, search in (
+            ('ORM (istartswith)', orm_search),
+            ('Индекс в памяти', ingredients_index.search),
+        ):
+            timings = []
+            for prefix in prefixes:
+                started = perf_counter()
+                search(prefix)
+                timings.append(perf_counter() - started)
+            timings.sort()
+            self.stdout.write(
+                f'{title}: p50 {median(timings) * 1e6:.1f} мкс, '
+                f'p95 {timings[int(len(timings) * 0.95)] * 1e6:.1f} мкс, '
+                f'всего {sum(timings) * 1000:.1f} мс'
+            )
@@ -0,0 +1,122 @@
+import json
+import os
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from api.loadtest import (
+    DEFAULT_WEIGHTS, HttpTransport, InProcessTransport, PostmanLoadRunner,
+    load_collection
+)
+
+DEFAULT_COLLECTION = os.path.join(
+    os.path.dirname(settings.BASE_DIR),
+    'postman-collection', 'diploma.postman_collection.json'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный прогон postman-коллекции: каждый виртуальный '
+        'пользователь выполняет коллекцию, затем запросы повторяются '
+        'по весам папок. Без --base-url запросы идут в WSGI-приложение '
+        'внутри процесса.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'collection', nargs='?', default=DEFAULT_COLLECTION
+        )
+        parser.add_argument(
+            '--base-url',
+            help='Адрес запущенного сервера, например http://127.0.0.1:8000'
+        )
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--duration', type=float, default=30,
+            help='Длительность нагрузочной фазы, с.'
+        )
+        parser.add_argument(
+            '--weight', action='append', default=[], metavar='ПАПКА=ВЕС',
+            help='Вес папки коллекции (0 - не повторять).'
+        )
+        parser.add_argument(
+            '--include-writes', action='store_true',
+            help='Повторять не только GET-запросы.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Сохранить отчёт в JSON.')
+        parser.add_argument(
+            '--cleanup', action='store_true',
+            help='Удалить созданных прогоном пользователей.'
+        )
+
+    def get_weights(self, values):
+        weights = dict(DEFAULT_WEIGHTS)
+        for value in values:
+            folder, _, weight = value.rpartition('=')
+            if not folder or not weight.isdigit():
+                raise CommandError(f'Ожидается ПАПКА=ВЕС: {value}')
+            weights[folder] = int(weight)
+        return weights
+
+    def handle(self, *args, **options):
+        if not os.path.isfile(options['collection']):
+            raise CommandError(f'Файл не найден: {options["collection"]}')
+        requests, variables = load_collection(options['collection'])
+        base_url = options['base_url']
+        run_tag = f'load{datetime.now():%m%d%H%M%S}'
+        try:
+            runner = PostmanLoadRunner(
+                requests, variables,
+                weights=self.get_weights(options['weight']),
+                transport_factory=(
+                    (lambda: HttpTransport(base_url)) if base_url
+                    else InProcessTransport
+                ),
+                run_tag=run_tag,
+                include_writes=options['include_writes'],
+                seed=options['seed'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+
+        self.stdout.write(
+            f'Прогон {run_tag}: {options["concurrency"]} пользователей, '
+            f'{options["duration"]} с, {base_url or "внутри процесса"}'
+        )
+        try:
+            reports = runner.run(options['concurrency'], options['duration'])
+        finally:
+            if options['cleanup']:
+                deleted, _ = get_user_model().objects.filter(
+                    username__contains=f'-{run_tag}-'
+                ).delete()
+                self.stdout.write(f'Удалено объектов: {deleted}')
+
+        for phase, report in reports.items():
+            self.write_report(phase, report)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(
+                    {'run': run_tag, 'base_url': base_url, **reports},
+                    file, ensure_ascii=False, indent=2
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f'Отчёт: {options["output"]}'
+            ))
+
+    def write_report(self, phase, report):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{phase}: {report["requests"]} запросов за '
+            f'{report["elapsed_s"]} с, {report["rps"]} запросов/с'
+        ))
+        for endpoint, stats in report['endpoints'].items():
+            self.stdout.write(
+                f'  {endpoint[:60]:60} {stats["requests"]:6} '
+                f'{stats["rps"]:8.1f}/с p50 {stats["p50_ms"]:8.2f} '
+                f'p95 {stats["p95_ms"]:8.2f} p99 {stats["p99_ms"]:8.2f} мс '
+                f'ошибки {stats["error_rate"]:.1%}'
+            )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import recipe_cache
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает число попаданий и промахов кеша представлений '
+        'рецептов. Для LocMemCache счётчики свои у каждого процесса, '
+        'общие значения видны при Redis или Memcached.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true', help='Обнулить счётчики.'
+        )
+
+    def handle(self, *args, **options):
+        stats = recipe_cache.stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total * 100 if total else 0
+        self.stdout.write(
+            f'Попаданий: {stats["hits"]}, промахов: {stats["misses"]}, '
+            f'доля попаданий: {ratio:.1f}%'
+        )
+        if options['reset']:
+            recipe_cache.reset_stats()
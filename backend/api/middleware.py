@@ -0,0 +1,114 @@
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.permissions import SAFE_METHODS
+
+from backend.db_router import (
+    get_replicas, pin_to_primary, route_reads, set_pin_cookie
+)
+from .instrumentation import instrument_connections, record_request_queries
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCountMiddleware:
+    """
+    Добавляет к ответу число SQL-запросов, время работы с БД
+    и время получения соединения (заголовки X-DB-Queries,
+    X-DB-Duplicates и Server-Timing),
+    повторяющиеся запросы пишет в лог.
+    Включается настройкой QUERY_INSTRUMENTATION.
+    Запросы, выполненные при отдаче потокового ответа,
+    в заголовки не попадают: они отправлены раньше.
+    Поддерживает синхронный и асинхронный режимы: в режиме ASGI
+    запросы не выполняются по одному в общем потоке.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        instrument_connections()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with record_request_queries() as queries:
+            response = self.get_response(request)
+        return self.add_headers(request, response, queries)
+
+    async def __acall__(self, request):
+        with record_request_queries() as queries:
+            response = await self.get_response(request)
+        return self.add_headers(request, response, queries)
+
+    def add_headers(self, request, response, queries):
+        duplicates = queries.duplicates
+        response['X-DB-Queries'] = str(queries.count)
+        response['X-DB-Duplicates'] = str(
+            sum(duplicates.values()) - len(duplicates)
+        )
+        response['Server-Timing'] = (
+            f'db;dur={queries.duration * 1000:.1f};'
+            f'desc="{queries.count} queries", '
+            f'db-connect;dur={queries.connect_duration * 1000:.1f}'
+        )
+        for sql, count in duplicates.items():
+            logger.warning(
+                '%s %s: запрос выполнен %d раз: %s',
+                request.method, request.path, count, sql
+            )
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Запросы безопасных методов читают данные с реплики БД
+    (backend.db_router), после успешной записи клиент на время
+    закрепляется за основной БД подписанной cookie.
+    Включается, если в settings.DATABASE_REPLICAS есть реплики.
+    Поддерживает синхронный и асинхронный режимы: реплика запроса
+    хранится в переменной контекста и видна в потоках sync_to_async.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not get_replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.method in SAFE_METHODS:
+            with route_reads(request):
+                response = self.get_response(request)
+        else:
+            response = self.get_response(request)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        if request.method in SAFE_METHODS:
+            with route_reads(request):
+                response = await self.get_response(request)
+        else:
+            response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request)
+        if getattr(request, 'db_primary_pin', False):
+            set_pin_cookie(response)
+        return response
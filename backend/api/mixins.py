@@ -0,0 +1,53 @@
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """
+    Условные GET-запросы (If-None-Match, If-Modified-Since).
+    Валидаторы вычисляются до сериализации: если они совпали
+    с переданными клиентом, сразу возвращается 304 без тела.
+    """
+
+    conditional_actions = ('list', 'retrieve')
+
+    def get_validators(self, request):
+        """
+        Возвращает пару (etag, last_modified) для текущего запроса.
+        last_modified - datetime или None.
+        """
+        return None, None
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        if self.action not in self.conditional_actions:
+            return handler(request, *args, **kwargs)
+
+        etag, last_modified = self.get_validators(request)
+        if etag is None and last_modified is None:
+            return handler(request, *args, **kwargs)
+
+        etag = quote_etag(etag) if etag else None
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(
+            request._request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            if etag:
+                response['ETag'] = etag
+            if timestamp:
+                response['Last-Modified'] = http_date(timestamp)
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
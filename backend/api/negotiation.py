@@ -0,0 +1,18 @@
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+
+
+class FallbackContentNegotiation(DefaultContentNegotiation):
+    """
+    Выбор рендерера по заголовку Accept с запасным вариантом:
+    если ни один рендерер не подходит под Accept (например,
+    application/json для скачивания файла), используется первый.
+    Неизвестный формат в параметре format по-прежнему даёт 404.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        try:
+            return super().select_renderer(request, renderers, format_suffix)
+        except NotAcceptable:
+            renderer = renderers[0]
+            return renderer, renderer.media_type
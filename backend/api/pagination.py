@@ -0,0 +1,57 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class RecipeCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация ленты рецептов по убыванию id.
+    Страница выбирается условием по id вместо OFFSET
+    и не требует COUNT(*), поэтому её стоимость не зависит от глубины.
+    """
+
+    ordering = '-id'
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Курсор стабилен только при сортировке по уникальному полю,
+        поэтому параметр ordering в этом режиме не учитывается.
+        """
+        return (self.ordering,)
+
+
+class FeedCursorPagination(RecipeCursorPagination):
+    """Курсорная пагинация ленты подписок по убыванию id рецепта."""
+
+    ordering = '-recipe_id'
+
+
+class RecipePagination(PageNumberPagination):
+    """
+    Пагинация рецептов.
+    По умолчанию постраничная (page), как ожидает фронтенд.
+    Курсорный режим включается параметром pagination=cursor
+    либо наличием параметра cursor из ссылок next/previous.
+    """
+
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        ):
+            self.cursor_paginator = RecipeCursorPagination()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
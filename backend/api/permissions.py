@@ -28,4 +28,4 @@ class IsAuthorOrReadOnly(BasePermission):
         )
 
     def has_object_permission(self, request, view, obj):
-        return obj.author == request.user
+        return obj.author_id == request.user.id
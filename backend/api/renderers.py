@@ -0,0 +1,239 @@
+import csv
+
+from rest_framework.renderers import BaseRenderer
+
+CHUNK_SIZE = 8 * 1024
+
+
+class ShoppingListRenderer(BaseRenderer):
+    """
+    Базовый рендерер списка покупок.
+    Документ отдаётся генератором чанков: строки списка читаются
+    из итератора по мере отправки ответа, без сборки файла в памяти.
+    """
+
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Рендерит обычный ответ DRF, например, ошибку доступа."""
+        if data is None:
+            return b''
+        if isinstance(data, dict):
+            data = data.get('detail', data)
+        return b''.join(self.stream(str(data), ()))
+
+    def stream(self, title, rows):
+        """
+        Генератор документа: заголовок, пронумерованные строки
+        (name, measurement_unit, amount) и окончание.
+        Мелкие части объединяются в чанки размером около CHUNK_SIZE.
+        """
+        buffer, size = [], 0
+        parts = self._parts(title, rows)
+        for part in parts:
+            buffer.append(part)
+            size += len(part)
+            if size >= CHUNK_SIZE:
+                yield b''.join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield b''.join(buffer)
+
+    def _parts(self, title, rows):
+        yield from self.start(title)
+        for number, (name, unit, amount) in enumerate(rows, start=1):
+            yield from self.row(number, name, unit, amount)
+        yield from self.end()
+
+    def start(self, title):
+        return ()
+
+    def row(self, number, name, unit, amount):
+        raise NotImplementedError
+
+    def end(self):
+        return ()
+
+
+class TxtShoppingListRenderer(ShoppingListRenderer):
+    """Список покупок в текстовом формате."""
+
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def start(self, title):
+        yield f'{title}\n'.encode(self.charset)
+
+    def row(self, number, name, unit, amount):
+        yield f'\n {number}. {name} ({unit}) - {amount}'.encode(self.charset)
+
+
+class CsvShoppingListRenderer(ShoppingListRenderer):
+    """Список покупок в формате CSV."""
+
+    media_type = 'text/csv'
+    format = 'csv'
+    header = ('№', 'Ингредиент', 'Единица измерения', 'Количество')
+
+    class Echo:
+        """Псевдобуфер для csv.writer: возвращает записанную строку."""
+
+        def write(self, value):
+            return value
+
+    def __init__(self):
+        self.writer = csv.writer(self.Echo())
+
+    def start(self, title):
+        # BOM нужен, чтобы Excel распознал кодировку UTF-8.
+        yield '\ufeff'.encode(self.charset)
+        yield self.writer.writerow(self.header).encode(self.charset)
+
+    def row(self, number, name, unit, amount):
+        yield self.writer.writerow(
+            (number, name, unit, amount)
+        ).encode(self.charset)
+
+
+class PdfShoppingListRenderer(ShoppingListRenderer):
+    """
+    Список покупок в формате PDF.
+    Страницы записываются по мере заполнения, смещения объектов
+    считаются на лету, таблица xref выводится в конце документа.
+    Текст набирается стандартным шрифтом Helvetica в кодировке
+    cp1251 с таблицей Differences для кириллических глифов.
+    """
+
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+
+    page_width, page_height = 595, 842
+    margin = 50
+    font_size = 12
+    leading = 16
+    lines_per_page = (page_height - 2 * margin) // leading
+
+    catalog_id, pages_id, font_id = 1, 2, 3
+    cyrillic_glyphs = (
+        ('АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ', 10017),
+        ('абвгдеёжзийклмнопрстуфхцчшщъыьэюя', 10065),
+        ('№', 61352),
+    )
+
+    def _parts(self, title, rows):
+        self.offset = 0
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = self.font_id + 1
+        self.lines = []
+        yield self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        yield self._object(
+            self.catalog_id,
+            f'<< /Type /Catalog /Pages {self.pages_id} 0 R >>'.encode()
+        )
+        yield self._object(self.font_id, self._font())
+        yield from super()._parts(title, rows)
+
+    def start(self, title):
+        return self._add_line(title)
+
+    def row(self, number, name, unit, amount):
+        return self._add_line(f'{number}. {name} ({unit}) - {amount}')
+
+    def end(self):
+        if self.lines or not self.page_ids:
+            yield from self._flush_page()
+        kids = ' '.join(f'{page_id} 0 R' for page_id in self.page_ids)
+        yield self._object(
+            self.pages_id,
+            f'<< /Type /Pages /Kids [{kids}] '
+            f'/Count {len(self.page_ids)} >>'.encode()
+        )
+        xref_offset = self.offset
+        size = self.next_id
+        xref = [f'xref\n0 {size}\n0000000000 65535 f \n']
+        xref.extend(
+            f'{self.offsets[object_id]:010d} 00000 n \n'
+            for object_id in range(1, size)
+        )
+        xref.append(
+            f'trailer\n<< /Size {size} /Root {self.catalog_id} 0 R >>\n'
+            f'startxref\n{xref_offset}\n%%EOF\n'
+        )
+        yield self._write(''.join(xref).encode())
+
+    def _add_line(self, text):
+        self.lines.append(text)
+        if len(self.lines) >= self.lines_per_page:
+            yield from self._flush_page()
+
+    def _flush_page(self):
+        commands = [
+            f'BT /F1 {self.font_size} Tf {self.leading} TL '
+            f'{self.margin} {self.page_height - self.margin} Td'.encode()
+        ]
+        commands.extend(
+            b'(' + self._escape(line) + b') Tj T*' for line in self.lines
+        )
+        commands.append(b'ET')
+        content = b'\n'.join(commands)
+        self.lines = []
+
+        content_id = self._new_id()
+        yield self._object(
+            content_id,
+            f'<< /Length {len(content)} >>\nstream\n'.encode()
+            + content + b'\nendstream'
+        )
+        page_id = self._new_id()
+        self.page_ids.append(page_id)
+        yield self._object(
+            page_id,
+            f'<< /Type /Page /Parent {self.pages_id} 0 R '
+            f'/MediaBox [0 0 {self.page_width} {self.page_height}] '
+            f'/Resources << /Font << /F1 {self.font_id} 0 R >> >> '
+            f'/Contents {content_id} 0 R >>'.encode()
+        )
+
+    def _font(self):
+        differences = ' '.join(
+            f'{letter.encode("cp1251")[0]} /afii{first + index}'
+            for letters, first in self.cyrillic_glyphs
+            for index, letter in enumerate(letters)
+        )
+        return (
+            '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica '
+            '/Encoding << /Type /Encoding /BaseEncoding /WinAnsiEncoding '
+            f'/Differences [{differences}] >> >>'
+        ).encode()
+
+    def _escape(self, text):
+        return (
+            text.encode('cp1251', errors='replace')
+            .replace(b'\\', b'\\\\')
+            .replace(b'(', b'\\(')
+            .replace(b')', b'\\)')
+        )
+
+    def _new_id(self):
+        object_id = self.next_id
+        self.next_id += 1
+        return object_id
+
+    def _object(self, object_id, body):
+        self.offsets[object_id] = self.offset
+        return self._write(
+            f'{object_id} 0 obj\n'.encode() + body + b'\nendobj\n'
+        )
+
+    def _write(self, data):
+        self.offset += len(data)
+        return data
+
+
+SHOPPING_LIST_RENDERERS = (
+    TxtShoppingListRenderer,
+    CsvShoppingListRenderer,
+    PdfShoppingListRenderer,
+)
@@ -1,17 +1,37 @@
 from django.contrib.auth import get_user_model
-from django.db.models import F
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Manager, Prefetch, prefetch_related_objects
 from djoser.serializers import UserSerializer
 from drf_base64.fields import Base64ImageField
 from rest_framework import serializers
 
+from recipes.images import VARIANT_FORMATS, variant_name
 from recipes.models import (
     FavoriteRecipe, IngredientInRecipe, Ingredient,
-    Recipe, Follow, Tag, ShopingCart
+    Recipe, Follow, Tag, ShopingCart, ShoppingListItem
 )
-from .utils import create_update_recipes
+from .cache import recipe_cache
+from .utils import (
+    create_update_recipes, get_recipes_by_author, get_recipes_limit
+)
+
 User = get_user_model()
 
 
+def ingredients_prefetch():
+    """
+    Prefetch строк IngredientInRecipe вместе с ингредиентами,
+    отсортированных по названию ингредиента.
+    """
+    return Prefetch(
+        'ingredient_recipe',
+        queryset=IngredientInRecipe.objects.select_related(
+            'ingredient'
+        ).order_by('ingredient__name')
+    )
+
+
 class CustomUserSerializer(UserSerializer):
     """
     Сериализатор для пользовательской модели.
@@ -28,14 +48,22 @@ class CustomUserSerializer(UserSerializer):
     def get_is_subscribed(self, obj):
         """
         Получает значение, указывающее, подписан ли пользователь на автора.
+        Значение берётся из аннотации queryset или из множества
+        подписок в контексте; запрос к БД - только если нет ни того,
+        ни другого.
         """
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+
+        subscriptions = self.context.get('subscriptions')
+        if subscriptions is not None:
+            return obj.id in subscriptions
+
         request = self.context.get('request')
         user = request.user if request else None
-        return (
-            Follow.objects
-            .filter(author_id=obj.id, user=user)
-            .exists()
-        ) if user else False
+        if not user or not user.is_authenticated or user.id == obj.id:
+            return False
+        return Follow.objects.filter(author_id=obj.id, user=user).exists()
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -70,30 +98,97 @@ class IngredientInRecipesSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount',)
 
 
+class ImageSrcsetField(serializers.Field):
+    """
+    Уменьшенные копии изображения рецепта в формате srcset:
+    {"webp": "<url> 300w, <url> 600w", "jpeg": "..."}.
+    Пока копии не созданы, возвращает пустой словарь.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        variants = recipe.image_variants
+        if variants.get('source') != recipe.image.name:
+            return {}
+        request = self.context.get('request')
+        srcset = {}
+        for variant_format in VARIANT_FORMATS:
+            urls = []
+            for width in variants['widths']:
+                url = default_storage.url(
+                    variant_name(recipe.image.name, width, variant_format)
+                )
+                if request:
+                    url = request.build_absolute_uri(url)
+                urls.append(f'{url} {width}w')
+            srcset[variant_format] = ', '.join(urls)
+        return srcset
+
+
 class RecipeMinifiedSerializer(serializers.ModelSerializer):
     """
     Краткий вариант сериализатора c рецептами.
-    Состоит из id, name, image, cooking_time.
+    Состоит из id, name, image, image_srcset, cooking_time.
     """
     image = Base64ImageField(
         required=False, allow_null=True
     )
+    image_srcset = ImageSrcsetField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time',)
+        fields = ('id', 'name', 'image', 'image_srcset', 'cooking_time',)
         read_only_fields = ('name', 'image', 'cooking_time',)
 
 
+class ShoppingListItemSerializer(serializers.ModelSerializer):
+    """Строка списка покупок: ингредиент и сумма по корзине."""
+
+    id = serializers.IntegerField(source='ingredient_id')
+    name = serializers.CharField(source='ingredient.name')
+    measurement_unit = serializers.CharField(
+        source='ingredient.measurement_unit'
+    )
+
+    class Meta:
+        model = ShoppingListItem
+        fields = ('id', 'name', 'measurement_unit', 'amount')
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    """Список id рецептов для массового добавления и удаления."""
+
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100,
+    )
+
+
+class RecipeListSerializer(serializers.ListSerializer):
+    """Список рецептов: представления читаются из кеша одной пачкой."""
+
+    def to_representation(self, data):
+        recipes = data.all() if isinstance(data, Manager) else data
+        return self.child.to_representations(list(recipes))
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     """
     Сериализатор для модели Recipe.
+    Общая для всех пользователей часть представления кешируется
+    (см. api.cache), флаги пользователя добавляются к ней на каждый запрос.
     """
     author = CustomUserSerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
     ingredients = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_srcset = ImageSrcsetField()
 
     class Meta(RecipeMinifiedSerializer.Meta):
         model = Recipe
@@ -101,42 +196,94 @@ class RecipeSerializer(serializers.ModelSerializer):
             'id', 'tags', 'author', 'ingredients',
             'is_favorited', 'is_in_shopping_cart', 'text',
         ) + RecipeMinifiedSerializer.Meta.fields
+        list_serializer_class = RecipeListSerializer
 
-    def get_ingredients(self, obj):
-        """Игредиенты рецепта с требуемым количеством."""
-        return obj.ingredients.values(
-            'id', 'name', 'measurement_unit',
-            amount=F('ingredient_inrecipe__amount')
+    def to_representation(self, instance):
+        return self.to_representations([instance])[0]
+
+    def to_representations(self, recipes):
+        """
+        Представления рецептов. Найденные в кеше дополняются флагами
+        пользователя, для остальных теги и ингредиенты загружаются
+        общим prefetch, а результат сохраняется в кеш.
+        """
+        cached, keys = recipe_cache.get_many(
+            recipes, self.context.get('request')
+        )
+        missing = [recipe for recipe in recipes if recipe.id not in cached]
+        fresh = {}
+        if missing:
+            prefetch_related_objects(missing, 'tags', ingredients_prefetch())
+            for recipe in missing:
+                fresh[recipe.id] = super().to_representation(recipe)
+            recipe_cache.set_many(fresh, keys)
+        return [
+            fresh[recipe.id] if recipe.id in fresh
+            else self.add_user_fields(recipe, cached[recipe.id])
+            for recipe in recipes
+        ]
+
+    def add_user_fields(self, recipe, data):
+        """Дополняет закешированное представление флагами пользователя."""
+        return dict(
+            data,
+            author=dict(
+                data['author'],
+                is_subscribed=self.fields['author'].get_is_subscribed(
+                    recipe.author
+                ),
+            ),
+            is_favorited=self.get_is_favorited(recipe),
+            is_in_shopping_cart=self.get_is_in_shopping_cart(recipe),
         )
 
-    def get_is_favorited(self, obj):
+    def get_ingredients(self, obj):
         """
-        Получает значение, указывающее, добавлен
-        ли рецепт в избранное у пользователя.
+        Игредиенты рецепта с требуемым количеством.
+        Строки берутся из prefetch вьюсета, без него загружаются
+        одним запросом.
+        """
+        prefetch_related_objects([obj], ingredients_prefetch())
+        return [
+            {
+                'id': item.ingredient.id,
+                'name': item.ingredient.name,
+                'measurement_unit': item.ingredient.measurement_unit,
+                'amount': item.amount,
+            } for item in obj.ingredient_recipe.all()
+        ]
+
+    def _get_user_flag(self, obj, flag, model):
         """
+        Возвращает флаг, аннотированный во вьюсете для всей страницы.
+        Если рецепт получен без аннотации (например, после создания),
+        выполняет отдельный запрос.
+        """
+        if hasattr(obj, flag):
+            return bool(getattr(obj, flag))
         request = self.context.get('request')
-        return (
+        return bool(
             request
             and request.user.is_authenticated
-            and FavoriteRecipe.objects.filter(
+            and model.objects.filter(
                 recipe_id=obj.id,
                 user=request.user
             ).exists()
         )
 
+    def get_is_favorited(self, obj):
+        """
+        Получает значение, указывающее, добавлен
+        ли рецепт в избранное у пользователя.
+        """
+        return self._get_user_flag(obj, 'is_favorited', FavoriteRecipe)
+
     def get_is_in_shopping_cart(self, obj):
         """
         Получает значение, указывающее, добавлен
         ли рецепт в корзину у пользователя.
         """
-        request = self.context.get('request')
-        return (
-            request
-            and ShopingCart.objects.filter(
-                recipe_id=obj.id,
-                user=request.user
-            ).exists()
-        )
+        return self._get_user_flag(obj, 'is_in_shopping_cart', ShopingCart)
 
 
 class RecipeAddSerializer(serializers.ModelSerializer):
@@ -196,8 +343,21 @@ class RecipeAddSerializer(serializers.ModelSerializer):
 
             ingredients_id.append(ingredient.get('id'))
 
+        found = Ingredient.objects.in_bulk(
+            [ingredient['id'] for ingredient in data]
+        )
+        missing = [
+            ingredient['id'] for ingredient in data
+            if ingredient['id'] not in found
+        ]
+        if missing:
+            raise serializers.ValidationError(
+                f'Ингредиенты с id {missing} не найдены.'
+            )
+
         return data
 
+    @transaction.atomic
     def create(self, validated_data):
         """Создание нового рецепта."""
         author = self.context.get('request').user
@@ -215,8 +375,14 @@ class RecipeAddSerializer(serializers.ModelSerializer):
 
         return create_update_recipes(validated_data, author=author)
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        """Обновление рецепта."""
+        """
+        Обновление рецепта.
+        Строка рецепта блокируется до конца транзакции,
+        чтобы одновременные правки не смешивали теги и ингредиенты.
+        """
+        Recipe.objects.select_for_update().filter(id=instance.id).exists()
         instance.name = validated_data.get('name', instance.name)
         instance.image = validated_data.get('image', instance.image)
         instance.cooking_time = validated_data.get(
@@ -236,9 +402,6 @@ class RecipeAddSerializer(serializers.ModelSerializer):
                 )
             instance.text = new_text
 
-        old_ingredients = IngredientInRecipe.objects.filter(
-            recipe_id=instance.id)
-        old_ingredients.delete()
         create_update_recipes(validated_data, instance=instance)
 
         instance.save()
@@ -246,10 +409,9 @@ class RecipeAddSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         """Переопределение Response-ответа."""
-        context = {'request': self.context.get('request')}
         serializer = RecipeSerializer(
             instance=instance,
-            context=context
+            context=self.context
         )
         return serializer.data
 
@@ -286,23 +448,24 @@ class FollowSerializer(CustomUserSerializer):
         Функция выдаёт список рецептов автора,
         на которого подписан пользователь.
         В каждом списке хранится id, name, image, cooking_time.
+        Рецепты всей страницы подписок загружаются во вьюсете
+        одним запросом и передаются через контекст.
         """
-        limit = self.context.get('request')._request.GET.get('recipes_limit')
-        recipes_data = Recipe.objects.filter(
-            author=obj.id
-        )
-        if limit:
-            recipes_data = recipes_data[:int(limit)]
+        recipes_by_author = self.context.get('recipes_by_author')
+        if recipes_by_author is None:
+            recipes_by_author = get_recipes_by_author(
+                [obj.id], get_recipes_limit(self.context.get('request'))
+            )
 
         serializer = RecipeMinifiedSerializer(
-            data=recipes_data,
-            many=True
+            recipes_by_author.get(obj.id, []),
+            many=True,
+            context=self.context
         )
-        serializer.is_valid()
         return serializer.data
 
     def get_recipes_count(self, obj):
         """
         Возвращает количество рецептов у избранного автора.
         """
-        return obj.recipe.count()
+        return obj.recipes_count
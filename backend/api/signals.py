@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from djoser.signals import user_registered
+from rest_framework.authtoken.models import Token
+
+from backend.db_router import get_replicas, pin_to_primary
+
+from recipes.models import Ingredient, IngredientInRecipe, Recipe, Tag
+from recipes.signals import ingredients_loaded
+from .cache import recipe_cache, token_cache
+from .catalogue import (
+    TAGS_CATALOGUE, bump_catalogue_version, ingredients_index, tag_bits
+)
+
+User = get_user_model()
+
+# Поля автора, которые входят в представление рецепта.
+AUTHOR_FIELDS = {'email', 'username', 'first_name', 'last_name'}
+
+
+@receiver((post_save, post_delete, ingredients_loaded), sender=Ingredient)
+def ingredients_changed(**kwargs):
+    """Сбрасывает индекс ингредиентов при изменении справочника."""
+    bump_catalogue_version(ingredients_index.catalogue)
+    ingredients_index.invalidate()
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tags_changed(**kwargs):
+    """Меняет ETag списка тегов и сбрасывает биты тегов."""
+    bump_catalogue_version(TAGS_CATALOGUE)
+    tag_bits.invalidate()
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_changed(instance, **kwargs):
+    """Сбрасывает кеш представления рецепта."""
+    recipe_cache.invalidate([instance.id])
+
+
+@receiver((post_save, post_delete), sender=IngredientInRecipe)
+def recipe_ingredient_changed(instance, **kwargs):
+    recipe_cache.invalidate([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(instance, action, reverse, pk_set, **kwargs):
+    """Сбрасывает кеш рецептов, у которых изменился список тегов."""
+    if not reverse:
+        if action.startswith('post_'):
+            recipe_cache.invalidate([instance.id])
+    elif action in ('post_add', 'post_remove'):
+        recipe_cache.invalidate(pk_set)
+    elif action == 'pre_clear':
+        recipe_cache.invalidate(
+            instance.recipe_set.values_list('id', flat=True)
+        )
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(instance, **kwargs):
+    """Выход из системы: токен удаляется и из кеша."""
+    token_cache.evict([instance.key])
+
+
+@receiver(post_save, sender=User)
+def user_changed(instance, update_fields, **kwargs):
+    """
+    Сбрасывает кешированные токены пользователя при смене пароля,
+    профиля или деактивации. Сохранение только last_login кеш
+    не затрагивает.
+    """
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    token_cache.evict(
+        Token.objects.filter(user=instance).values_list('key', flat=True)
+    )
+
+
+@receiver(post_save, sender=User)
+def author_changed(instance, created, update_fields, **kwargs):
+    """
+    Сбрасывает кеш рецептов автора при изменении его профиля.
+    Сохранение только last_login (вход в систему) кеш не затрагивает.
+    """
+    if created or update_fields and not AUTHOR_FIELDS & set(update_fields):
+        return
+    recipe_cache.invalidate(
+        Recipe.objects.filter(author=instance).values_list('id', flat=True)
+    )
+
+
+@receiver((user_logged_in, user_registered))
+def pin_new_session(request=None, **kwargs):
+    """
+    Новый пользователь или токен могут ещё не дойти до реплики:
+    следующие запросы клиента читают основную БД.
+    """
+    if request is not None and get_replicas():
+        pin_to_primary(request)
@@ -1,8 +1,16 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.response import Response
 
-from recipes.models import (IngredientInRecipe, Ingredient, Recipe)
+from recipes.counters import recount_for
+from recipes.shopping_list import change_cart, refresh_recipe
+from recipes.sql import delete_rows, insert_rows
+from recipes.models import Follow, IngredientInRecipe, Recipe, ShopingCart
 
 
 def add_del_recipesview(request, model, recipeminifiedserializer, **kwargs):
@@ -14,24 +22,19 @@ def add_del_recipesview(request, model, recipeminifiedserializer, **kwargs):
     recipe_id = kwargs['pk']
     user = request.user
     recipe_obj = get_object_or_404(Recipe, pk=recipe_id)
-    data = {
-        "id": recipe_id,
-        "name": recipe_obj.name,
-        "image": recipe_obj.image,
-        "cooking_time": recipe_obj.cooking_time,
-    }
 
     if request.method == 'POST':
         serializer = recipeminifiedserializer(
-            instance=data,
+            instance=recipe_obj,
             data=request.data,
             context={'request': request}
         )
 
         if serializer.is_valid():
-            model.objects.create(
-                user=user, recipe_id=recipe_id
-            )
+            with transaction.atomic():
+                model.objects.create(
+                    user=user, recipe_id=recipe_id
+                )
             return Response(
                 serializer.data, status=status.HTTP_200_OK
             )
@@ -50,26 +53,183 @@ def add_del_recipesview(request, model, recipeminifiedserializer, **kwargs):
     )
 
 
+def bulk_add_del_recipes(request, model, recipeminifiedserializer, ids):
+    """
+    Массовая версия add_del_recipesview: добавляет (POST) или удаляет
+    (DELETE) рецепты ids в избранном или списке покупок.
+    Рецепты проверяются одним in_bulk, добавление - один
+    INSERT ... ON CONFLICT DO NOTHING RETURNING, удаление - один
+    DELETE ... RETURNING. Счётчики рецептов пересчитываются одним
+    UPDATE, список покупок меняется одним INSERT ... SELECT:
+    массовые операции не вызывают сигналы.
+    Возвращает результат по каждому id в порядке запроса:
+    added, exists, removed, missing (рецепта нет в списке)
+    или not_found (рецепта нет).
+    """
+    user = request.user
+    ids = list(dict.fromkeys(ids))
+    recipes = Recipe.objects.only(
+        'name', 'image', 'image_variants', 'cooking_time'
+    ).in_bulk(ids)
+    queryset = model.objects.filter(user=user, recipe_id__in=recipes)
+
+    with transaction.atomic():
+        # Изменёнными считаются только строки, которые вставил или удалил
+        # этот запрос: одновременный запрос с теми же рецептами их
+        # не получит, и списки покупок не изменятся дважды.
+        if request.method == 'POST':
+            changed = set(insert_rows(
+                model, ('user_id', 'recipe_id'),
+                [(user.id, pk) for pk in recipes], 'recipe_id'
+            ))
+            statuses = ('added', 'exists')
+        else:
+            changed = set(delete_rows(queryset, returning='recipe_id'))
+            statuses = ('removed', 'missing')
+        if model is ShopingCart:
+            change_cart(
+                user.id, changed, 1 if request.method == 'POST' else -1
+            )
+        recount_for(model, changed)
+
+    results = []
+    for pk in ids:
+        if pk not in recipes:
+            results.append({'id': pk, 'status': 'not_found'})
+            continue
+        result = {
+            'id': pk,
+            'status': statuses[0] if pk in changed else statuses[1],
+        }
+        if request.method == 'POST':
+            result['recipe'] = recipeminifiedserializer(
+                recipes[pk], context={'request': request}
+            ).data
+        results.append(result)
+    return Response({'results': results}, status=status.HTTP_200_OK)
+
+
 def create_update_recipes(validated_data, author=None, instance=None):
-    """Утилита для RecipesSerializer для методов create, update."""
-    tags = validated_data.pop('tags')
-    ingredients = validated_data.pop('ingredientin_recipe')
+    """
+    Утилита для RecipesSerializer для методов create, update.
+    Теги и ингредиенты, не переданные в запросе, не изменяются.
+    """
+    tags = validated_data.pop('tags', None)
+    ingredients = validated_data.pop('ingredientin_recipe', None)
 
     if instance is None:
         recipe = Recipe.objects.create(author=author, **validated_data)
     else:
         recipe = instance
 
-    recipe.tags.set(tags)
+    if tags is not None:
+        recipe.tags.set(tags)
+
+    if ingredients is not None:
+        update_recipe_ingredients(recipe, ingredients, created=not instance)
+
+    return recipe
+
+
+def update_recipe_ingredients(recipe, ingredients, created=False):
+    """
+    Приводит ингредиенты рецепта к переданному списку:
+    удаляет лишние строки IngredientInRecipe, обновляет изменившиеся
+    количества и добавляет новые. Неизменённые строки не трогаются.
+    Строки удаляются одним DELETE без сигналов, списки покупок
+    пересчитываются одним вызовом по всем затронутым ингредиентам.
+    """
+    amounts = {
+        ingredient['id']: ingredient['amount'] for ingredient in ingredients
+    }
+    current = {} if created else {
+        row.ingredient_id: row
+        for row in IngredientInRecipe.objects.filter(
+            recipe=recipe
+        ).order_by()
+    }
+
+    removed = current.keys() - amounts.keys()
+    if removed:
+        delete_rows(IngredientInRecipe.objects.filter(
+            recipe=recipe, ingredient_id__in=removed
+        ))
+
+    changed = []
+    for ingredient_id, row in current.items():
+        amount = amounts.get(ingredient_id)
+        if amount is not None and row.amount != amount:
+            row.amount = amount
+            changed.append(row)
+    if changed:
+        IngredientInRecipe.objects.bulk_update(changed, ('amount',))
 
     IngredientInRecipe.objects.bulk_create([
         IngredientInRecipe(
             recipe=recipe,
-            amount=ingredient.get('amount'),
-            ingredient=Ingredient.objects.get(
-                id=ingredient.get('id')
-            ),
-        ) for ingredient in ingredients
+            ingredient_id=ingredient_id,
+            amount=amount,
+        ) for ingredient_id, amount in amounts.items()
+        if ingredient_id not in current
     ])
+    if not created:
+        refresh_recipe(
+            recipe.id,
+            [row.ingredient_id for row in changed]
+            + list(amounts.keys() ^ current.keys())
+        )
 
-    return recipe
+
+def get_recipes_limit(request):
+    """Значение параметра recipes_limit запроса или None."""
+    limit = request.query_params.get('recipes_limit')
+    if limit and limit.isdigit():
+        return int(limit)
+    return None
+
+
+def get_recipes_by_author(author_ids, limit=None):
+    """
+    Рецепты авторов одним запросом, сгруппированные по id автора.
+    При заданном limit каждому автору нумеруются рецепты оконной
+    функцией ROW_NUMBER() OVER (PARTITION BY author), и в выборку
+    попадают только первые limit рецептов каждого автора.
+    """
+    recipes = Recipe.objects.filter(
+        author_id__in=author_ids
+    ).annotate(
+        preview_position=Window(
+            expression=RowNumber(),
+            partition_by=[F('author_id')],
+            order_by=[F('name').asc(), F('id').asc()],
+        )
+    ).order_by('author_id', 'name', 'id')
+
+    if limit is not None:
+        sql, params = recipes.query.sql_with_params()
+        recipes = Recipe.objects.raw(
+            f'SELECT * FROM ({sql}) AS previews '
+            'WHERE previews.preview_position <= %s '
+            'ORDER BY previews.preview_position',
+            (*params, limit)
+        )
+
+    recipes_by_author = defaultdict(list)
+    for recipe in recipes:
+        recipes_by_author[recipe.author_id].append(recipe)
+    return recipes_by_author
+
+
+def get_subscribed_authors(user):
+    """
+    Множество id авторов, на которых подписан пользователь.
+    Загружается одним запросом; для анонимного пользователя
+    запрос не выполняется.
+    """
+    if not user.is_authenticated:
+        return set()
+    return set(
+        Follow.objects.filter(user=user).order_by().values_list(
+            'author_id', flat=True
+        )
+    )
@@ -1,10 +1,12 @@
+from hashlib import md5
+
 from django.contrib.auth import get_user_model
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Count
+from django.db import transaction
+from django.db.models import BooleanField, Exists, OuterRef, Value
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
-from django.db.models import Sum
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
@@ -14,15 +16,29 @@ from rest_framework.pagination import PageNumberPagination
 
 from recipes.models import (
     ShopingCart, FavoriteRecipe, Follow,
-    Ingredient, Recipe, Tag, IngredientInRecipe)
+    Ingredient, Recipe, Tag)
+from recipes.feed import feed as user_feed
+from recipes.shopping_list import shopping_list
+from .negotiation import FallbackContentNegotiation
+from .renderers import SHOPPING_LIST_RENDERERS
+from .mixins import ConditionalGetMixin
+from .pagination import FeedCursorPagination, RecipePagination
 from .permissions import IsAdminOrReadOnly, IsAuthorOrReadOnly
 from .serializers import (
     CustomUserSerializer, FollowSerializer, IngredientSerializer,
-    RecipeAddSerializer, RecipeMinifiedSerializer,
-    RecipeSerializer, TagSerializer)
-from .utils import add_del_recipesview
+    RecipeAddSerializer, RecipeIdsSerializer, RecipeMinifiedSerializer,
+    RecipeSerializer, ShoppingListItemSerializer, TagSerializer)
+from .utils import (
+    add_del_recipesview, bulk_add_del_recipes, get_recipes_by_author,
+    get_recipes_limit, get_subscribed_authors
+)
+from .catalogue import (
+    TAGS_CATALOGUE, get_catalogue_updated_at, get_catalogue_version,
+    ingredients_index
+)
 from .filters import (
-    IngredientsFilter, RecipeFilter, RecipeOrderingFilter)
+    IngredientsFilter, RecipeFilter, RecipeOrderingFilter, RecipeSearchFilter
+)
 
 User = get_user_model()
 
@@ -37,6 +53,19 @@ class CustomUsersViewSet(UserViewSet):
         page_size_query_param = 'page_size'
         max_page_size = 100
 
+    def get_queryset(self):
+        """
+        Аннотирует пользователей флагом is_subscribed подзапросом EXISTS:
+        подписки всей страницы вычисляются в одном запросе.
+        """
+        queryset = super().get_queryset()
+        user = self.request.user
+        if self.action in ('list', 'retrieve') and user.is_authenticated:
+            queryset = queryset.annotate(is_subscribed=Exists(
+                Follow.objects.filter(user=user, author_id=OuterRef('pk'))
+            ))
+        return queryset
+
     @action(
         detail=True,
         methods=['POST'],
@@ -51,13 +80,14 @@ class CustomUsersViewSet(UserViewSet):
         serializer = FollowSerializer(
             instance=author_obj,
             data=request.data,
-            context={'request': request}
+            context={'request': request, 'subscriptions': {author_obj.id}}
         )
 
         if serializer.is_valid():
-            Follow.objects.create(
-                user=user, author_id=author_id
-            )
+            with transaction.atomic():
+                Follow.objects.create(
+                    user=user, author_id=author_id
+                )
             return Response(
                 serializer.data, status=status.HTTP_201_CREATED
             )
@@ -94,19 +124,26 @@ class CustomUsersViewSet(UserViewSet):
         """
         subscriptions_data = User.objects.filter(
             following__user=request.user
-        ).annotate(recipes_count=Count('recipe'))
+        )
 
         paginator = self.SubscriptionsPagination()
         page = paginator.paginate_queryset(subscriptions_data, request)
+        authors_ids = [author.id for author in page]
         serializer = FollowSerializer(
             page,
             many=True,
-            context={'request': request}
+            context={
+                'request': request,
+                'subscriptions': set(authors_ids),
+                'recipes_by_author': get_recipes_by_author(
+                    authors_ids, get_recipes_limit(request)
+                ),
+            }
         )
         return paginator.get_paginated_response(serializer.data)
 
 
-class TagsViewSet(viewsets.ReadOnlyModelViewSet):
+class TagsViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет для просмотра тегов."""
 
     queryset = Tag.objects.all()
@@ -114,8 +151,12 @@ class TagsViewSet(viewsets.ReadOnlyModelViewSet):
     pagination_class = None
     permission_classes = (IsAdminOrReadOnly,)
 
+    def get_validators(self, request):
+        """ETag тегов - версия справочника тегов."""
+        return f'tags-{get_catalogue_version(TAGS_CATALOGUE)}', None
+
 
-class IngredientsViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientsViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет для просмотра ингредиентов."""
 
     queryset = Ingredient.objects.all()
@@ -124,15 +165,111 @@ class IngredientsViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_class = IngredientsFilter
     permission_classes = (IsAdminOrReadOnly,)
 
+    def get_validators(self, request):
+        """ETag ингредиентов - версия справочника ингредиентов."""
+        version = get_catalogue_version(ingredients_index.catalogue)
+        return f'ingredients-{version}', None
 
-class RecipesViewSet(viewsets.ModelViewSet):
+    def list(self, request, *args, **kwargs):
+        """
+        Поиск ингредиентов по началу названия для автодополнения.
+        Ответ строится по индексу в памяти процесса, без запроса к БД.
+        """
+        return self.conditional_response(self.search, request)
+
+    def search(self, request):
+        """Ингредиенты, название которых начинается с параметра name."""
+        name = request.query_params.get('name', '')
+        return Response(list(ingredients_index.search(name)))
+
+
+class RecipesViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Вьюсет для просмотра и редактирования рецептов."""
 
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
-    filter_backends = (DjangoFilterBackend, RecipeOrderingFilter)
+    filter_backends = (
+        DjangoFilterBackend, RecipeSearchFilter, RecipeOrderingFilter
+    )
     permission_classes = (IsAuthorOrReadOnly | IsAdminOrReadOnly,)
     filterset_class = RecipeFilter
+    pagination_class = RecipePagination
+    conditional_actions = ('retrieve',)
+
+    def get_queryset(self):
+        """
+        Аннотирует рецепты флагами is_favorited и is_in_shopping_cart
+        для текущего пользователя: флаги вычисляются подзапросами
+        EXISTS в одном запросе на всю страницу.
+        Теги и ингредиенты загружает сериализатор, только для рецептов,
+        которых нет в кеше представлений.
+        """
+        queryset = super().get_queryset()
+        user = self.request.user
+
+        if self.action in ('list', 'retrieve', 'feed'):
+            queryset = queryset.select_related('author')
+
+        if not user.is_authenticated:
+            return queryset.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField()),
+            )
+
+        return queryset.annotate(
+            is_favorited=Exists(FavoriteRecipe.objects.filter(
+                user=user, recipe_id=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(ShopingCart.objects.filter(
+                user=user, recipe_id=OuterRef('pk')
+            )),
+        )
+
+    def get_validators(self, request):
+        """
+        ETag и Last-Modified страницы рецепта.
+        ETag учитывает дату изменения рецепта, профиль автора,
+        флаги текущего пользователя (избранное, корзина, подписка)
+        и версии справочников тегов и ингредиентов: их названия
+        входят в ответ.
+        Last-Modified отдаётся только анонимным пользователям:
+        для них ответ зависит лишь от рецепта и справочников.
+        """
+        user = self.request.user
+        is_subscribed = Exists(Follow.objects.filter(
+            user=user, author_id=OuterRef('author_id')
+        )) if user.is_authenticated else Value(False)
+        try:
+            recipe = self.get_queryset().prefetch_related(None).filter(
+                pk=self.kwargs.get('pk')
+            ).annotate(is_subscribed=is_subscribed).values_list(
+                'updated_at', 'is_favorited', 'is_in_shopping_cart',
+                'is_subscribed', 'author__email', 'author__username',
+                'author__first_name', 'author__last_name',
+            ).first()
+        except ValueError:
+            recipe = None
+        if recipe is None:
+            return None, None
+
+        catalogues = (TAGS_CATALOGUE, ingredients_index.catalogue)
+        versions = tuple(map(get_catalogue_version, catalogues))
+        etag = md5(repr((user.id, recipe, versions)).encode()).hexdigest()
+        if user.is_authenticated:
+            return etag, None
+        return etag, max(
+            recipe[0], *map(get_catalogue_updated_at, catalogues)
+        )
+
+    def get_serializer_context(self):
+        """
+        Добавляет в контекст id авторов, на которых подписан
+        пользователь: is_subscribed авторов рецептов вычисляется
+        без отдельного запроса на каждый рецепт.
+        """
+        context = super().get_serializer_context()
+        context['subscriptions'] = get_subscribed_authors(self.request.user)
+        return context
 
     def get_serializer_class(self):
         """
@@ -169,22 +306,107 @@ class RecipesViewSet(viewsets.ModelViewSet):
 
     @action(
         detail=False,
-        permission_classes=(IsAuthenticated,)
+        methods=['POST', 'DELETE'],
+        permission_classes=(IsAuthenticated,),
+        url_path='shopping_cart',
+        url_name='shopping-cart-bulk',
+    )
+    def cart_bulk(self, request):
+        """
+        Добавить или удалить несколько рецептов из списка покупок:
+        {"recipes": [id, ...]}.
+        """
+        return self.bulk_recipes(request, ShopingCart)
+
+    @action(
+        detail=False,
+        methods=['POST', 'DELETE'],
+        permission_classes=(IsAuthenticated,),
+        url_path='favorite',
+        url_name='favorite-bulk',
+    )
+    def favorite_bulk(self, request):
+        """
+        Добавить или удалить несколько рецептов в избранном:
+        {"recipes": [id, ...]}.
+        """
+        return self.bulk_recipes(request, FavoriteRecipe)
+
+    def bulk_recipes(self, request, model):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return bulk_add_del_recipes(
+            request, model, RecipeMinifiedSerializer,
+            serializer.validated_data['recipes']
+        )
+
+    @action(
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+    )
+    def feed(self, request):
+        """
+        Лента подписок: рецепты авторов, на которых подписан
+        пользователь, новые первыми. Страница - диапазон записей
+        ленты по курсору (параметры cursor и limit), затем рецепты
+        страницы одним запросом.
+        """
+        paginator = FeedCursorPagination()
+        entries = paginator.paginate_queryset(
+            user_feed(request.user).only('recipe_id'), request, view=self
+        )
+        recipes = self.get_queryset().in_bulk(
+            [entry.recipe_id for entry in entries]
+        )
+        serializer = self.get_serializer(
+            [recipes[entry.recipe_id] for entry in entries
+             if entry.recipe_id in recipes],
+            many=True
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        url_path='shopping_list',
+        url_name='shopping-list',
+    )
+    def cart_items(self, request):
+        """Список покупок в JSON: ингредиенты корзины с суммами."""
+        return Response(ShoppingListItemSerializer(
+            shopping_list(request.user), many=True
+        ).data)
+
+    @action(
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        renderer_classes=SHOPPING_LIST_RENDERERS,
+        content_negotiation_class=FallbackContentNegotiation,
     )
     def download_shopping_cart(self, request):
-        """Скачать файл со списком покупок. Формат TXT."""
-        shopping_cart = IngredientInRecipe.objects.filter(
-            recipe__shoppingcart_recipe__user=request.user,
-        ).order_by('ingredient__name').values_list(
+        """
+        Скачать файл со списком покупок.
+        Формат выбирается параметром format: txt (по умолчанию), csv, pdf.
+        Строки готового списка покупок читаются одним запросом
+        (их не больше, чем ингредиентов в справочнике), документ
+        рендерится по мере отправки клиенту. В режиме ASGI запрос
+        выполняется в потоке пула, а рендеринг - при отправке.
+        """
+        shopping_cart = list(shopping_list(request.user).values_list(
             'ingredient__name',
-            'ingredient__measurement_unit'
-        ).annotate(amount=Sum('amount'))
+            'ingredient__measurement_unit',
+            'amount'
+        ))
 
-        shopping_list = f'Список покупок {request.user}:\n'
-        for iter, (name, unit, amount) in enumerate(shopping_cart, start=1):
-            shopping_list += f'\n {iter}. {name} ({unit}) - {amount}'
+        renderer = request.accepted_renderer
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
 
-        filename = 'data.txt'
-        response = HttpResponse(shopping_list, content_type='text/plain')
+        response = StreamingHttpResponse(
+            renderer.stream(f'Список покупок {request.user}:', shopping_cart),
+            content_type=content_type
+        )
+        filename = f'data.{renderer.format}'
         response['Content-Disposition'] = f'attachment; filename={filename}'
         return response
@@ -0,0 +1,21 @@
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+os.environ.setdefault('DJANGO_ROOT_URLCONF', 'backend.asgi_urls')
+
+application = get_asgi_application()
+
+# Индекс ингредиентов строится при старте воркера, как в backend.wsgi.
+# Сервер может импортировать приложение внутри цикла событий,
+# поэтому запросы к БД выполняются в потоке пула async_views.
+from django.db import DatabaseError  # noqa: E402
+
+from api.async_views import executor  # noqa: E402
+from api.catalogue import ingredients_index  # noqa: E402
+
+try:
+    executor.submit(ingredients_index.build).result()
+except DatabaseError:
+    pass
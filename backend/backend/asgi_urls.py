@@ -0,0 +1,7 @@
+from api.async_views import async_patterns
+
+from .urls import urlpatterns as wsgi_urlpatterns
+
+# Маршруты режима ASGI: те же, что в backend.urls, но маршруты
+# чтения из api.async_views.ASYNC_ROUTES обслуживаются асинхронно.
+urlpatterns = async_patterns(wsgi_urlpatterns)
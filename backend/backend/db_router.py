@@ -0,0 +1,143 @@
+"""
+Чтение с реплик БД.
+
+Запросы безопасных методов (GET, HEAD, OPTIONS) читают данные с одной
+из реплик settings.DATABASE_REPLICAS, запись всегда идёт в default.
+Реплика выбирается при первом чтении и не меняется до конца запроса:
+по кругу (round_robin) или с наименьшим числом активных запросов
+процесса (least_connections), см. DATABASE_REPLICA_SELECTION.
+После записи клиент на DATABASE_REPLICA_PIN_SECONDS секунд
+закрепляется за основной БД, чтобы сразу видеть свои изменения:
+закрепление хранится в подписанной cookie клиента, поэтому действует
+в любом процессе, куда попадёт следующий запрос.
+"""
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import count
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'db_primary'
+PIN_SALT = 'backend.db_router.pin'
+# Модели, которые всегда читаются из основной БД: свежий токен
+# или сессия ещё могут не дойти до реплики.
+PRIMARY_MODELS = frozenset(('authtoken.token', 'sessions.session'))
+
+routing = ContextVar('db_routing', default=None)
+
+
+def get_replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+def pin_seconds():
+    return getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 5)
+
+
+def pin_to_primary(request):
+    """
+    Закрепляет чтение клиента за основной БД до конца запроса
+    и на pin_seconds() после него: ReplicaRoutingMiddleware
+    отдаёт клиенту cookie закрепления (set_pin_cookie).
+    """
+    request = getattr(request, '_request', request)
+    request.db_primary_pin = True
+
+
+def set_pin_cookie(response):
+    response.set_signed_cookie(
+        PIN_COOKIE, '1', salt=PIN_SALT, max_age=pin_seconds(),
+        httponly=True, samesite='Lax',
+        secure=settings.SESSION_COOKIE_SECURE,
+    )
+
+
+def is_pinned(request):
+    """Закреплён ли клиент за основной БД в этом запросе или cookie."""
+    request = getattr(request, '_request', request)
+    return getattr(request, 'db_primary_pin', False) or (
+        request.get_signed_cookie(
+            PIN_COOKIE, default=None, salt=PIN_SALT, max_age=pin_seconds()
+        ) is not None
+    )
+
+
+class ReplicaSelector:
+    """Выбор реплики и учёт активных запросов к репликам в процессе."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counter = count()
+        self.active = Counter()
+
+    def acquire(self, replicas):
+        with self.lock:
+            start = next(self.counter) % len(replicas)
+            replicas = replicas[start:] + replicas[:start]
+            alias = replicas[0]
+            if getattr(
+                settings, 'DATABASE_REPLICA_SELECTION', 'round_robin'
+            ) == 'least_connections':
+                alias = min(replicas, key=self.active.__getitem__)
+            self.active[alias] += 1
+            return alias
+
+    def release(self, alias):
+        with self.lock:
+            self.active[alias] -= 1
+
+
+selector = ReplicaSelector()
+
+
+class RequestRouting:
+    """Реплика запроса: выбирается при первом чтении."""
+
+    def __init__(self, request):
+        self.request = request
+        self.alias = None
+        self.acquired = False
+
+    def db_for_read(self):
+        if self.alias is None:
+            self.alias = DEFAULT_DB_ALIAS
+            replicas = get_replicas()
+            if replicas and not is_pinned(self.request):
+                self.alias = selector.acquire(replicas)
+                self.acquired = True
+        return self.alias
+
+    def close(self):
+        if self.acquired:
+            selector.release(self.alias)
+
+
+@contextmanager
+def route_reads(request):
+    """Чтение внутри блока with идёт с реплики."""
+    state = RequestRouting(request)
+    token = routing.set(state)
+    try:
+        yield state
+    finally:
+        routing.reset(token)
+        state.close()
+
+
+class ReplicaRouter:
+    """Чтение с реплики внутри route_reads, остальное - в default."""
+
+    def db_for_read(self, model, **hints):
+        state = routing.get()
+        if state is None or model._meta.label_lower in PRIMARY_MODELS:
+            return DEFAULT_DB_ALIAS
+        return state.db_for_read()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
@@ -0,0 +1,252 @@
+"""
+PostgreSQL с проверкой соединений и пулом соединений процесса.
+
+Дополнительные ключи настроек базы данных:
+CONN_HEALTH_CHECKS - перед первым запросом в рамках HTTP-запроса
+    постоянное соединение проверяется запросом SELECT 1 и при ошибке
+    открывается заново (как в Django 4.1);
+POOL - {'MAX_SIZE': ..., 'TIMEOUT': ...}: соединения берутся из пула
+    процесса не больше MAX_SIZE штук, ожидание свободного соединения
+    ограничено TIMEOUT секунд. Закрытое Django соединение возвращается
+    в пул, поэтому с пулом CONN_MAX_AGE должен быть 0.
+"""
+import logging
+import threading
+from functools import partial
+from time import monotonic, perf_counter
+
+from django.db.backends.postgresql import base
+from django.db.utils import OperationalError
+from psycopg2 import Error as DatabaseError
+from psycopg2 import extensions
+
+from api.instrumentation import active_recorder
+
+logger = logging.getLogger(__name__)
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """
+    Пул соединений psycopg2 с ограничением размера и временем ожидания.
+    Считает выдачи, открытые соединения, ожидания и их время.
+    """
+
+    def __init__(self, max_size, timeout=10, health_checks=False):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_checks = health_checks
+        self.idle = []
+        self.size = 0
+        self.condition = threading.Condition()
+        self.metrics = dict.fromkeys(
+            ('acquired', 'created', 'discarded', 'waits', 'timeouts'), 0
+        )
+        self.metrics.update(wait_total=0.0, wait_max=0.0)
+
+    def acquire(self, connect):
+        """
+        Возвращает (соединение, создано ли оно заново).
+        Свободное соединение берётся последним возвращённым, иначе
+        открывается новое, если пул не заполнен, иначе - ожидание.
+        """
+        started = perf_counter()
+        deadline = monotonic() + self.timeout
+        waited = False
+        with self.condition:
+            while True:
+                if self.idle:
+                    connection = self.idle.pop()
+                    break
+                if self.size < self.max_size:
+                    self.size += 1
+                    connection = None
+                    break
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    self.metrics['timeouts'] += 1
+                    raise OperationalError(
+                        f'Нет свободного соединения с БД за {self.timeout} с '
+                        f'(в пуле {self.max_size}).'
+                    )
+                waited = True
+                self.condition.wait(remaining)
+            self._record_wait(perf_counter() - started, waited)
+
+        if connection is not None and not self.is_usable(connection):
+            self.discard(connection)
+            return self.acquire(connect)
+        if connection is not None:
+            return connection, False
+        try:
+            connection = connect()
+        except BaseException:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+        with self.condition:
+            self.metrics['created'] += 1
+        return connection, True
+
+    def release(self, connection):
+        """
+        Возвращает соединение в пул. Незавершённая транзакция
+        откатывается, соединение в неизвестном состоянии закрывается.
+        """
+        status = (
+            extensions.TRANSACTION_STATUS_UNKNOWN if connection.closed
+            else connection.get_transaction_status()
+        )
+        if status in (
+            extensions.TRANSACTION_STATUS_INTRANS,
+            extensions.TRANSACTION_STATUS_INERROR,
+        ):
+            try:
+                connection.rollback()
+                status = connection.get_transaction_status()
+            except DatabaseError:
+                status = extensions.TRANSACTION_STATUS_UNKNOWN
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            self.discard(connection)
+            return
+        with self.condition:
+            self.idle.append(connection)
+            self.condition.notify()
+
+    def is_usable(self, connection):
+        if connection.closed:
+            return False
+        if not self.health_checks:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except DatabaseError:
+            return False
+        return True
+
+    def stats(self):
+        with self.condition:
+            return dict(
+                self.metrics, size=self.size, idle=len(self.idle),
+                max_size=self.max_size,
+            )
+
+    def discard(self, connection):
+        try:
+            connection.close()
+        except DatabaseError:
+            pass
+        with self.condition:
+            self.size -= 1
+            self.metrics['discarded'] += 1
+            self.condition.notify()
+
+    def _record_wait(self, duration, waited):
+        self.metrics['acquired'] += 1
+        self.metrics['wait_total'] += duration
+        self.metrics['wait_max'] = max(self.metrics['wait_max'], duration)
+        if waited:
+            self.metrics['waits'] += 1
+            logger.warning('Ожидание соединения с БД: %.3f с', duration)
+
+
+def get_pool(key, options, health_checks):
+    with pools_lock:
+        if key not in pools:
+            pools[key] = ConnectionPool(
+                options['MAX_SIZE'], options.get('TIMEOUT', 10),
+                health_checks,
+            )
+        return pools[key]
+
+
+def pool_stats():
+    """Метрики пулов процесса: {параметры подключения: метрики}."""
+    with pools_lock:
+        return {key: pool.stats() for key, pool in pools.items()}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Соединение Django с проверкой перед использованием и пулом.
+    connect_duration - суммарное время получения соединений
+    (ожидание пула и подключение) в потоке этого объекта.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connect_duration = 0.0
+        self.health_check_done = False
+        self.pool = None
+
+    def get_pool(self, conn_params):
+        options = self.settings_dict.get('POOL')
+        if not options or not options.get('MAX_SIZE'):
+            return None
+        key = '{host}:{port}/{database}@{user}'.format_map({
+            name: conn_params.get(name, '')
+            for name in ('host', 'port', 'database', 'user')
+        })
+        return get_pool(
+            key, options, self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+        )
+
+    def get_new_connection(self, conn_params):
+        started = perf_counter()
+        self.health_check_done = True
+        try:
+            self.pool = self.get_pool(conn_params)
+            if self.pool is None:
+                return super().get_new_connection(conn_params)
+            connection, created = self.pool.acquire(
+                partial(super().get_new_connection, conn_params)
+            )
+            if not created:
+                self.isolation_level = self.settings_dict['OPTIONS'].get(
+                    'isolation_level', connection.isolation_level
+                )
+            return connection
+        finally:
+            duration = perf_counter() - started
+            self.connect_duration += duration
+            recorder = active_recorder.get()
+            if recorder is not None:
+                recorder.connect_duration += duration
+
+    def _close(self):
+        if self.connection is None or self.pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            if self.in_atomic_block:
+                # Django сохраняет ссылку на соединение, закрытое внутри
+                # atomic: его нельзя отдавать другим потокам.
+                self.pool.discard(self.connection)
+            else:
+                self.pool.release(self.connection)
+
+    def close_if_unusable_or_obsolete(self):
+        """Вызывается в начале и в конце HTTP-запроса."""
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        """Проверяет постоянное соединение один раз за HTTP-запрос."""
+        if (
+            self.connection is None
+            or self.pool is not None
+            or self.health_check_done
+            or self.in_atomic_block
+            or not self.settings_dict.get('CONN_HEALTH_CHECKS')
+        ):
+            return
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
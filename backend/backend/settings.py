@@ -33,6 +33,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.QueryCountMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -42,7 +44,14 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'backend.urls'
+# Заголовки X-DB-Queries и Server-Timing со статистикой SQL-запросов.
+# Раскрывают сведения о запросах к БД, поэтому включаются только явно.
+QUERY_INSTRUMENTATION = os.getenv(
+    'QUERY_INSTRUMENTATION', 'false'
+).lower() in ('1', 'true', 'yes')
+
+# backend.asgi подставляет backend.asgi_urls с асинхронными маршрутами.
+ROOT_URLCONF = os.getenv('DJANGO_ROOT_URLCONF', 'backend.urls')
 
 TEMPLATES = [
     {
@@ -62,18 +71,71 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'backend.wsgi.application'
 
+ASGI_APPLICATION = 'backend.asgi.application'
+
+# Потоки для синхронного кода асинхронных представлений (режим ASGI).
+ASYNC_DB_THREADS = int(os.getenv('ASYNC_DB_THREADS', 16))
+
+
+# Пул соединений процесса (для воркеров с потоками и режима ASGI).
+# Без пула воркер держит постоянное соединение DB_CONN_MAX_AGE секунд.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 0))
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'backend.postgresql',
         'NAME': os.getenv('POSTGRES_DB'),
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
-        'PORT': os.getenv('DB_PORT')
+        'PORT': os.getenv('DB_PORT'),
+        'CONN_MAX_AGE': (
+            0 if DB_POOL_SIZE else int(os.getenv('DB_CONN_MAX_AGE', 60))
+        ),
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS', 'true'
+        ).lower() in ('1', 'true', 'yes'),
+        'POOL': {
+            'MAX_SIZE': DB_POOL_SIZE,
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        },
+        # PgBouncer в режиме transaction: курсоры на стороне сервера
+        # не переживают транзакцию, iterator() читает данные целиком.
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv(
+            'DB_PGBOUNCER', 'false'
+        ).lower() in ('1', 'true', 'yes'),
     }
 }
 
+# Реплики для чтения: DB_REPLICA_HOSTS=host1:5432,host2 (backend.db_router).
+# В тестах реплики - зеркала default.
+DATABASE_REPLICAS = []
+for number, address in enumerate(
+    filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1
+):
+    host, _, port = address.strip().partition(':')
+    alias = f'replica{number}'
+    DATABASES[alias] = dict(
+        DATABASES['default'], HOST=host,
+        PORT=port or DATABASES['default']['PORT'],
+        TEST={'MIRROR': 'default'},
+    )
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['backend.db_router.ReplicaRouter']
+
+# round_robin или least_connections.
+DATABASE_REPLICA_SELECTION = os.getenv(
+    'DB_REPLICA_SELECTION', 'round_robin'
+)
+# Сколько секунд после записи клиент читает основную БД (cookie).
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', 5))
+
+# Как часто процесс перечитывает версии справочников из БД, секунд
+# (api.catalogue): столько изменения справочников могут не доходить
+# до индексов в памяти и ETag других процессов.
+CATALOGUE_VERSION_TTL = float(os.getenv('CATALOGUE_VERSION_TTL', 1))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -90,6 +152,40 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Общий кеш процессов: MEMCACHED_LOCATION=host1:11211,host2:11211.
+MEMCACHED_LOCATION = list(
+    filter(None, os.getenv('MEMCACHED_LOCATION', '').split(','))
+)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Представления рецептов (api.cache). LocMemCache вытесняет
+    # давно не читавшиеся записи, размер ограничен MAX_ENTRIES.
+    'recipes': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'recipes',
+        'TIMEOUT': 24 * 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('RECIPE_CACHE_MAX_ENTRIES', 5000)),
+            'CULL_FREQUENCY': 10,
+        },
+    },
+    # Токены авторизации с пользователями (api.authentication).
+    # Кеш должен быть общим для всех процессов: выход, смена пароля
+    # и деактивация удаляют токен из кеша, и в кеше отдельного процесса
+    # отозванный токен принимался бы остальными процессами.
+    # Без MEMCACHED_LOCATION токены не кешируются.
+    'tokens': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': MEMCACHED_LOCATION,
+        'KEY_PREFIX': 'tokens',
+        'TIMEOUT': int(os.getenv('TOKEN_CACHE_TIMEOUT', 5 * 60)),
+    } if MEMCACHED_LOCATION else {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+}
 
 LANGUAGE_CODE = 'ru'
 
@@ -114,7 +210,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated'
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 6,
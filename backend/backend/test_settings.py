@@ -0,0 +1,19 @@
+"""
+Настройки для тестов: SQLite вместо PostgreSQL, без реплик
+и внешних сервисов. Поиск в SQLite работает через FTS5 (recipes.search).
+"""
+import os
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    }
+}
+DATABASE_REPLICAS = []
+
+MEDIA_ROOT = os.path.join(tempfile.gettempdir(), 'foodgram-test-media')
@@ -5,3 +5,15 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# Индекс ингредиентов строится при старте воркера, чтобы первый
+# запрос автодополнения не ждал загрузки. Если БД ещё недоступна
+# (например, до миграций), индекс соберётся при первом запросе.
+from django.db import DatabaseError  # noqa: E402
+
+from api.catalogue import ingredients_index  # noqa: E402
+
+try:
+    ingredients_index.build()
+except DatabaseError:
+    pass
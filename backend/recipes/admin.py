@@ -7,12 +7,49 @@ from .models import (
 
 from import_export import resources
 from import_export.admin import ImportExportModelAdmin
+from import_export.results import RowResult
+
+from .loaders import INSERTED, UPDATED, load_ingredients
 
 
 class IngredientResource(resources.ModelResource):
+    """
+    Импорт ингредиентов через load_ingredients:
+    пачками bulk_create/bulk_update вместо запроса на каждую строку.
+    """
+
+    import_types = {
+        INSERTED: RowResult.IMPORT_TYPE_NEW,
+        UPDATED: RowResult.IMPORT_TYPE_UPDATE,
+    }
 
     class Meta:
         model = Ingredient
+        fields = ('id', 'name', 'measurement_unit')
+
+    def import_data_inner(self, dataset, dry_run, raise_errors,
+                          using_transactions, collect_failed_rows, **kwargs):
+        result = self.get_result_class()()
+        result.diff_headers = self.get_diff_headers()
+        result.total_rows = len(dataset)
+
+        loaded = load_ingredients(dataset.dict, dry_run=dry_run)
+        for status, ingredients in loaded.items():
+            for ingredient in ingredients:
+                row_result = self.get_row_result_class()()
+                row_result.import_type = self.import_types.get(
+                    status, RowResult.IMPORT_TYPE_SKIP
+                )
+                row_result.diff = [
+                    ingredient.id or '', ingredient.name,
+                    ingredient.measurement_unit,
+                ]
+                row_result.add_instance_info(ingredient)
+                result.increment_row_result_total(row_result)
+                if (row_result.import_type != RowResult.IMPORT_TYPE_SKIP
+                        or self._meta.report_skipped):
+                    result.append_row_result(row_result)
+        return result
 
 
 class IngredientAdmin(ImportExportModelAdmin):
@@ -25,6 +62,9 @@ class IngredientInRecipeInline(admin.TabularInline):
 
 
 class RecipeAdmin(admin.ModelAdmin):
+    list_display = ('name', 'author', 'favorites_count', 'cart_count')
+    list_select_related = ('author',)
+    readonly_fields = ('favorites_count', 'cart_count')
     inlines = (IngredientInRecipeInline,)
     filter_horizontal = ['tags']
 
@@ -0,0 +1,73 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import FoodgramUser
+from .models import FavoriteRecipe, Follow, Recipe, ShopingCart
+
+# Модель-источник: (внешний ключ, модель со счётчиком, поле счётчика).
+COUNTERS = {
+    Recipe: ('author', FoodgramUser, 'recipes_count'),
+    Follow: ('author', FoodgramUser, 'followers_count'),
+    FavoriteRecipe: ('recipe', Recipe, 'favorites_count'),
+    ShopingCart: ('recipe', Recipe, 'cart_count'),
+}
+
+
+def change_counter(model, pk, field, delta):
+    """
+    Изменяет счётчик одним UPDATE с F-выражением,
+    без чтения значения в Python. Счётчик не уходит ниже нуля.
+    """
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def actual_count(source):
+    """Подзапрос: число строк source, ссылающихся на строку счётчика."""
+    fk = COUNTERS[source][0]
+    return Coalesce(Subquery(
+        source.objects.filter(**{fk: OuterRef('pk')})
+        .order_by().values(fk)
+        .annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def recount_for(source, pks):
+    """
+    Пересчитывает счётчик source для строк pks одним UPDATE.
+    Нужен после bulk_create и массового удаления: они не вызывают
+    сигналы, которые изменяют счётчики.
+    """
+    _, model, field = COUNTERS[source]
+    if pks:
+        model.objects.filter(pk__in=pks).update(
+            **{field: actual_count(source)}
+        )
+
+
+def recount(chunk_size=1000):
+    """
+    Пересчитывает все счётчики по исходным таблицам.
+    Строки обрабатываются пачками по chunk_size id, каждая пачка -
+    в отдельной транзакции. Обновляются только расходящиеся значения.
+    Возвращает генератор (модель, поле, число исправленных строк).
+    """
+    for source, (fk, model, field) in COUNTERS.items():
+        actual = actual_count(source)
+        fixed, last_pk = 0, 0
+        while True:
+            chunk = list(
+                model.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not chunk:
+                break
+            with transaction.atomic():
+                fixed += model.objects.filter(pk__in=chunk).exclude(
+                    **{field: actual}
+                ).update(**{field: actual})
+            last_pk = chunk[-1]
+        yield model, field, fixed
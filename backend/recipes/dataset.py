@@ -0,0 +1,223 @@
+import random
+from bisect import bisect_left
+from io import BytesIO
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from PIL import Image
+
+from users.models import FoodgramUser
+from .counters import recount
+from .feed import rebuild as rebuild_feeds
+from .models import (
+    FavoriteRecipe, Follow, Ingredient, IngredientInRecipe, Recipe,
+    ShopingCart, Tag
+)
+from .search import rebuild_search_index
+from .shopping_list import recompute
+from .tag_masks import bits_to_mask
+
+DATASET_PASSWORD = 'Dataset-pass-1'
+PLACEHOLDER_IMAGE = 'recipes/dataset-placeholder.jpg'
+DEFAULT_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+# Единица измерения: (минимум, максимум, шаг) количества.
+AMOUNTS = {'г': (50, 500, 10), 'мл': (50, 1000, 50), 'шт.': (1, 6, 1)}
+DEFAULT_AMOUNT = (1, 10, 1)
+
+
+class WeightedChoice:
+    """
+    Выбор с распределением Ципфа: немногие элементы (популярные
+    авторы, рецепты, ингредиенты) встречаются намного чаще остальных.
+    """
+
+    def __init__(self, rng, items, exponent=1.1):
+        self.rng = rng
+        self.items = items
+        self.cum_weights = list(accumulate(
+            1 / rank ** exponent for rank in range(1, len(items) + 1)
+        ))
+
+    def _index(self):
+        point = self.rng.random() * self.cum_weights[-1]
+        return bisect_left(self.cum_weights, point)
+
+    def choice(self):
+        return self.items[self._index()]
+
+    def sample(self, count):
+        """До count различных элементов."""
+        count = min(count, len(self.items))
+        chosen = set()
+        for _ in range(count * 4):
+            chosen.add(self._index())
+            if len(chosen) == count:
+                break
+        return [self.items[index] for index in sorted(chosen)]
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+
+def reset_sequences(*models):
+    """Синхронизирует последовательности id после вставки с явными id."""
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+
+
+def placeholder_image():
+    """Одно общее изображение для всех сгенерированных рецептов."""
+    if not default_storage.exists(PLACEHOLDER_IMAGE):
+        buffer = BytesIO()
+        Image.new('RGB', (1200, 800), (226, 108, 45)).save(buffer, 'JPEG')
+        default_storage.save(PLACEHOLDER_IMAGE, ContentFile(buffer.getvalue()))
+    return PLACEHOLDER_IMAGE
+
+
+def generate_users(rng, count, batch_size):
+    password = make_password(DATASET_PASSWORD)
+    first_id = next_id(FoodgramUser)
+    users = [
+        FoodgramUser(
+            id=pk, username=f'dataset{pk}', email=f'dataset{pk}@foodgram.ru',
+            first_name=rng.choice(('Анна', 'Иван', 'Ольга', 'Пётр', 'Мария')),
+            last_name=f'Тестов{pk}', password=password,
+        )
+        for pk in range(first_id, first_id + count)
+    ]
+    FoodgramUser.objects.bulk_create(users, batch_size=batch_size)
+    reset_sequences(FoodgramUser)
+    return list(range(first_id, first_id + count))
+
+
+def generate_recipes(rng, recipe_ids, author_ids, batch_size):
+    """
+    Рецепты с 3-10 ингредиентами и 1-3 тегами. Авторы, теги
+    и ингредиенты выбираются с распределением Ципфа.
+    Рецепты, их теги и ингредиенты пишутся пачками по batch_size,
+    после каждой пачки возвращается число созданных рецептов.
+    """
+    authors = WeightedChoice(rng, rng.sample(author_ids, len(author_ids)))
+    tags = WeightedChoice(rng, list(Tag.objects.all()))
+    ingredients = list(Ingredient.objects.order_by('id'))
+    rng.shuffle(ingredients)
+    ingredients = WeightedChoice(rng, ingredients)
+    image = placeholder_image()
+
+    for start in range(0, len(recipe_ids), batch_size):
+        recipes, recipe_tags, recipe_ingredients = [], [], []
+        for pk in recipe_ids[start:start + batch_size]:
+            chosen_tags = tags.sample(rng.randint(1, 3))
+            chosen = ingredients.sample(rng.randint(3, 10))
+            names = [ingredient.name for ingredient in chosen]
+            cooking_time = max(1, min(600, int(rng.lognormvariate(3.3, 0.6))))
+            recipes.append(Recipe(
+                id=pk, author_id=authors.choice(), image=image,
+                name=f'{names[0].capitalize()}, {names[1]} и {names[2]}'[:200],
+                text=(
+                    f'Понадобится: {", ".join(names)}. '
+                    f'Готовить {cooking_time} мин.'
+                ),
+                cooking_time=cooking_time,
+                tags_mask=bits_to_mask(
+                    tag.bit for tag in chosen_tags if tag.bit is not None
+                ),
+            ))
+            recipe_tags.extend(
+                Recipe.tags.through(recipe_id=pk, tag_id=tag.id)
+                for tag in chosen_tags
+            )
+            for ingredient in chosen:
+                low, high, step = AMOUNTS.get(
+                    ingredient.measurement_unit, DEFAULT_AMOUNT
+                )
+                recipe_ingredients.append(IngredientInRecipe(
+                    recipe_id=pk, ingredient_id=ingredient.id,
+                    amount=rng.randrange(low, high + 1, step),
+                ))
+        with transaction.atomic():
+            Recipe.objects.bulk_create(recipes)
+            Recipe.tags.through.objects.bulk_create(recipe_tags)
+            IngredientInRecipe.objects.bulk_create(recipe_ingredients)
+        yield start + len(recipes)
+    reset_sequences(Recipe)
+
+
+def generate_relations(rng, model, field, user_ids, targets, per_user,
+                       batch_size):
+    """
+    Подписки, избранное или корзины: каждому пользователю
+    до per_user популярных объектов (в среднем per_user / 2).
+    """
+    targets = WeightedChoice(rng, rng.sample(targets, len(targets)))
+    rows = []
+    for user_id in user_ids:
+        for target in targets.sample(rng.randint(0, per_user)):
+            if field == 'author_id' and target == user_id:
+                continue
+            rows.append(model(user_id=user_id, **{field: target}))
+        if len(rows) >= batch_size:
+            model.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    model.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def generate_dataset(users, recipes, follows=20, favorites=30, carts=10,
+                     seed=0, batch_size=1000):
+    """
+    Генерирует пользователей, рецепты, подписки, избранное и корзины.
+    При одинаковом seed и исходной базе результат одинаков.
+    bulk_create не вызывает сигналы, поэтому в конце пересчитываются
+    счётчики, поисковый индекс, списки покупок и ленты подписок.
+    Возвращает генератор строк прогресса.
+    """
+    rng = random.Random(seed)
+    if not Tag.objects.exists():
+        for name, color, slug in DEFAULT_TAGS:
+            Tag.objects.create(name=name, color=color, slug=slug)
+    if not Ingredient.objects.exists():
+        raise ValueError(
+            'Справочник ингредиентов пуст: выполните load_ingredients.'
+        )
+
+    user_ids = generate_users(rng, users, batch_size)
+    yield f'Пользователей: {len(user_ids)}'
+
+    # Авторы - примерно треть пользователей.
+    author_ids = user_ids[:max(1, len(user_ids) // 3)]
+    first_id = next_id(Recipe)
+    recipe_ids = list(
+        range(first_id, first_id + recipes) if author_ids else ()
+    )
+    for created in generate_recipes(rng, recipe_ids, author_ids, batch_size):
+        yield f'Рецептов: {created}'
+
+    for model, field, targets, per_user in (
+        (Follow, 'author_id', author_ids, follows),
+        (FavoriteRecipe, 'recipe_id', recipe_ids, favorites),
+        (ShopingCart, 'recipe_id', recipe_ids, carts),
+    ):
+        if targets and per_user:
+            generate_relations(
+                rng, model, field, user_ids, targets, per_user, batch_size
+            )
+            yield f'{model._meta.verbose_name_plural}: готово'
+
+    for model, field, fixed in recount(batch_size):
+        yield f'{model._meta.label}.{field}: пересчитано {fixed}'
+    rebuild_search_index()
+    yield 'Поисковый индекс перестроен'
+    users = sum(checked for checked, _ in recompute(chunk_size=batch_size))
+    yield f'Списки покупок построены: {users}'
+    yield f'Записей в лентах подписок: {rebuild_feeds()}'
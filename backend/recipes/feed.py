@@ -0,0 +1,80 @@
+"""
+Лента подписок с записью при публикации (fan-out on write).
+
+Рецепт раскладывается по лентам подписчиков автора одним
+INSERT ... SELECT при публикации, при подписке в ленту добавляются
+рецепты автора, при отписке - удаляются. Рецепты и пользователи
+удаляются из лент каскадно. Чтение ленты - диапазон индекса
+(user, recipe) по убыванию id рецепта, без JOIN подписок и рецептов.
+"""
+from django.db import transaction
+from django.db.models import Value
+
+from .models import FeedEntry, Follow, Recipe
+from .sql import insert_select
+
+CONFLICT = '(user_id, recipe_id) DO NOTHING'
+
+
+def fan_out(recipe, using='default'):
+    """Добавляет рецепт в ленты подписчиков автора."""
+    return insert_select(
+        FeedEntry, ('user_id', 'recipe_id', 'author_id'),
+        Follow.objects.using(using).filter(
+            author_id=recipe.author_id
+        ).order_by().values(
+            'user_id',
+            feed_recipe=Value(recipe.id), feed_author=Value(recipe.author_id),
+        ),
+        CONFLICT, using
+    )
+
+
+def backfill(user_id, author_id, using='default'):
+    """Добавляет в ленту пользователя рецепты автора при подписке."""
+    return insert_select(
+        FeedEntry, ('recipe_id', 'author_id', 'user_id'),
+        Recipe.objects.using(using).filter(
+            author_id=author_id
+        ).order_by().values('id', 'author_id', feed_user=Value(user_id)),
+        CONFLICT, using
+    )
+
+
+def prune(user_id, author_id, using='default'):
+    """Удаляет из ленты пользователя рецепты автора при отписке."""
+    return FeedEntry.objects.using(using).filter(
+        user_id=user_id, author_id=author_id
+    ).delete()[0]
+
+
+def rebuild(using='default'):
+    """
+    Строит ленты заново по подпискам одним INSERT ... SELECT:
+    после массовой загрузки, которая не вызывает сигналы.
+    Возвращает число записей.
+    """
+    with transaction.atomic(using=using):
+        FeedEntry.objects.using(using).all().delete()
+        return insert_select(
+            FeedEntry, ('recipe_id', 'author_id', 'user_id'),
+            Recipe.objects.using(using).filter(
+                author__following__isnull=False
+            ).order_by().values('id', 'author_id', 'author__following__user'),
+            CONFLICT, using
+        )
+
+
+def feed(user):
+    """Записи ленты пользователя, новые рецепты первыми."""
+    return FeedEntry.objects.filter(user=user).order_by('-recipe_id')
+
+
+def feed_on_read(user):
+    """
+    Та же лента без материализации (fan-out on read): рецепты авторов
+    из подписок. Для сравнения в bench_feed.
+    """
+    return Recipe.objects.filter(
+        author_id__in=Follow.objects.filter(user=user).values('author_id')
+    ).order_by('-id')
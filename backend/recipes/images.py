@@ -0,0 +1,121 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import md5
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image
+
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIR = 'recipes_variants'
+VARIANT_WIDTHS = (300, 600, 1200)
+# Формат в API: (формат Pillow, расширение файла).
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'webp'),
+    'jpeg': ('JPEG', 'jpg'),
+}
+VARIANT_QUALITY = 80
+
+executor = ThreadPoolExecutor(
+    max_workers=2, thread_name_prefix='image-variants'
+)
+
+
+def variant_name(source, width, variant_format):
+    """
+    Путь копии изображения в MEDIA_ROOT. Короткий хеш полного пути
+    исходного файла различает копии файлов с одинаковым именем
+    и разными расширениями или каталогами (a.png и a.jpg).
+    """
+    stem = os.path.splitext(os.path.basename(source))[0]
+    digest = md5(source.encode()).hexdigest()[:8]
+    extension = VARIANT_FORMATS[variant_format][1]
+    return f'{VARIANTS_DIR}/{stem}_{digest}_{width}.{extension}'
+
+
+def schedule_variants(recipe):
+    """
+    Ставит генерацию копий изображения в пул потоков
+    после фиксации транзакции, чтобы не задерживать запрос.
+    """
+    if not recipe.image:
+        return
+    if recipe.image_variants.get('source') == recipe.image.name:
+        return
+    recipe_id, source = recipe.id, recipe.image.name
+    transaction.on_commit(
+        lambda: executor.submit(build_variants_in_thread, recipe_id, source)
+    )
+
+
+def build_variants_in_thread(recipe_id, source):
+    """
+    build_variants в потоке пула: соединение с БД потока закрывается,
+    иначе оно остаётся открытым до завершения процесса.
+    """
+    try:
+        build_variants(recipe_id, source)
+    finally:
+        connection.close()
+
+
+def variant_names(variants):
+    """Файлы копий по значению Recipe.image_variants."""
+    source = variants.get('source')
+    if not source:
+        return set()
+    return {
+        variant_name(source, width, variant_format)
+        for width in variants.get('widths', ())
+        for variant_format in VARIANT_FORMATS
+    }
+
+
+def build_variants(recipe_id, source):
+    """
+    Создаёт копии изображения шириной VARIANT_WIDTHS
+    (не больше оригинала) во всех форматах VARIANT_FORMATS
+    и сохраняет список ширин в Recipe.image_variants.
+    Копии прежнего изображения рецепта удаляются.
+    """
+    try:
+        previous = Recipe.objects.filter(id=recipe_id).values_list(
+            'image_variants', flat=True
+        ).first() or {}
+
+        with default_storage.open(source) as file:
+            original = Image.open(file)
+            original.load()
+        original = original.convert('RGB')
+
+        widths = [
+            width for width in VARIANT_WIDTHS if width < original.width
+        ] or [original.width]
+        for width in widths:
+            height = round(original.height * width / original.width)
+            resized = original.resize((width, height), Image.LANCZOS)
+            for variant_format, (pil_format, _) in VARIANT_FORMATS.items():
+                buffer = BytesIO()
+                resized.save(buffer, pil_format, quality=VARIANT_QUALITY)
+                name = variant_name(source, width, variant_format)
+                if default_storage.exists(name):
+                    default_storage.delete(name)
+                default_storage.save(name, ContentFile(buffer.getvalue()))
+
+        # Дата изменения обновляется, чтобы сменился ETag рецепта.
+        variants = {'source': source, 'widths': widths}
+        updated = Recipe.objects.filter(id=recipe_id, image=source).update(
+            image_variants=variants, updated_at=timezone.now(),
+        )
+        if updated and previous.get('source') != source:
+            for name in variant_names(previous) - variant_names(variants):
+                default_storage.delete(name)
+    except Exception:
+        logger.exception('Не удалось создать копии изображения %s', source)
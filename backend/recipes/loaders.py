@@ -0,0 +1,107 @@
+import csv
+import json
+import os
+
+from django.db import transaction
+
+from .models import Ingredient
+from .signals import ingredients_loaded
+
+INSERTED, UPDATED, SKIPPED = 'inserted', 'updated', 'skipped'
+
+
+def read_ingredients(path):
+    """
+    Читает ингредиенты из CSV или JSON файла.
+    CSV может быть без заголовка (как data/ingredients.csv):
+    тогда колонки - название и единица измерения.
+    CSV читается построчно, JSON - целиком (список объектов).
+    """
+    if os.path.splitext(path)[1].lower() == '.json':
+        with open(path, encoding='utf-8') as file:
+            yield from json.load(file)
+        return
+
+    with open(path, encoding='utf-8', newline='') as file:
+        reader = csv.reader(file)
+        first_row = next(reader, None)
+        if first_row is None:
+            return
+        if 'name' in first_row:
+            header = first_row
+        else:
+            header = ('name', 'measurement_unit')
+            yield dict(zip(header, first_row))
+        for row in reader:
+            yield dict(zip(header, row))
+
+
+def load_ingredients(rows, batch_size=1000, dry_run=False):
+    """
+    Загружает ингредиенты пачками bulk_create/bulk_update.
+    Ключ ингредиента - пара (name, measurement_unit).
+    Строка с id существующего ингредиента обновляет его,
+    строка с уже известным ключом пропускается, остальные добавляются.
+    Повторная загрузка того же файла ничего не меняет.
+    Возвращает словарь {статус: [ингредиенты]}.
+    """
+    existing = {
+        (name, unit): pk for pk, name, unit in
+        Ingredient.objects.values_list('id', 'name', 'measurement_unit')
+    }
+    by_id = {pk: key for key, pk in existing.items()}
+    result = {INSERTED: [], UPDATED: [], SKIPPED: []}
+    to_create, to_update = [], []
+
+    def flush(force=False):
+        # Обновления пишутся первыми: они могут освобождать ключи,
+        # которые занимают новые строки.
+        if dry_run or not (
+            force
+            or len(to_create) >= batch_size
+            or len(to_update) >= batch_size
+        ):
+            return
+        if to_update:
+            Ingredient.objects.bulk_update(
+                to_update, ('name', 'measurement_unit'),
+                batch_size=batch_size
+            )
+            to_update.clear()
+        if to_create:
+            Ingredient.objects.bulk_create(
+                to_create, batch_size=batch_size, ignore_conflicts=True
+            )
+            to_create.clear()
+
+    with transaction.atomic():
+        for row in rows:
+            name = str(row.get('name') or '').strip()
+            unit = str(row.get('measurement_unit') or '').strip()
+            pk = row.get('id')
+            pk = int(pk) if str(pk or '').isdigit() else None
+            ingredient = Ingredient(id=pk, name=name, measurement_unit=unit)
+            key = (name, unit)
+
+            if not name or not unit or key in existing:
+                status = SKIPPED
+            elif pk in by_id:
+                status = UPDATED
+                del existing[by_id[pk]]
+                existing[key], by_id[pk] = pk, key
+                to_update.append(ingredient)
+            else:
+                status = INSERTED
+                ingredient.id = None
+                existing[key] = None
+                to_create.append(ingredient)
+
+            result[status].append(ingredient)
+            flush()
+        flush(force=True)
+
+        if not dry_run and (result[INSERTED] or result[UPDATED]):
+            transaction.on_commit(
+                lambda: ingredients_loaded.send(sender=Ingredient)
+            )
+    return result
@@ -0,0 +1,205 @@
+import json
+from datetime import datetime, timezone
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from recipes.feed import backfill, fan_out, feed, feed_on_read, rebuild
+from recipes.models import FeedEntry, Follow, Recipe
+
+PERCENTILES = (0.5, 0.9, 0.99, 1.0)
+
+
+def percentile(values, share):
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def timed(func, repeat):
+    """Медиана времени выполнения func, мс."""
+    timings = []
+    for _ in range(repeat):
+        started = perf_counter()
+        func()
+        timings.append(perf_counter() - started)
+    return round(median(timings) * 1000, 3)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает ленту подписок с записью при публикации '
+        '(fan-out on write, таблица FeedEntry) и сборку ленты при чтении '
+        '(fan-out on read, подписки JOIN рецепты) на текущих данных: '
+        'чтение первой и глубокой страницы для пользователей с разным '
+        'числом подписок и стоимость записи для авторов с разным '
+        'числом подписчиков.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument(
+            '--pages', type=int, default=10,
+            help='Номер глубокой страницы ленты.'
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Построить ленты заново перед замерами.'
+        )
+        parser.add_argument('--output', help='Файл результата (JSON).')
+
+    def distribution(self, field):
+        """Пары (id, число) по подпискам, по возрастанию числа."""
+        return list(
+            Follow.objects.order_by().values(field)
+            .annotate(total=Count('id')).order_by('total', field)
+            .values_list(field, 'total')
+        )
+
+    def page(self, queryset, field, cursor, limit):
+        if cursor is not None:
+            queryset = queryset.filter(**{f'{field}__lt': cursor})
+        return list(queryset.values_list(field, flat=True)[:limit])
+
+    def bench_reader(self, user_id, limit, pages, repeat):
+        """Первая и глубокая страница ленты в обоих вариантах."""
+        ids = self.page(feed(user_id), 'recipe_id', None, limit * pages)
+        cursor = None
+        if len(ids) > limit:
+            cursor = ids[min(len(ids), limit * (pages - 1)) - 1]
+        result = {}
+        for name, start in (('first', None), ('deep', cursor)):
+            on_read = self.page(feed_on_read(user_id), 'id', start, limit)
+            on_write = self.page(feed(user_id), 'recipe_id', start, limit)
+            if on_read != on_write:
+                raise CommandError(
+                    f'Лента пользователя {user_id} расходится с подписками: '
+                    'выполните bench_feed --rebuild.'
+                )
+            result[name] = {
+                'on_read_ms': timed(lambda: self.page(
+                    feed_on_read(user_id), 'id', start, limit
+                ), repeat),
+                'on_write_ms': timed(lambda: self.page(
+                    feed(user_id), 'recipe_id', start, limit
+                ), repeat),
+            }
+        return result
+
+    def bench_writer(self, author_id, repeat):
+        """Публикация рецепта автора: запись в ленты подписчиков."""
+        recipe = Recipe.objects.filter(author_id=author_id).only(
+            'author_id'
+        ).order_by('-id').first()
+        if recipe is None:
+            return None
+        timings, rows = [], 0
+        for _ in range(repeat):
+            with transaction.atomic():
+                FeedEntry.objects.filter(recipe=recipe).delete()
+                started = perf_counter()
+                rows = fan_out(recipe)
+                timings.append(perf_counter() - started)
+                transaction.set_rollback(True)
+        return {'rows': rows, 'ms': round(median(timings) * 1000, 3)}
+
+    def bench_backfill(self, user_id, author_id, repeat):
+        """Подписка: копирование рецептов автора в ленту."""
+        timings, rows = [], 0
+        for _ in range(repeat):
+            with transaction.atomic():
+                FeedEntry.objects.filter(
+                    user_id=user_id, author_id=author_id
+                ).delete()
+                started = perf_counter()
+                rows = backfill(user_id, author_id)
+                timings.append(perf_counter() - started)
+                transaction.set_rollback(True)
+        return {'rows': rows, 'ms': round(median(timings) * 1000, 3)}
+
+    def handle(self, *args, **options):
+        follows = self.distribution('user_id')
+        followers = self.distribution('author_id')
+        if not follows:
+            raise CommandError('Нет подписок: выполните generate_dataset.')
+        result = {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'limit': options['limit'],
+            'pages': options['pages'],
+        }
+        if options['rebuild'] or not FeedEntry.objects.exists():
+            started = perf_counter()
+            rows = rebuild()
+            result['rebuild'] = {
+                'rows': rows, 's': round(perf_counter() - started, 2)
+            }
+            self.stdout.write(
+                f'Ленты построены: {rows} записей '
+                f'за {result["rebuild"]["s"]} с'
+            )
+
+        entries = FeedEntry.objects.count()
+        recipes = Recipe.objects.count()
+        result['storage'] = {
+            'follows': sum(total for _, total in follows),
+            'feed_entries': entries,
+            'entries_per_recipe': round(entries / max(recipes, 1), 2),
+        }
+        self.stdout.write(
+            f'Записей ленты: {entries}, '
+            f'на рецепт {result["storage"]["entries_per_recipe"]}'
+        )
+
+        result['readers'] = {}
+        for share in PERCENTILES:
+            user_id, total = percentile(follows, share)
+            reader = self.bench_reader(
+                user_id, options['limit'], options['pages'],
+                options['repeat']
+            )
+            reader['follows'] = total
+            result['readers'][f'p{share * 100:g}'] = reader
+            self.stdout.write(
+                f'Чтение p{share * 100:<4g} подписок {total:5}: '
+                + ' | '.join(
+                    f'{name} read {reader[name]["on_read_ms"]:8.3f} мс, '
+                    f'write {reader[name]["on_write_ms"]:8.3f} мс'
+                    for name in ('first', 'deep')
+                )
+            )
+
+        result['writers'] = {}
+        for share in PERCENTILES:
+            author_id, total = percentile(followers, share)
+            writer = self.bench_writer(author_id, options['repeat'])
+            if writer is None:
+                continue
+            writer['followers'] = total
+            result['writers'][f'p{share * 100:g}'] = writer
+            self.stdout.write(
+                f'Публикация p{share * 100:<4g} подписчиков {total:5}: '
+                f'{writer["rows"]} записей за {writer["ms"]:8.3f} мс'
+            )
+
+        author_id = Recipe.objects.values('author_id').annotate(
+            total=Count('id')
+        ).order_by('-total').values_list('author_id', flat=True).first()
+        user_id = percentile(follows, 0.5)[0]
+        result['backfill'] = self.bench_backfill(
+            user_id, author_id, options['repeat']
+        )
+        self.stdout.write(
+            f'Подписка на самого активного автора: '
+            f'{result["backfill"]["rows"]} записей '
+            f'за {result["backfill"]["ms"]:8.3f} мс'
+        )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(result, file, ensure_ascii=False, indent=2)
+            self.stdout.write(
+                self.style.SUCCESS(f'Результат: {options["output"]}')
+            )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import build_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уменьшенные копии изображений рецептов, где их нет.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересоздать копии всех изображений, например, '
+                 'после смены схемы имён файлов.'
+        )
+
+    def handle(self, *args, **options):
+        built = 0
+        recipes = Recipe.objects.exclude(image='').values_list(
+            'id', 'image', 'image_variants'
+        ).order_by('id')
+        for recipe_id, image, variants in recipes.iterator():
+            if options['all'] or variants.get('source') != image:
+                build_variants(recipe_id, image)
+                built += 1
+        self.stdout.write(f'Обработано рецептов: {built}')
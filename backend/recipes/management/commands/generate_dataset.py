@@ -0,0 +1,51 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.dataset import DATASET_PASSWORD, generate_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует синтетические данные для нагрузочных тестов: '
+        'пользователей, рецепты, подписки, избранное и корзины. '
+        'Результат воспроизводим при одинаковом --seed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Максимум подписок на пользователя.'
+        )
+        parser.add_argument(
+            '--favorites', type=int, default=30,
+            help='Максимум избранных рецептов на пользователя.'
+        )
+        parser.add_argument(
+            '--carts', type=int, default=10,
+            help='Максимум рецептов в корзине пользователя.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        try:
+            for line in generate_dataset(
+                users=options['users'],
+                recipes=options['recipes'],
+                follows=options['follows'],
+                favorites=options['favorites'],
+                carts=options['carts'],
+                seed=options['seed'],
+                batch_size=options['batch_size'],
+            ):
+                self.stdout.write(line)
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {perf_counter() - started:.1f} с. '
+            f'Пароль пользователей: {DATASET_PASSWORD}'
+        ))
@@ -0,0 +1,46 @@
+import os
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.loaders import (
+    INSERTED, SKIPPED, UPDATED, load_ingredients, read_ingredients
+)
+
+DEFAULT_PATH = os.path.join(
+    os.path.dirname(settings.BASE_DIR), 'data', 'ingredients.csv'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает справочник ингредиентов из CSV или JSON. '
+        'Повторный запуск не создаёт дубликатов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=DEFAULT_PATH)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Посчитать изменения, ничего не записывая.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isfile(path):
+            raise CommandError(f'Файл не найден: {path}')
+
+        started = perf_counter()
+        result = load_ingredients(
+            read_ingredients(path),
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Добавлено: {len(result[INSERTED])}, '
+            f'обновлено: {len(result[UPDATED])}, '
+            f'пропущено: {len(result[SKIPPED])} '
+            f'({perf_counter() - started:.2f} с)'
+        ))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.shopping_list import recompute
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет списки покупок пользователей с корзинами и строит '
+        'заново расходящиеся. С --check только сообщает о расхождениях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Не исправлять, завершиться с ошибкой при расхождениях.'
+        )
+
+    def handle(self, *args, **options):
+        checked, mismatched = 0, []
+        for count, users in recompute(
+            fix=not options['check'], chunk_size=options['chunk_size']
+        ):
+            checked += count
+            mismatched += users
+        self.stdout.write(
+            f'Проверено пользователей: {checked}, '
+            f'расхождений: {len(mismatched)}'
+        )
+        if mismatched and options['check']:
+            raise CommandError(
+                'Списки покупок расходятся с корзинами: '
+                + ', '.join(map(str, mismatched[:20]))
+            )
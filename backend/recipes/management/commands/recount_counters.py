@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from recipes.counters import recount
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает денормализованные счётчики: рецепты и подписчики '
+        'пользователей, избранное и корзины рецептов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for model, field, fixed in recount(options['chunk_size']):
+            self.stdout.write(
+                f'{model._meta.label}.{field}: исправлено {fixed}'
+            )
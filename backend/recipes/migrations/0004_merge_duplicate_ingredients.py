@@ -0,0 +1,56 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """
+    Объединяет ингредиенты с одинаковыми названием и единицей измерения,
+    оставляя запись с наименьшим id. Ссылки из рецептов переносятся
+    на оставшуюся запись.
+    """
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientInRecipe = apps.get_model('recipes', 'IngredientInRecipe')
+
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(
+        keep_id=Min('id'), total=Count('id')
+    ).filter(total__gt=1).order_by()
+
+    for duplicate in duplicates:
+        keep_id = duplicate['keep_id']
+        extra_ids = Ingredient.objects.filter(
+            name=duplicate['name'],
+            measurement_unit=duplicate['measurement_unit'],
+        ).exclude(id=keep_id).values_list('id', flat=True)
+
+        for extra_id in list(extra_ids):
+            IngredientInRecipe.objects.filter(
+                ingredient_id=extra_id,
+                recipe_id__in=IngredientInRecipe.objects.filter(
+                    ingredient_id=keep_id
+                ).values('recipe_id'),
+            ).delete()
+            IngredientInRecipe.objects.filter(
+                ingredient_id=extra_id
+            ).update(ingredient_id=keep_id)
+            Ingredient.objects.filter(id=extra_id).delete()
+
+
+class Migration(migrations.Migration):
+    """
+    Ограничение уникальности добавляется следующей миграцией:
+    в PostgreSQL ALTER TABLE нельзя выполнить в одной транзакции
+    с изменением строк, на которые ссылаются внешние ключи
+    (отложенные проверки ещё не выполнены).
+    """
+
+    dependencies = [
+        ('recipes', '0003_auto_20240322_0150'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 3.2 on 2026-10-18 01:29
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    """Заполняет счётчики по уже существующим данным."""
+    User = apps.get_model('users', 'FoodgramUser')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    counters = (
+        (Recipe, 'author', User, 'recipes_count'),
+        (apps.get_model('recipes', 'Follow'), 'author', User,
+         'followers_count'),
+        (apps.get_model('recipes', 'FavoriteRecipe'), 'recipe', Recipe,
+         'favorites_count'),
+        (apps.get_model('recipes', 'ShopingCart'), 'recipe', Recipe,
+         'cart_count'),
+    )
+    for source, fk, model, field in counters:
+        model.objects.update(**{field: Coalesce(Subquery(
+            source.objects.filter(**{fk: OuterRef('pk')})
+            .order_by().values(fk)
+            .annotate(total=Count('pk')).values('total')
+        ), 0)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_updated_at'),
+        ('users', '0002_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='cart_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Добавлений в корзину'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Добавлений в избранное'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
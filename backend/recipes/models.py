@@ -1,8 +1,9 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.core.exceptions import ValidationError
 
 
-from users.models import FoodgramUser
+from users.models import DenormalizedFieldsModel, FoodgramUser
 
 
 def leight_field(field):
@@ -26,6 +27,12 @@ class Tag(models.Model):
         max_length=200,
         unique=True,
     )
+    bit = models.PositiveSmallIntegerField(
+        'Бит в маске тегов',
+        null=True,
+        unique=True,
+        editable=False,
+    )
 
     class Meta:
         ordering = ('name',)
@@ -48,12 +55,18 @@ class Ingredient(models.Model):
         ordering = ('name',)
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='ingredient_name_unit_unique',
+            )
+        ]
 
     def __str__(self):
         return leight_field(self.name)
 
 
-class Recipe(models.Model):
+class Recipe(DenormalizedFieldsModel):
     """Модель для хранения рецептов."""
 
     author = models.ForeignKey(
@@ -74,9 +87,30 @@ class Recipe(models.Model):
         'Изображение',
         upload_to='recipes/'
     )
+    image_variants = models.JSONField(
+        'Уменьшенные копии изображения',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     name = models.CharField('Название рецепта', max_length=200)
     text = models.TextField('Описание рецепта')
     cooking_time = models.PositiveSmallIntegerField('Время приготовления')
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+    favorites_count = models.PositiveIntegerField(
+        'Добавлений в избранное', default=0)
+    cart_count = models.PositiveIntegerField(
+        'Добавлений в корзину', default=0)
+    tags_mask = models.BigIntegerField(
+        'Маска тегов', default=0, editable=False)
+    search_vector = SearchVectorField(
+        'Поисковый вектор', null=True, editable=False)
+
+    # Поля пересчитываются сигналами и фоновыми задачами.
+    denormalized_fields = (
+        'favorites_count', 'cart_count', 'tags_mask', 'image_variants',
+        'search_vector',
+    )
 
     class Meta:
         ordering = ('name',)
@@ -213,3 +247,101 @@ class ShopingCart(ShopingCartAndFavoriteRecipe):
         verbose_name = 'Корзина'
         verbose_name_plural = 'Корзины'
         unique_together = ('user', 'recipe')
+
+
+class ShoppingListItem(models.Model):
+    """
+    Список покупок пользователя: сумма ингредиента по рецептам корзины.
+    Поддерживается инкрементально (recipes.shopping_list),
+    сверяется командой recompute_shopping_lists.
+    """
+
+    user = models.ForeignKey(
+        FoodgramUser,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Ингредиент'
+    )
+    amount = models.IntegerField('Количество')
+
+    class Meta:
+        verbose_name = 'Строка списка покупок'
+        verbose_name_plural = 'Списки покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='shopping_list_user_ingredient_unique',
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} - {self.ingredient_id}: {self.amount}'
+
+
+class FeedEntry(models.Model):
+    """
+    Лента подписок: строка на каждый рецепт автора, на которого
+    подписан пользователь. Пишется при публикации рецепта и подписке
+    (recipes.feed), читается по индексу (user, recipe) без JOIN.
+    """
+
+    user = models.ForeignKey(
+        FoodgramUser,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Подписчик'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рецепт'
+    )
+    author = models.ForeignKey(
+        FoodgramUser,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Ленты подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'], name='feed_user_recipe_unique'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'author'], name='feed_user_author_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} - {self.recipe_id}'
+
+
+class CatalogueVersion(models.Model):
+    """
+    Версия справочника (тегов, ингредиентов): общая для всех
+    процессов, меняется при каждом изменении справочника.
+    По ней процессы перестраивают индексы в памяти и меняют ETag.
+    """
+
+    name = models.CharField('Справочник', max_length=50, unique=True)
+    version = models.PositiveIntegerField('Версия', default=1)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Версия справочника'
+        verbose_name_plural = 'Версии справочников'
+
+    def __str__(self):
+        return f'{self.name}: {self.version}'
@@ -0,0 +1,115 @@
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector
+)
+from django.db import connections
+from django.db.models import F, FloatField, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Recipe
+
+SEARCH_CONFIG = 'russian'
+# Таблица FTS5 для SQLite, создаётся миграцией 0008.
+FTS_TABLE = 'recipes_recipe_fts'
+# Веса bm25 для колонок name и text.
+FTS_WEIGHTS = (2.0, 1.0)
+
+
+def recipe_search_vector():
+    """Поисковый вектор: название весит больше описания."""
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_index(recipe, using='default'):
+    """
+    Обновляет поисковые данные рецепта:
+    колонку search_vector в PostgreSQL или строку таблицы FTS5 в SQLite.
+    """
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        Recipe.objects.using(using).filter(id=recipe.id).update(
+            search_vector=recipe_search_vector()
+        )
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [recipe.id]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, text) '
+                'VALUES (%s, %s, %s)',
+                [recipe.id, recipe.name, recipe.text]
+            )
+
+
+def delete_from_search_index(recipe_id, using='default'):
+    """Удаляет рецепт из таблицы FTS5 (только SQLite)."""
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [recipe_id]
+            )
+
+
+def rebuild_search_index(using='default'):
+    """
+    Перестраивает поисковые данные всех рецептов.
+    Нужна после bulk_create: массовые операции не вызывают post_save.
+    """
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        Recipe.objects.using(using).update(
+            search_vector=recipe_search_vector()
+        )
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, text) '
+                f'SELECT id, name, text FROM {Recipe._meta.db_table}'
+            )
+
+
+def fts_query(text):
+    """
+    Строка запроса MATCH для FTS5: каждое слово ищется по началу,
+    все слова должны встретиться в рецепте.
+    """
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+
+def search_recipes(queryset, text):
+    """
+    Фильтрует рецепты по поисковому запросу и добавляет
+    аннотацию search_rank (чем больше, тем релевантнее).
+    В PostgreSQL используется search_vector с GIN индексом
+    и русским стеммингом, в SQLite - таблица FTS5 и bm25.
+    """
+    if connections[queryset.db].vendor == 'postgresql':
+        query = SearchQuery(
+            text, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+
+    match = fts_query(text)
+    if not match:
+        return queryset.annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        ).none()
+    weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+    return queryset.filter(id__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        (match,)
+    )).annotate(search_rank=RawSQL(
+        f'SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s '
+        f'AND rowid = {Recipe._meta.db_table}.id',
+        (match,)
+    ))
@@ -0,0 +1,130 @@
+from django.db import transaction
+from django.db.models import Sum, Value
+
+from .models import IngredientInRecipe, ShopingCart, ShoppingListItem
+from .sql import insert_select
+
+# Префикс фильтров по корзине в запросах к IngredientInRecipe.
+CART = 'recipe__shoppingcart_recipe__'
+
+
+def cart_totals(sign=1, **filters):
+    """
+    Суммы ингредиентов рецептов корзины: (user_id, ingredient_id, total).
+    filters - условия на IngredientInRecipe, корзина - через CART.
+    Условия передаются одним filter(), поэтому соединение с корзиной
+    в запросе одно.
+    """
+    return IngredientInRecipe.objects.filter(**filters).order_by().values(
+        f'{CART}user_id', 'ingredient_id'
+    ).annotate(total=Sum('amount') * sign)
+
+
+def save_totals(totals, replace=False, using='default',
+                columns=('user_id', 'ingredient_id', 'amount')):
+    """
+    Записывает суммы одним INSERT ... SELECT ... ON CONFLICT:
+    прибавляет их к строкам списка или (replace) заменяет значения.
+    columns - порядок колонок в SELECT запроса totals.
+    """
+    value = 'excluded.amount'
+    if not replace:
+        value = '{table}.amount + ' + value
+    insert_select(
+        ShoppingListItem, columns, totals,
+        f'(user_id, ingredient_id) DO UPDATE SET amount = {value}', using
+    )
+
+
+def change_cart(user_id, recipe_ids, sign, using='default'):
+    """
+    Прибавляет (sign=1) или вычитает (sign=-1) ингредиенты рецептов
+    recipe_ids к списку покупок пользователя. Рецепты передаются только
+    действительно добавленные в корзину или удалённые из неё, строки
+    корзины при этом не читаются.
+    """
+    if not recipe_ids:
+        return
+    totals = IngredientInRecipe.objects.using(using).filter(
+        recipe_id__in=recipe_ids
+    ).order_by().values('ingredient_id').annotate(
+        total=Sum('amount') * sign, list_user=Value(user_id)
+    )
+    save_totals(
+        totals, using=using, columns=('ingredient_id', 'amount', 'user_id')
+    )
+    if sign < 0:
+        ShoppingListItem.objects.using(using).filter(
+            user_id=user_id, amount__lte=0
+        ).delete()
+
+
+def refresh_recipe(recipe_id, ingredient_ids, using='default'):
+    """
+    Пересчитывает ингредиенты ingredient_ids в списках покупок
+    пользователей, у которых рецепт в корзине: после изменения
+    ингредиентов рецепта.
+    """
+    if not ingredient_ids:
+        return
+    users = ShopingCart.objects.using(using).filter(
+        recipe_id=recipe_id
+    ).values('user_id')
+    with transaction.atomic(using=using):
+        ShoppingListItem.objects.using(using).filter(
+            user_id__in=users, ingredient_id__in=ingredient_ids
+        ).delete()
+        save_totals(cart_totals(**{
+            f'{CART}user_id__in': users,
+            'ingredient_id__in': ingredient_ids,
+        }), replace=True, using=using)
+
+
+def recompute(fix=True, chunk_size=500, using='default'):
+    """
+    Сверяет списки покупок с корзинами пачками по chunk_size
+    пользователей. Расходящиеся списки (при fix) строятся заново.
+    Возвращает генератор (проверено пользователей, id расходящихся).
+    """
+    user_ids = sorted(
+        set(ShopingCart.objects.using(using).values_list(
+            'user_id', flat=True
+        ).distinct())
+        | set(ShoppingListItem.objects.using(using).values_list(
+            'user_id', flat=True
+        ).distinct())
+    )
+    for start in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[start:start + chunk_size]
+        expected = {
+            (row[f'{CART}user_id'], row['ingredient_id']): row['total']
+            for row in cart_totals(
+                **{f'{CART}user_id__in': chunk}
+            ).using(using)
+        }
+        actual = {
+            (user_id, ingredient_id): amount
+            for user_id, ingredient_id, amount
+            in ShoppingListItem.objects.using(using).filter(
+                user_id__in=chunk, amount__gt=0
+            ).values_list('user_id', 'ingredient_id', 'amount')
+        }
+        mismatched = sorted({
+            user_id for (user_id, _), _ in expected.items() ^ actual.items()
+        })
+        if fix and mismatched:
+            with transaction.atomic(using=using):
+                ShoppingListItem.objects.using(using).filter(
+                    user_id__in=mismatched
+                ).delete()
+                save_totals(cart_totals(
+                    **{f'{CART}user_id__in': mismatched}
+                ), replace=True, using=using)
+        yield len(chunk), mismatched
+
+
+def shopping_list(user):
+    """Строки списка покупок пользователя по алфавиту ингредиентов."""
+    return ShoppingListItem.objects.filter(
+        user=user, amount__gt=0
+    ).select_related('ingredient').order_by('ingredient__name')
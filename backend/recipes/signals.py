@@ -0,0 +1,145 @@
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import Signal
+
+from .counters import COUNTERS, change_counter
+from .images import schedule_variants
+from .feed import backfill, fan_out, prune
+from .models import Follow, IngredientInRecipe, Recipe, ShopingCart, Tag
+from .search import delete_from_search_index, update_search_index
+from .shopping_list import change_cart, refresh_recipe
+from .tag_masks import clear_tag_bit, free_bit, update_tags_mask
+
+# Отправляется после массовой загрузки ингредиентов:
+# bulk_create и bulk_update не вызывают post_save.
+ingredients_loaded = Signal()
+
+
+def increment_counter(sender, instance, created, **kwargs):
+    if created:
+        fk, model, field = COUNTERS[sender]
+        change_counter(model, getattr(instance, f'{fk}_id'), field, 1)
+
+
+def decrement_counter(sender, instance, **kwargs):
+    fk, model, field = COUNTERS[sender]
+    change_counter(model, getattr(instance, f'{fk}_id'), field, -1)
+
+
+for sender, (_, _, field) in COUNTERS.items():
+    post_save.connect(
+        increment_counter, sender=sender, dispatch_uid=f'{field}_increment'
+    )
+    post_delete.connect(
+        decrement_counter, sender=sender, dispatch_uid=f'{field}_decrement'
+    )
+
+
+def recipe_image_saved(sender, instance, **kwargs):
+    schedule_variants(instance)
+
+
+post_save.connect(
+    recipe_image_saved, sender=Recipe, dispatch_uid='recipe_image_variants'
+)
+
+
+def recipe_text_saved(sender, instance, using, update_fields, **kwargs):
+    if update_fields and not {'name', 'text'} & set(update_fields):
+        return
+    update_search_index(instance, using)
+
+
+def recipe_deleted(sender, instance, using, **kwargs):
+    delete_from_search_index(instance.id, using)
+
+
+post_save.connect(
+    recipe_text_saved, sender=Recipe, dispatch_uid='recipe_search_index'
+)
+post_delete.connect(
+    recipe_deleted, sender=Recipe, dispatch_uid='recipe_search_index'
+)
+
+
+def tag_bit_assigned(sender, instance, **kwargs):
+    if instance.bit is None:
+        instance.bit = free_bit()
+
+
+def tag_deleted(sender, instance, **kwargs):
+    if instance.bit is not None:
+        clear_tag_bit(instance.bit)
+
+
+def recipe_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Пересчитывает маску тегов рецепта. Маска сохраняется и в объекте,
+    чтобы он оставался актуальным.
+    """
+    if not reverse:
+        if action.startswith('post_'):
+            instance.tags_mask = update_tags_mask([instance.id])[instance.id]
+    elif action in ('post_add', 'post_remove'):
+        update_tags_mask(pk_set)
+    elif action == 'pre_clear' and instance.bit is not None:
+        clear_tag_bit(instance.bit)
+
+
+pre_save.connect(tag_bit_assigned, sender=Tag, dispatch_uid='tag_bit')
+post_delete.connect(tag_deleted, sender=Tag, dispatch_uid='tag_bit')
+m2m_changed.connect(
+    recipe_tags_changed, sender=Recipe.tags.through,
+    dispatch_uid='recipe_tags_mask'
+)
+
+
+def cart_added(sender, instance, created, using, **kwargs):
+    if created:
+        change_cart(instance.user_id, [instance.recipe_id], 1, using)
+
+
+def cart_removed(sender, instance, using, **kwargs):
+    """
+    Вычитается до удаления: при каскадном удалении рецепта его
+    ингредиенты ещё на месте.
+    """
+    change_cart(instance.user_id, [instance.recipe_id], -1, using)
+
+
+def recipe_ingredient_changed(sender, instance, using, **kwargs):
+    refresh_recipe(instance.recipe_id, [instance.ingredient_id], using)
+
+
+post_save.connect(cart_added, sender=ShopingCart, dispatch_uid='shopping_list')
+pre_delete.connect(
+    cart_removed, sender=ShopingCart, dispatch_uid='shopping_list'
+)
+post_save.connect(
+    recipe_ingredient_changed, sender=IngredientInRecipe,
+    dispatch_uid='shopping_list'
+)
+post_delete.connect(
+    recipe_ingredient_changed, sender=IngredientInRecipe,
+    dispatch_uid='shopping_list'
+)
+
+
+def recipe_published(sender, instance, created, using, **kwargs):
+    if created:
+        fan_out(instance, using)
+
+
+def follow_created(sender, instance, created, using, **kwargs):
+    if created:
+        backfill(instance.user_id, instance.author_id, using)
+
+
+def follow_deleted(sender, instance, using, **kwargs):
+    prune(instance.user_id, instance.author_id, using)
+
+
+post_save.connect(recipe_published, sender=Recipe, dispatch_uid='feed')
+post_save.connect(follow_created, sender=Follow, dispatch_uid='feed')
+post_delete.connect(follow_deleted, sender=Follow, dispatch_uid='feed')
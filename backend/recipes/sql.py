@@ -0,0 +1,68 @@
+from django.db import connections
+
+
+def insert_select(model, columns, queryset, conflict, using='default'):
+    """
+    INSERT INTO таблица model (columns) SELECT ... ON CONFLICT conflict.
+    SELECT строится ORM из queryset: порядок его колонок должен
+    совпадать с columns. В conflict {table} - имя таблицы model.
+    Возвращает число вставленных или обновлённых строк.
+    """
+    connection = connections[using]
+    sql, params = queryset.query.get_compiler(using).as_sql()
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({", ".join(columns)}) {sql} '
+            f'ON CONFLICT {conflict.format(table=table)}',
+            params
+        )
+        return cursor.rowcount
+
+
+def insert_rows(model, columns, rows, returning, using='default'):
+    """
+    INSERT строк rows (кортежи значений columns) одним запросом
+    с ON CONFLICT DO NOTHING. Возвращает значения колонки returning
+    только действительно вставленных строк: строки, уже вставленные
+    другим запросом, пропускаются.
+    """
+    if not rows:
+        return []
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    row = '({})'.format(', '.join(['%s'] * len(columns)))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {qn(model._meta.db_table)} '
+            f'({", ".join(map(qn, columns))}) '
+            f'VALUES {", ".join([row] * len(rows))} '
+            f'ON CONFLICT DO NOTHING RETURNING {qn(returning)}',
+            [value for values in rows for value in values]
+        )
+        return [values[0] for values in cursor.fetchall()]
+
+
+def delete_rows(queryset, returning=None):
+    """
+    DELETE строк queryset одним запросом, без загрузки объектов,
+    сигналов и каскадного удаления: только для моделей, на которые
+    не ссылаются другие таблицы. Возвращает число удалённых строк
+    или (returning) список значений колонки удалённых строк.
+    """
+    model, using = queryset.model, queryset.db
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    pk = qn(model._meta.pk.column)
+    sql, params = queryset.order_by().values('pk').query.get_compiler(
+        using
+    ).as_sql()
+    table = qn(model._meta.db_table)
+    query = f'DELETE FROM {table} WHERE {pk} IN ({sql})'
+    if returning:
+        query += f' RETURNING {qn(returning)}'
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        if returning:
+            return [row[0] for row in cursor.fetchall()]
+        return cursor.rowcount
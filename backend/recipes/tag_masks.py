@@ -0,0 +1,55 @@
+from collections import defaultdict
+
+from django.db.models import F
+
+from .models import Recipe, Tag
+
+# Маска хранится в BigIntegerField: старший (знаковый) бит не используется.
+MAX_TAG_BITS = 63
+
+
+def free_bit():
+    """Наименьший незанятый бит или None, если все биты заняты."""
+    used = set(
+        Tag.objects.exclude(bit=None).values_list('bit', flat=True)
+    )
+    return next(
+        (bit for bit in range(MAX_TAG_BITS) if bit not in used), None
+    )
+
+
+def bits_to_mask(bits):
+    mask = 0
+    for bit in bits:
+        mask |= 1 << bit
+    return mask
+
+
+def update_tags_mask(recipe_ids):
+    """
+    Пересчитывает Recipe.tags_mask для рецептов по их тегам.
+    Возвращает словарь {id рецепта: маска}.
+    """
+    recipe_ids = set(recipe_ids)
+    bits = defaultdict(list)
+    for recipe_id, bit in Recipe.tags.through.objects.filter(
+        recipe_id__in=recipe_ids, tag__bit__isnull=False
+    ).values_list('recipe_id', 'tag__bit'):
+        bits[recipe_id].append(bit)
+    masks = {
+        recipe_id: bits_to_mask(bits[recipe_id]) for recipe_id in recipe_ids
+    }
+    Recipe.objects.bulk_update(
+        [Recipe(id=pk, tags_mask=mask) for pk, mask in masks.items()],
+        ('tags_mask',), batch_size=1000
+    )
+    return masks
+
+
+def clear_tag_bit(bit):
+    """Снимает бит удалённого тега у всех рецептов."""
+    Recipe.objects.alias(
+        tag_hit=F('tags_mask').bitand(1 << bit)
+    ).filter(tag_hit__gt=0).update(
+        tags_mask=F('tags_mask').bitand(~(1 << bit))
+    )
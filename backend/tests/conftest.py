@@ -0,0 +1,136 @@
+from contextlib import contextmanager
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.catalogue import catalogue_versions, ingredients_index, tag_bits
+from api.instrumentation import record_queries
+from recipes.models import (
+    FavoriteRecipe, Follow, Ingredient, IngredientInRecipe, Recipe,
+    ShopingCart, Tag
+)
+from users.models import FoodgramUser
+
+AUTHORS = 3
+RECIPES_PER_AUTHOR = 4
+
+
+@pytest.fixture(autouse=True)
+def shared_token_cache(settings):
+    """В тестах один процесс: LocMemCache ведёт себя как общий кеш."""
+    settings.CACHES = dict(settings.CACHES, tokens={
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tokens',
+    })
+
+
+@pytest.fixture(autouse=True)
+def clear_caches(shared_token_cache):
+    """Кеши и индексы в памяти не переживают тест."""
+    for alias in settings.CACHES:
+        caches[alias].clear()
+    catalogue_versions.clear()
+    ingredients_index.invalidate()
+    tag_bits.invalidate()
+
+
+@pytest.fixture(autouse=True)
+def catalogue_version_ttl(settings):
+    """Бюджеты запросов не зависят от скорости теста."""
+    settings.CATALOGUE_VERSION_TTL = 60
+
+
+@pytest.fixture
+def user(db):
+    return FoodgramUser.objects.create_user(
+        email='reader@foodgram.ru', username='reader',
+        first_name='Читатель', last_name='Читателев', password='Pass-1234'
+    )
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    token = Token.objects.create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+@pytest.fixture
+def recipes(user, django_capture_on_commit_callbacks):
+    """
+    Несколько авторов с рецептами: запросы, выполняемые на каждый
+    рецепт или автора, сразу выходят за бюджет.
+    Действия после фиксации транзакции (версии справочников)
+    выполняются, как после обычной загрузки данных.
+    """
+    with django_capture_on_commit_callbacks(execute=True):
+        return create_recipes(user)
+
+
+def create_recipes(user):
+    tags = [
+        Tag.objects.create(name=f'Тег {i}', color=f'#00000{i}', slug=f'tag{i}')
+        for i in range(3)
+    ]
+    ingredients = [
+        Ingredient.objects.create(name=f'Ингредиент {i}', measurement_unit='г')
+        for i in range(5)
+    ]
+    recipes = []
+    for number in range(AUTHORS):
+        author = FoodgramUser.objects.create_user(
+            email=f'author{number}@foodgram.ru', username=f'author{number}',
+            first_name='Автор', last_name=str(number), password='Pass-1234'
+        )
+        Follow.objects.create(user=user, author=author)
+        for index in range(RECIPES_PER_AUTHOR):
+            recipe = Recipe.objects.create(
+                author=author, name=f'Рецепт {number}-{index}',
+                text=f'Описание {number}-{index}', cooking_time=10,
+                image='recipes/test.png',
+                # Копии изображения не создаются в фоновом потоке.
+                image_variants={'source': 'recipes/test.png', 'widths': []},
+            )
+            recipe.tags.set(tags[:index % 3 + 1])
+            IngredientInRecipe.objects.bulk_create(
+                IngredientInRecipe(
+                    recipe=recipe, ingredient=ingredient, amount=index + 1
+                ) for ingredient in ingredients[index:index + 2]
+            )
+            FavoriteRecipe.objects.create(user=user, recipe=recipe)
+            ShopingCart.objects.create(user=user, recipe=recipe)
+            recipes.append(recipe)
+    return recipes
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Проверка бюджета SQL-запросов:
+
+        with query_budget(4):
+            client.get('/api/recipes/')
+
+    При превышении выводит все запросы и повторяющиеся отпечатки.
+    """
+    @contextmanager
+    def check(budget):
+        with record_queries() as queries:
+            yield queries
+        duplicates = '\n'.join(
+            f'  {count} x {sql}'
+            for sql, count in queries.duplicates.items()
+        )
+        assert queries.count <= budget, (
+            f'Выполнено {queries.count} запросов при бюджете {budget}.\n'
+            f'Повторы:\n{duplicates or "  нет"}\n'
+            'Запросы:\n' + '\n'.join(
+                f'  {count} x {sql}'
+                for sql, count in queries.fingerprints.items()
+            )
+        )
+    return check
@@ -0,0 +1,124 @@
+import asyncio
+from time import monotonic, sleep
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, override_settings
+from django.urls import resolve
+from rest_framework.response import Response
+
+from api.renderers import ShoppingListRenderer
+from api.views import TagsViewSet
+from recipes.models import Tag
+
+# Асинхронные представления работают в потоках пула со своими
+# соединениями: данные теста должны быть зафиксированы в БД.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.mark.parametrize('path, is_async', (
+    ('/api/recipes/', True),
+    ('/api/recipes/1/', True),
+    ('/api/recipes/download_shopping_cart/', True),
+    ('/api/ingredients/', True),
+    ('/api/tags/', True),
+    ('/api/users/subscriptions/', True),
+    ('/api/users/', False),
+    ('/api/auth/token/login/', False),
+))
+def test_async_routes(path, is_async):
+    view = resolve(path, 'backend.asgi_urls').func
+    assert asyncio.iscoroutinefunction(view) is is_async
+    assert not asyncio.iscoroutinefunction(resolve(path).func)
+
+
+@override_settings(ROOT_URLCONF='backend.asgi_urls')
+def test_async_responses_match_sync(user_client, user, recipes):
+    # AsyncClient в Django 3.2 передаёт заголовки как есть, без HTTP_.
+    headers = {'authorization': f'Token {user.auth_token.key}'}
+    client = AsyncClient()
+    for path in (
+        '/api/recipes/',
+        f'/api/recipes/{recipes[0].id}/',
+        '/api/users/subscriptions/?recipes_limit=2',
+        '/api/ingredients/?name=инг',
+    ):
+        response = async_to_sync(client.get)(path, **headers)
+        assert response.status_code == 200
+        assert response.json() == user_client.get(path).json()
+
+    response = async_to_sync(client.get)(
+        '/api/recipes/download_shopping_cart/', **headers
+    )
+    assert response.status_code == 200
+    assert b''.join(response.streaming_content) == b''.join(
+        user_client.get(
+            '/api/recipes/download_shopping_cart/'
+        ).streaming_content
+    )
+
+
+@override_settings(ROOT_URLCONF='backend.asgi_urls')
+@pytest.mark.parametrize('format', ('txt', 'csv', 'pdf'))
+def test_async_shopping_list_is_streamed(
+    monkeypatch, user_client, user, recipes, format
+):
+    monkeypatch.setattr('api.renderers.CHUNK_SIZE', 64)
+    rendered = []
+    parts = ShoppingListRenderer._parts
+
+    def record_parts(self, title, rows):
+        rendered.append(title)
+        yield from parts(self, title, rows)
+
+    monkeypatch.setattr(ShoppingListRenderer, '_parts', record_parts)
+    headers = {'authorization': f'Token {user.auth_token.key}'}
+    path = f'/api/recipes/download_shopping_cart/?format={format}'
+
+    async def download():
+        response = await AsyncClient().get(path, **headers)
+        # Потоковый ответ не прочитан в потоке пула.
+        assert not rendered
+        # Как в обработчике ASGI: документ рендерится в цикле событий,
+        # где запросы к БД запрещены.
+        return response, list(response.streaming_content)
+
+    response, chunks = async_to_sync(download)()
+    assert response.status_code == 200
+    assert len(chunks) > 1
+    assert b''.join(chunks) == b''.join(
+        user_client.get(path).streaming_content
+    )
+
+
+@pytest.mark.parametrize('options', (
+    {},
+    {'DATABASE_REPLICAS': ['default']},
+    {'QUERY_INSTRUMENTATION': True},
+))
+def test_async_requests_are_concurrent(monkeypatch, options):
+    def slow_list(self, request, *args, **kwargs):
+        count = Tag.objects.count()
+        sleep(0.3)
+        return Response({'count': count})
+
+    monkeypatch.setattr(TagsViewSet, 'list', slow_list)
+
+    async def get_all():
+        client = AsyncClient()
+        started = monotonic()
+        responses = await asyncio.gather(
+            *(client.get('/api/tags/') for _ in range(8))
+        )
+        return responses, monotonic() - started
+
+    with override_settings(ROOT_URLCONF='backend.asgi_urls', **options):
+        responses, elapsed = async_to_sync(get_all)()
+    assert all(response.status_code == 200 for response in responses)
+    # По одному запросу в общем потоке вышло бы 8 x 0.3 с.
+    assert elapsed < 1.2
+    if options.get('QUERY_INSTRUMENTATION'):
+        # Запросы из потоков пула попадают в счётчик своего запроса.
+        assert all(
+            int(response['X-DB-Queries']) >= 1 for response in responses
+        )
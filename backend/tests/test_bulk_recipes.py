@@ -0,0 +1,56 @@
+import pytest
+
+from recipes.models import FavoriteRecipe, Recipe, ShopingCart
+
+pytestmark = pytest.mark.django_db
+
+
+# Корзина дополнительно меняет список покупок: один INSERT ... SELECT
+# при добавлении, он же и удаление обнулившихся строк при удалении.
+@pytest.mark.parametrize('url, model, counter, budgets', (
+    ('/api/recipes/favorite/', FavoriteRecipe, 'favorites_count', (6, 6)),
+    ('/api/recipes/shopping_cart/', ShopingCart, 'cart_count', (7, 8)),
+))
+def test_bulk_add_and_remove(user, user_client, recipes, query_budget,
+                             url, model, counter, budgets):
+    model.objects.filter(user=user, recipe__in=recipes[1:]).delete()
+    ids = [recipe.id for recipe in recipes[:4]]
+
+    # Токен (запись всегда читает его из БД), in_bulk, INSERT ...
+    # RETURNING, счётчики и точка сохранения транзакции (в тесте atomic
+    # вложен в транзакцию теста).
+    with query_budget(budgets[0]):
+        response = user_client.post(
+            url, {'recipes': ids + [ids[1], 10 ** 6]},
+            format='json'
+        )
+    assert response.status_code == 200
+    assert [
+        (result['id'], result['status'])
+        for result in response.data['results']
+    ] == [
+        (ids[0], 'exists'), (ids[1], 'added'), (ids[2], 'added'),
+        (ids[3], 'added'), (10 ** 6, 'not_found'),
+    ]
+    assert response.data['results'][1]['recipe']['id'] == ids[1]
+    assert set(Recipe.objects.filter(id__in=ids).values_list(
+        counter, flat=True
+    )) == {1}
+
+    with query_budget(budgets[1]):
+        response = user_client.delete(
+            url, {'recipes': [ids[0], ids[1], recipes[-1].id]},
+            format='json'
+        )
+    assert [result['status'] for result in response.data['results']] == [
+        'removed', 'removed', 'missing'
+    ]
+    assert model.objects.filter(user=user).count() == 2
+    assert getattr(Recipe.objects.get(id=ids[0]), counter) == 0
+
+
+def test_bulk_validation(user_client):
+    response = user_client.post(
+        '/api/recipes/favorite/', {'recipes': []}, format='json'
+    )
+    assert response.status_code == 400
@@ -0,0 +1,55 @@
+import pytest
+from django.db.models import F
+
+from api.catalogue import get_catalogue_version
+from recipes.models import CatalogueVersion, Ingredient, Tag
+
+pytestmark = pytest.mark.django_db
+
+
+def bump_in_other_process(name):
+    """Изменение версии другим процессом: память этого не знает."""
+    CatalogueVersion.objects.filter(name=name).update(
+        version=F('version') + 1
+    )
+
+
+def test_ingredient_index_follows_other_processes(
+        settings, user_client, recipes):
+    settings.CATALOGUE_VERSION_TTL = 0
+    response = user_client.get('/api/ingredients/', {'name': 'инж'})
+    assert response.data == []
+
+    Ingredient.objects.bulk_create(
+        [Ingredient(name='Инжир', measurement_unit='г')]
+    )
+    bump_in_other_process('ingredients')
+
+    response = user_client.get('/api/ingredients/', {'name': 'инж'})
+    assert [item['name'] for item in response.data] == ['Инжир']
+
+
+def test_tags_etag_follows_other_processes(settings, user_client, recipes):
+    settings.CATALOGUE_VERSION_TTL = 0
+    etag = user_client.get('/api/tags/')['ETag']
+    response = user_client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+    bump_in_other_process('tags')
+    response = user_client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+
+
+def test_version_bumped_after_commit(
+        recipes, django_capture_on_commit_callbacks):
+    version = get_catalogue_version('tags')
+    with django_capture_on_commit_callbacks() as callbacks:
+        Tag.objects.filter(slug='tag0').get().save()
+        # До фиксации другие запросы читают старые данные
+        # и должны видеть старую версию.
+        assert get_catalogue_version('tags') == version
+        assert CatalogueVersion.objects.get(name='tags').version == version
+    for callback in callbacks:
+        callback()
+    assert get_catalogue_version('tags') == version + 1
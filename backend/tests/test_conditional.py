@@ -0,0 +1,32 @@
+import pytest
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize('authenticated', (True, False))
+@pytest.mark.parametrize('field', ('tags', 'ingredients'))
+def test_recipe_validators_follow_catalogues(
+        user_client, recipes, authenticated, field,
+        django_capture_on_commit_callbacks):
+    """Переименование тега или ингредиента меняет ETag рецепта."""
+    client = user_client if authenticated else APIClient()
+    url = f'/api/recipes/{recipes[0].id}/'
+    response = client.get(url)
+    etag = response['ETag']
+    headers = {'HTTP_IF_NONE_MATCH': etag}
+    if not authenticated:
+        headers['HTTP_IF_MODIFIED_SINCE'] = response['Last-Modified']
+    assert client.get(url, **headers).status_code == 304
+
+    item = getattr(recipes[0], field).first()
+    item.name = 'Новое название'
+    with django_capture_on_commit_callbacks(execute=True):
+        item.save()
+
+    response = client.get(url, **headers)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+    assert 'Новое название' in [
+        item['name'] for item in response.data[field]
+    ]
@@ -0,0 +1,93 @@
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from recipes.counters import COUNTERS
+from recipes.models import FavoriteRecipe, Follow, Recipe, ShopingCart
+from users.models import FoodgramUser
+
+pytestmark = pytest.mark.django_db
+
+
+def counters():
+    """Все счётчики: {(модель, id, поле): значение}."""
+    return {
+        (model, pk, field): value
+        for _, model, field in COUNTERS.values()
+        for pk, value in model.objects.values_list('pk', field)
+    }
+
+
+def actual_counters():
+    """Счётчики, посчитанные по исходным таблицам."""
+    result = dict.fromkeys(counters(), 0)
+    for source, (fk, model, field) in COUNTERS.items():
+        for pk in source.objects.values_list(f'{fk}_id', flat=True):
+            result[model, pk, field] += 1
+    return result
+
+
+def test_signals_keep_counters(user, recipes):
+    assert counters() == actual_counters()
+    author = recipes[0].author
+    assert author.recipe.count() == 4
+    author.refresh_from_db()
+    assert (author.recipes_count, author.followers_count) == (4, 1)
+
+    recipe = recipes[0]
+    FavoriteRecipe.objects.filter(recipe=recipe).delete()
+    ShopingCart.objects.get(user=user, recipe=recipe).delete()
+    Follow.objects.get(user=user, author=author).delete()
+    recipes[1].delete()
+    assert counters() == actual_counters()
+    recipe.refresh_from_db()
+    assert (recipe.favorites_count, recipe.cart_count) == (0, 0)
+
+
+def test_counters_not_below_zero(user, recipes):
+    recipe = recipes[0]
+    Recipe.objects.filter(id=recipe.id).update(favorites_count=0)
+    FavoriteRecipe.objects.get(user=user, recipe=recipe).delete()
+    recipe.refresh_from_db()
+    assert recipe.favorites_count == 0
+
+
+def test_save_keeps_counters(user, recipes):
+    # Объекты загружены до изменения счётчиков и сохраняются целиком.
+    recipe = Recipe.objects.get(id=recipes[0].id)
+    author = FoodgramUser.objects.get(id=recipe.author_id)
+    FavoriteRecipe.objects.get(user=user, recipe=recipe).delete()
+    Follow.objects.get(user=user, author=author).delete()
+
+    recipe.name = 'Новое название'
+    recipe.save()
+    author.first_name = 'Новое имя'
+    author.set_password('Pass-5678-new')
+    author.save()
+
+    recipe.refresh_from_db()
+    author.refresh_from_db()
+    assert recipe.name == 'Новое название'
+    assert author.first_name == 'Новое имя'
+    assert author.check_password('Pass-5678-new')
+    assert counters() == actual_counters()
+
+
+def test_patch_recipe_keeps_counters(user, recipes):
+    recipe = recipes[0]
+    client = APIClient()
+    client.force_authenticate(recipe.author)
+    response = client.patch(
+        f'/api/recipes/{recipe.id}/', {'name': 'Другое'}, format='json'
+    )
+    assert response.status_code == 200
+    recipe.refresh_from_db()
+    assert (recipe.favorites_count, recipe.cart_count) == (1, 1)
+
+
+def test_recount_counters(recipes):
+    # Массовые операции не вызывают сигналы.
+    Recipe.objects.update(favorites_count=7, cart_count=0)
+    FoodgramUser.objects.update(recipes_count=0, followers_count=3)
+    call_command('recount_counters', chunk_size=2)
+    assert counters() == actual_counters()
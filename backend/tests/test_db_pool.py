@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+from django.db.utils import OperationalError
+from psycopg2 import extensions
+
+from backend.postgresql.base import ConnectionPool
+
+
+class FakeConnection:
+    """Соединение psycopg2 без сервера: состояние транзакции и закрытие."""
+
+    def __init__(self):
+        self.closed = 0
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+def test_pool_reuses_connections():
+    pool = ConnectionPool(max_size=2)
+    connection, created = pool.acquire(FakeConnection)
+    assert created
+    pool.release(connection)
+    assert pool.acquire(FakeConnection) == (connection, False)
+    assert pool.stats()['created'] == 1
+
+
+def test_pool_rolls_back_and_discards():
+    pool = ConnectionPool(max_size=2)
+    connection, _ = pool.acquire(FakeConnection)
+    connection.status = extensions.TRANSACTION_STATUS_INERROR
+    pool.release(connection)
+    assert connection.status == extensions.TRANSACTION_STATUS_IDLE
+    assert pool.acquire(FakeConnection)[0] is connection
+
+    connection.closed = 2
+    pool.release(connection)
+    stats = pool.stats()
+    assert stats['discarded'] == 1
+    assert stats['size'] == 0
+
+
+def test_pool_waits_and_times_out():
+    pool = ConnectionPool(max_size=1, timeout=0.05)
+    connection, _ = pool.acquire(FakeConnection)
+    with pytest.raises(OperationalError):
+        pool.acquire(FakeConnection)
+
+    pool.timeout = 5
+    timer = threading.Timer(0.05, pool.release, (connection,))
+    timer.start()
+    assert pool.acquire(FakeConnection)[0] is connection
+    stats = pool.stats()
+    assert stats['timeouts'] == 1
+    assert stats['waits'] == 1
+    assert stats['wait_max'] >= 0.04
@@ -0,0 +1,103 @@
+from time import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core import signing
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from rest_framework.authtoken.models import Token
+
+from api.middleware import ReplicaRoutingMiddleware
+from api.signals import pin_new_session
+from backend.db_router import (
+    PIN_COOKIE, ReplicaRouter, is_pinned, route_reads, selector
+)
+from recipes.models import Recipe
+
+router = ReplicaRouter()
+replicas = override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+
+
+def anonymous_request(method='get'):
+    request = getattr(RequestFactory(), method)('/api/recipes/')
+    request.user = AnonymousUser()
+    return request
+
+
+@replicas
+def test_reads_are_spread_over_replicas():
+    aliases = []
+    for _ in range(4):
+        with route_reads(anonymous_request()):
+            alias = router.db_for_read(Recipe)
+            assert router.db_for_read(Recipe) == alias
+            assert router.db_for_read(Token) == 'default'
+            assert router.db_for_write(Recipe) == 'default'
+        aliases.append(alias)
+    assert sorted(aliases) == ['replica1', 'replica1', 'replica2', 'replica2']
+    assert router.db_for_read(Recipe) == 'default'
+
+
+@replicas
+@override_settings(DATABASE_REPLICA_SELECTION='least_connections')
+def test_least_connections():
+    with route_reads(anonymous_request()):
+        busy = router.db_for_read(Recipe)
+        for _ in range(3):
+            with route_reads(anonymous_request()):
+                assert router.db_for_read(Recipe) != busy
+    assert not +selector.active
+
+
+def read_alias(request, cookies=None):
+    """
+    Обрабатывает запрос новым экземпляром middleware, как в другом
+    процессе. Возвращает (база чтения рецептов во view, ответ).
+    """
+    request.COOKIES.update(cookies or {})
+    aliases = []
+
+    def view(request):
+        aliases.append(router.db_for_read(Recipe))
+        return HttpResponse(status=201 if request.method == 'POST' else 200)
+
+    response = ReplicaRoutingMiddleware(view)(request)
+    return aliases[0], response
+
+
+@replicas
+def test_writes_pin_client_to_primary():
+    alias, response = read_alias(anonymous_request('post'))
+    assert alias == 'default'
+    cookie = response.cookies[PIN_COOKIE]
+    assert cookie['max-age'] == 5 and cookie['httponly']
+
+    alias, _ = read_alias(
+        anonymous_request(), {PIN_COOKIE: cookie.value}
+    )
+    assert alias == 'default'
+
+    alias, response = read_alias(anonymous_request())
+    assert alias.startswith('replica')
+    assert PIN_COOKIE not in response.cookies
+
+
+@replicas
+def test_forged_pin_cookie_ignored():
+    alias, _ = read_alias(anonymous_request(), {PIN_COOKIE: '1'})
+    assert alias.startswith('replica')
+
+
+@replicas
+def test_pin_expires(monkeypatch):
+    _, response = read_alias(anonymous_request('post'))
+    cookie = response.cookies[PIN_COOKIE].value
+    monkeypatch.setattr(signing.time, 'time', lambda: time() + 6)
+    alias, _ = read_alias(anonymous_request(), {PIN_COOKIE: cookie})
+    assert alias.startswith('replica')
+
+
+@replicas
+def test_login_pins_client():
+    request = anonymous_request()
+    pin_new_session(request=request, user=None)
+    assert is_pinned(request)
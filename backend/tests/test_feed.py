@@ -0,0 +1,53 @@
+import pytest
+
+from recipes.feed import feed, feed_on_read, rebuild
+from recipes.models import FeedEntry
+
+pytestmark = pytest.mark.django_db
+
+
+def feed_ids(user):
+    return list(feed(user).values_list('recipe_id', flat=True))
+
+
+def read_ids(user):
+    return list(feed_on_read(user).values_list('id', flat=True))
+
+
+def test_feed_follows_writes(user, user_client, recipes):
+    assert feed_ids(user) == read_ids(user)
+    assert len(feed_ids(user)) == len(recipes)
+
+    author = recipes[0].author
+    response = user_client.delete(f'/api/users/{author.id}/subscribe/')
+    assert response.status_code == 204
+    assert feed_ids(user) == read_ids(user)
+    assert not FeedEntry.objects.filter(user=user, author=author).exists()
+
+    response = user_client.post(f'/api/users/{author.id}/subscribe/')
+    assert response.status_code == 201
+    assert feed_ids(user) == read_ids(user)
+
+    recipes[-1].delete()
+    assert feed_ids(user) == read_ids(user)
+
+
+def test_feed_pages(user, user_client, recipes, query_budget):
+    # Токен, записи ленты, рецепты страницы, подписки пользователя,
+    # теги и ингредиенты рецептов не из кеша.
+    with query_budget(6):
+        response = user_client.get('/api/recipes/feed/?limit=5')
+    assert response.status_code == 200
+    ids = [recipe['id'] for recipe in response.data['results']]
+    assert response.data['results'][0]['author']['is_subscribed']
+
+    while response.data['next']:
+        response = user_client.get(response.data['next'])
+        ids += [recipe['id'] for recipe in response.data['results']]
+    assert ids == read_ids(user)
+
+
+def test_rebuild(user, recipes):
+    FeedEntry.objects.all().delete()
+    assert rebuild() == len(recipes)
+    assert feed_ids(user) == read_ids(user)
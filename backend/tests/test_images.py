@@ -0,0 +1,87 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from PIL import Image
+
+from recipes.images import build_variants, variant_names
+from recipes.models import Recipe
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+def save_image(name, width=800):
+    buffer = BytesIO()
+    Image.new('RGB', (width, width // 2), 'red').save(buffer, 'PNG')
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def test_command_builds_all_recipes(recipes):
+    for recipe in recipes[:3]:
+        recipe.image = save_image(f'recipes/{recipe.id}.png')
+    Recipe.objects.bulk_update(recipes[:3], ('image',))
+    Recipe.objects.exclude(id__in=[r.id for r in recipes[:3]]).update(
+        image=''
+    )
+
+    call_command('build_image_variants')
+    built = dict(Recipe.objects.values_list('id', 'updated_at'))
+    call_command('build_image_variants')
+    assert dict(Recipe.objects.values_list('id', 'updated_at')) == built
+    call_command('build_image_variants', '--all')
+    assert all(
+        updated_at > built[pk] for pk, updated_at in
+        Recipe.objects.filter(
+            id__in=[r.id for r in recipes[:3]]
+        ).values_list('id', 'updated_at')
+    )
+
+    for recipe in Recipe.objects.filter(id__in=[r.id for r in recipes[:3]]):
+        assert recipe.image_variants['widths'] == [300, 600]
+        assert all(map(default_storage.exists, variant_names(
+            recipe.image_variants
+        )))
+
+
+def test_replaced_image_variants_deleted(recipes):
+    recipe = recipes[0]
+    first = save_image('recipes/first.png')
+    Recipe.objects.filter(id=recipe.id).update(image=first)
+    build_variants(recipe.id, first)
+    old = variant_names(Recipe.objects.get(id=recipe.id).image_variants)
+    assert old and all(map(default_storage.exists, old))
+
+    second = save_image('recipes/second.png', width=400)
+    Recipe.objects.filter(id=recipe.id).update(image=second)
+    build_variants(recipe.id, second)
+
+    new = variant_names(Recipe.objects.get(id=recipe.id).image_variants)
+    assert all(map(default_storage.exists, new))
+    assert not any(map(default_storage.exists, old))
+
+
+def test_variants_of_same_stem_do_not_collide(recipes):
+    sources = [
+        save_image('recipes/a.png'), save_image('recipes/a.jpg', width=400)
+    ]
+    assert sources == ['recipes/a.png', 'recipes/a.jpg']
+    names = []
+    for recipe, source in zip(recipes, sources):
+        Recipe.objects.filter(id=recipe.id).update(image=source)
+        build_variants(recipe.id, source)
+        names.append(variant_names(
+            Recipe.objects.get(id=recipe.id).image_variants
+        ))
+
+    assert names[0] and names[1] and not names[0] & names[1]
+    assert all(map(default_storage.exists, names[0] | names[1]))
+    for name in names[1]:
+        with default_storage.open(name) as file:
+            assert Image.open(file).width <= 400
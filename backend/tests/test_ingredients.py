@@ -0,0 +1,141 @@
+import pytest
+import tablib
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+from recipes.admin import IngredientResource
+from recipes.loaders import INSERTED, SKIPPED, UPDATED, load_ingredients
+from recipes.models import Ingredient
+
+pytestmark = pytest.mark.django_db
+
+ROWS = [
+    {'name': 'мука', 'measurement_unit': 'г'},
+    {'name': 'молоко', 'measurement_unit': 'мл'},
+    {'name': 'молоко', 'measurement_unit': 'стакан'},
+    {'name': ' мука ', 'measurement_unit': 'г'},
+    {'name': '', 'measurement_unit': 'г'},
+]
+
+
+def catalogue():
+    return sorted(
+        Ingredient.objects.values_list('name', 'measurement_unit')
+    )
+
+
+def statuses(result):
+    return {status: len(rows) for status, rows in result.items()}
+
+
+def test_load_ingredients_is_idempotent():
+    result = load_ingredients(ROWS, batch_size=2)
+    assert statuses(result) == {INSERTED: 3, UPDATED: 0, SKIPPED: 2}
+    loaded = catalogue()
+    assert loaded == [('молоко', 'мл'), ('молоко', 'стакан'), ('мука', 'г')]
+
+    result = load_ingredients(ROWS, batch_size=2)
+    assert statuses(result) == {INSERTED: 0, UPDATED: 0, SKIPPED: 5}
+    assert catalogue() == loaded
+
+
+def test_load_ingredients_updates_by_id():
+    load_ingredients(ROWS)
+    flour = Ingredient.objects.get(name='мука')
+    result = load_ingredients([
+        {'id': flour.id, 'name': 'мука пшеничная', 'measurement_unit': 'г'},
+        {'name': 'мука', 'measurement_unit': 'г'},
+    ])
+    # Старый ключ освобождён обновлением и занят новой строкой.
+    assert statuses(result) == {INSERTED: 1, UPDATED: 1, SKIPPED: 0}
+    assert Ingredient.objects.get(id=flour.id).name == 'мука пшеничная'
+    assert catalogue().count(('мука', 'г')) == 1
+
+
+def test_load_ingredients_dry_run():
+    result = load_ingredients(ROWS, dry_run=True)
+    assert statuses(result)[INSERTED] == 3
+    assert not Ingredient.objects.exists()
+
+
+def test_load_ingredients_command(tmp_path):
+    path = tmp_path / 'ingredients.csv'
+    path.write_text('мука,г\nмолоко,мл\nмука,г\n', encoding='utf-8')
+    call_command('load_ingredients', str(path))
+    call_command('load_ingredients', str(path))
+    assert catalogue() == [('молоко', 'мл'), ('мука', 'г')]
+
+
+def test_resource_skips_duplicates():
+    Ingredient.objects.create(name='мука', measurement_unit='г')
+    dataset = tablib.Dataset(headers=('id', 'name', 'measurement_unit'))
+    for row in (
+        ('', 'мука', 'г'), ('', 'соль', 'г'), ('', 'соль', 'г'),
+        ('', 'сахар', 'г'),
+    ):
+        dataset.append(row)
+
+    result = IngredientResource().import_data(dataset, dry_run=True)
+    assert not result.has_errors()
+    assert result.totals['new'] == 2
+    assert result.totals['skip'] == 2
+    assert catalogue() == [('мука', 'г')]
+
+    result = IngredientResource().import_data(dataset)
+    assert result.totals['new'] == 2
+    assert catalogue() == [('мука', 'г'), ('сахар', 'г'), ('соль', 'г')]
+    result = IngredientResource().import_data(dataset)
+    assert result.totals['new'] == 0
+    assert len(catalogue()) == 3
+
+
+@pytest.mark.django_db(transaction=True)
+def test_merge_duplicate_ingredients_migration():
+    users = ('users', '0002_counters')
+    before = [('recipes', '0003_auto_20240322_0150'), users]
+    after = [('recipes', '0004_ingredient_name_unit_unique'), users]
+    executor = MigrationExecutor(connection)
+    executor.migrate(before)
+    apps = executor.loader.project_state(before).apps
+    User = apps.get_model('users', 'FoodgramUser')
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    IngredientInRecipe = apps.get_model('recipes', 'IngredientInRecipe')
+
+    author = User.objects.create(
+        email='author@foodgram.ru', username='author',
+        first_name='Автор', last_name='Авторов', password='-'
+    )
+    keep, first, second = (
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+        for _ in range(3)
+    )
+    recipes = [
+        Recipe.objects.create(
+            author=author, name=f'Рецепт {i}', text=f'Описание {i}',
+            cooking_time=5, image='recipes/test.png'
+        ) for i in range(2)
+    ]
+    for recipe, ingredient, amount in (
+        (recipes[0], keep, 1), (recipes[0], first, 2),
+        (recipes[1], second, 3),
+    ):
+        IngredientInRecipe.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=amount
+        )
+
+    executor = MigrationExecutor(connection)
+    executor.migrate(after)
+    apps = executor.loader.project_state(after).apps
+    IngredientInRecipe = apps.get_model('recipes', 'IngredientInRecipe')
+    assert list(
+        apps.get_model('recipes', 'Ingredient').objects.values_list('id')
+    ) == [(keep.id,)]
+    assert sorted(IngredientInRecipe.objects.values_list(
+        'recipe_id', 'ingredient_id', 'amount'
+    )) == [(recipes[0].id, keep.id, 1), (recipes[1].id, keep.id, 3)]
+
+    MigrationExecutor(connection).migrate(
+        MigrationExecutor(connection).loader.graph.leaf_nodes()
+    )
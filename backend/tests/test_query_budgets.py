@@ -0,0 +1,65 @@
+import pytest
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+def test_recipes_list_budget(user_client, recipes, query_budget):
+    # Токен, количество, страница, подписки, теги и ингредиенты.
+    with query_budget(6):
+        response = user_client.get('/api/recipes/')
+    assert response.status_code == 200
+    assert response.data['count'] == len(recipes)
+
+
+def test_recipes_list_cached_budget(user_client, recipes, query_budget):
+    user_client.get('/api/recipes/')
+    # Токен и представления рецептов уже в кеше.
+    with query_budget(3):
+        response = user_client.get('/api/recipes/')
+    assert all(recipe['is_favorited'] for recipe in response.data['results'])
+
+
+def test_subscriptions_budget(user_client, recipes, query_budget):
+    # Токен, количество, страница, превью рецептов всех авторов.
+    with query_budget(4):
+        response = user_client.get(
+            '/api/users/subscriptions/', {'recipes_limit': 2}
+        )
+    assert response.status_code == 200
+    assert all(
+        len(author['recipes']) == 2 for author in response.data['results']
+    )
+
+
+def test_ingredients_budget(user_client, recipes, query_budget):
+    # Токен и построение индекса ингредиентов.
+    with query_budget(2):
+        response = user_client.get('/api/ingredients/', {'name': 'инг'})
+    assert len(response.data) == 5
+    with query_budget(1):
+        user_client.get('/api/ingredients/', {'name': 'инг'})
+
+
+def test_download_shopping_cart_budget(user_client, recipes, query_budget):
+    with query_budget(2):
+        response = user_client.get('/api/recipes/download_shopping_cart/')
+        content = b''.join(response.streaming_content)
+    assert response.status_code == 200
+    assert 'Ингредиент 0'.encode() in content
+
+
+def test_query_headers_off_by_default(user_client, recipes):
+    response = user_client.get('/api/recipes/')
+    assert 'X-DB-Queries' not in response
+    assert 'Server-Timing' not in response
+
+
+@override_settings(QUERY_INSTRUMENTATION=True)
+def test_query_headers(user, recipes):
+    client = APIClient()
+    client.force_authenticate(user)
+    response = client.get('/api/recipes/')
+    assert int(response['X-DB-Queries']) > 0
+    assert response['Server-Timing'].startswith('db;dur=')
@@ -0,0 +1,97 @@
+import pytest
+
+from api.utils import update_recipe_ingredients
+from recipes.models import Ingredient, IngredientInRecipe, ShoppingListItem
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def ingredients(db):
+    return [
+        Ingredient.objects.create(name=f'Продукт {i}', measurement_unit='г')
+        for i in range(20)
+    ]
+
+
+@pytest.fixture
+def recipe(recipes, ingredients):
+    """Рецепт из корзины пользователя с ингредиентами 0-3."""
+    recipe = recipes[0]
+    update_recipe_ingredients(recipe, [
+        {'id': ingredient.id, 'amount': 10} for ingredient in ingredients[:4]
+    ])
+    return recipe
+
+
+def rows(recipe):
+    return dict(IngredientInRecipe.objects.filter(
+        recipe=recipe
+    ).values_list('ingredient_id', 'amount'))
+
+
+def row_ids(recipe):
+    return dict(IngredientInRecipe.objects.filter(
+        recipe=recipe
+    ).values_list('ingredient_id', 'id'))
+
+
+def shopping_amounts(user, ingredients):
+    return dict(ShoppingListItem.objects.filter(
+        user=user, ingredient__in=ingredients, amount__gt=0
+    ).values_list('ingredient_id', 'amount'))
+
+
+def test_add_remove_and_change(user, recipe, ingredients):
+    first, second, third, fourth, fifth = ingredients[:5]
+    ids_before = row_ids(recipe)
+    update_recipe_ingredients(recipe, [
+        {'id': first.id, 'amount': 10},
+        {'id': second.id, 'amount': 25},
+        {'id': fifth.id, 'amount': 5},
+    ])
+    assert rows(recipe) == {first.id: 10, second.id: 25, fifth.id: 5}
+    # Строки оставшихся ингредиентов обновляются на месте.
+    ids_after = row_ids(recipe)
+    assert ids_after[first.id] == ids_before[first.id]
+    assert ids_after[second.id] == ids_before[second.id]
+    assert shopping_amounts(user, ingredients) == {
+        first.id: 10, second.id: 25, fifth.id: 5
+    }
+    assert third.id not in shopping_amounts(user, [third, fourth])
+
+
+def test_same_ingredients_change_nothing(user, recipe, ingredients):
+    before = row_ids(recipe)
+    update_recipe_ingredients(recipe, [
+        {'id': ingredient.id, 'amount': 10} for ingredient in ingredients[:4]
+    ])
+    assert row_ids(recipe) == before
+    assert set(rows(recipe).values()) == {10}
+
+
+def test_created_recipe(recipes, ingredients):
+    recipe = recipes[0]
+    IngredientInRecipe.objects.filter(recipe=recipe).delete()
+    update_recipe_ingredients(recipe, [
+        {'id': ingredient.id, 'amount': 1} for ingredient in ingredients[:3]
+    ], created=True)
+    assert rows(recipe) == {
+        ingredient.id: 1 for ingredient in ingredients[:3]
+    }
+
+
+@pytest.mark.parametrize('size', (1, 8))
+def test_queries_do_not_depend_on_rows(recipe, ingredients, query_budget,
+                                       size):
+    # Строки рецепта, DELETE, UPDATE и INSERT строк, пересчёт списков
+    # покупок (DELETE и INSERT) в точке сохранения - при любом числе
+    # добавленных, удалённых и изменённых ингредиентов.
+    with query_budget(8):
+        update_recipe_ingredients(recipe, [
+            {'id': ingredient.id, 'amount': 20}
+            for ingredient in ingredients[2:4]
+        ] + [
+            {'id': ingredient.id, 'amount': 1}
+            for ingredient in ingredients[4:4 + size]
+        ])
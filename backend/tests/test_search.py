@@ -0,0 +1,120 @@
+import pytest
+from django.db import connection
+
+from recipes.models import Recipe
+from recipes.search import FTS_TABLE, fts_query, rebuild_search_index
+
+pytestmark = pytest.mark.django_db
+
+# Поиск по началу слова и таблица FTS5 есть только в SQLite,
+# в PostgreSQL слова сравниваются по основам (русский стемминг).
+sqlite_only = pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='FTS5 есть только в SQLite'
+)
+
+
+def search(client, text, **params):
+    response = client.get('/api/recipes/', {'search': text, **params})
+    assert response.status_code == 200
+    return [recipe['name'] for recipe in response.data['results']]
+
+
+def count(client, text):
+    return client.get('/api/recipes/', {'search': text}).data['count']
+
+
+def indexed_ids():
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT rowid FROM {FTS_TABLE} ORDER BY rowid')
+        return [row[0] for row in cursor.fetchall()]
+
+
+@pytest.fixture
+def soups(recipes):
+    author = recipes[0].author
+    return [
+        Recipe.objects.create(
+            author=author, name=name, text=text, cooking_time=30,
+            image='recipes/test.png'
+        )
+        for name, text in (
+            ('Щи', 'Суп из капусты, к борщу не имеет отношения.'),
+            ('Борщ', 'Свёкла, капуста и говядина.'),
+            ('Борщевик', 'Не суп.'),
+        )
+    ]
+
+
+def test_fts_query():
+    assert fts_query('Борщ  с "мясом"!') == '"Борщ"* "с"* "мясом"*'
+    assert fts_query(' !? ') == ''
+
+
+def test_search_ranks_name_above_text(user_client, soups):
+    # Слово в названии весит больше, чем в описании.
+    names = search(user_client, 'борщ')
+    assert 'Борщ' in names
+    assert names.index('Борщ') < names.index('Щи') == len(names) - 1
+
+
+@sqlite_only
+def test_fts_prefix_match(user_client, soups):
+    names = search(user_client, 'борщ')
+    assert sorted(names[:2]) == ['Борщ', 'Борщевик']
+    assert names[2:] == ['Щи']
+
+
+def test_search_requires_all_words(user_client, soups):
+    assert search(user_client, 'капуста говядина') == ['Борщ']
+    assert search(user_client, 'борщ ананас') == []
+
+
+def test_search_without_words(user_client, soups):
+    assert search(user_client, '!!!') == []
+    assert count(user_client, '') == Recipe.objects.count()
+
+
+def test_search_explicit_ordering(user_client, soups):
+    assert search(user_client, 'суп', ordering='name') == ['Борщевик', 'Щи']
+    assert search(user_client, 'суп', ordering='-id') == ['Борщевик', 'Щи']
+
+
+def test_index_follows_recipe_changes(user_client, soups):
+    soup = soups[0]
+    soup.name = 'Рассольник'
+    soup.text = 'Перловка и огурцы.'
+    soup.save()
+    assert search(user_client, 'рассольник') == ['Рассольник']
+    assert search(user_client, 'капуста') == ['Борщ']
+
+    soup.delete()
+    assert search(user_client, 'рассольник') == []
+
+
+def test_rebuild_search_index(user_client, soups):
+    Recipe.objects.bulk_create([Recipe(
+        author=soups[0].author, name='Окрошка', text='Квас.',
+        cooking_time=15, image='recipes/test.png'
+    )])
+    assert search(user_client, 'окрошка') == []
+    rebuild_search_index()
+    assert search(user_client, 'окрошка') == ['Окрошка']
+
+
+@sqlite_only
+def test_fts_table_follows_recipes(soups):
+    recipe_ids = list(
+        Recipe.objects.order_by('id').values_list('id', flat=True)
+    )
+    assert indexed_ids() == recipe_ids
+    deleted_id = soups[0].id
+    soups[0].delete()
+    assert deleted_id not in indexed_ids()
+    Recipe.objects.bulk_create([Recipe(
+        author=soups[1].author, name='Окрошка', text='Квас.',
+        cooking_time=15, image='recipes/test.png'
+    )])
+    rebuild_search_index()
+    assert indexed_ids() == list(
+        Recipe.objects.order_by('id').values_list('id', flat=True)
+    )
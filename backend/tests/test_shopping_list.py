@@ -0,0 +1,143 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+from api.utils import update_recipe_ingredients
+from rest_framework.test import APIClient
+
+from recipes.models import (
+    Ingredient, IngredientInRecipe, ShopingCart, ShoppingListItem
+)
+from recipes.shopping_list import cart_totals, recompute
+
+pytestmark = pytest.mark.django_db
+
+
+def expected(user):
+    return {
+        row['ingredient_id']: row['total']
+        for row in cart_totals(recipe__shoppingcart_recipe__user=user)
+    }
+
+
+def actual(user):
+    return dict(ShoppingListItem.objects.filter(
+        user=user, amount__gt=0
+    ).values_list('ingredient_id', 'amount'))
+
+
+def test_cart_changes_update_list(user, user_client, recipes):
+    assert actual(user) == expected(user)
+    assert actual(user)
+
+    ShopingCart.objects.filter(user=user, recipe=recipes[0]).delete()
+    assert actual(user) == expected(user)
+
+    user_client.delete(
+        '/api/recipes/shopping_cart/',
+        {'recipes': [recipe.id for recipe in recipes[1:6]]}, format='json'
+    )
+    assert actual(user) == expected(user)
+
+    for _ in range(2):
+        user_client.post(
+            '/api/recipes/shopping_cart/',
+            {'recipes': [recipe.id for recipe in recipes[:3]]},
+            format='json'
+        )
+        assert actual(user) == expected(user)
+
+    ShopingCart.objects.filter(user=user).delete()
+    assert not ShoppingListItem.objects.filter(user=user).exists()
+
+
+def test_recipe_changes_update_list(user, recipes):
+    recipe = recipes[1]
+    rows = list(recipe.ingredient_recipe.all())
+    update_recipe_ingredients(recipe, [
+        {'id': rows[0].ingredient_id, 'amount': 100},
+        {'id': recipes[0].ingredient_recipe.first().ingredient_id,
+         'amount': 7},
+    ])
+    assert actual(user) == expected(user)
+
+    IngredientInRecipe.objects.filter(recipe=recipe).first().delete()
+    assert actual(user) == expected(user)
+
+    recipes[2].delete()
+    assert actual(user) == expected(user)
+
+
+def test_shopping_list_endpoint(user, user_client, recipes, query_budget):
+    with query_budget(2):
+        response = user_client.get('/api/recipes/shopping_list/')
+    assert response.status_code == 200
+    assert {
+        item['id']: item['amount'] for item in response.data
+    } == expected(user)
+    assert [item['name'] for item in response.data] == sorted(
+        item['name'] for item in response.data
+    )
+
+
+@pytest.mark.parametrize('accept, content_type', (
+    ('application/json', 'text/plain; charset=utf-8'),
+    ('text/html', 'text/plain; charset=utf-8'),
+    ('text/csv', 'text/csv; charset=utf-8'),
+    ('application/pdf', 'application/pdf'),
+))
+def test_download_accept(user_client, recipes, accept, content_type):
+    response = user_client.get(
+        '/api/recipes/download_shopping_cart/', HTTP_ACCEPT=accept
+    )
+    assert response.status_code == 200
+    assert response['Content-Type'] == content_type
+
+
+def test_download_unknown_format(user_client, recipes):
+    response = user_client.get(
+        '/api/recipes/download_shopping_cart/', {'format': 'xml'}
+    )
+    assert response.status_code == 404
+
+
+def test_recompute(user, recipes):
+    ShoppingListItem.objects.filter(user=user).update(amount=1)
+    assert [users for _, users in recompute(fix=False)] == [[user.id]]
+    with pytest.raises(CommandError):
+        call_command('recompute_shopping_lists', '--check')
+    call_command('recompute_shopping_lists')
+    assert actual(user) == expected(user)
+    call_command('recompute_shopping_lists', '--check')
+
+
+def test_patch_ingredients_budget(user, recipes, query_budget):
+    recipe = recipes[0]
+    old = [
+        Ingredient.objects.create(name=f'Старый {i}', measurement_unit='г')
+        for i in range(5)
+    ]
+    new = [
+        Ingredient.objects.create(name=f'Новый {i}', measurement_unit='г')
+        for i in range(5)
+    ]
+    update_recipe_ingredients(recipe, [
+        {'id': ingredient.id, 'amount': 2} for ingredient in old
+    ])
+    client = APIClient()
+    client.force_authenticate(recipe.author)
+
+    # Рецепт, подписки, проверка ингредиентов, блокировка рецепта,
+    # строки рецепта, один DELETE и один INSERT строк, один пересчёт
+    # списков покупок (DELETE и INSERT), сохранение рецепта, поисковый
+    # индекс, ответ и точки сохранения - независимо от числа строк.
+    with query_budget(19):
+        response = client.patch(f'/api/recipes/{recipe.id}/', {
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 3} for ingredient in new
+            ],
+        }, format='json')
+    assert response.status_code == 200
+    assert actual(user) == expected(user)
+    assert set(recipe.ingredient_recipe.values_list(
+        'ingredient_id', flat=True
+    )) == {ingredient.id for ingredient in new}
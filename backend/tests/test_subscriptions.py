@@ -0,0 +1,87 @@
+import pytest
+
+from recipes.models import Recipe
+from users.models import FoodgramUser
+
+pytestmark = pytest.mark.django_db
+
+
+def previews(client, **params):
+    response = client.get('/api/users/subscriptions/', params)
+    assert response.status_code == 200
+    return {
+        author['id']: (
+            [recipe['name'] for recipe in author['recipes']],
+            author['recipes_count'],
+        )
+        for author in response.data['results']
+    }
+
+
+def expected(recipes, limit=None):
+    names = {}
+    for recipe in sorted(recipes, key=lambda recipe: (recipe.name, recipe.id)):
+        names.setdefault(recipe.author_id, []).append(recipe.name)
+    return {
+        author_id: (author_names[:limit], len(author_names))
+        for author_id, author_names in names.items()
+    }
+
+
+@pytest.mark.parametrize('limit', (1, 2, 4, 10))
+def test_previews_limit(user_client, recipes, limit):
+    assert previews(user_client, recipes_limit=limit) == expected(
+        recipes, limit
+    )
+
+
+@pytest.mark.parametrize('limit', (None, '', 'abc', '-1', '1.5'))
+def test_previews_without_limit(user_client, recipes, limit):
+    params = {} if limit is None else {'recipes_limit': limit}
+    assert previews(user_client, **params) == expected(recipes)
+
+
+def test_previews_zero_limit(user_client, recipes):
+    assert previews(user_client, recipes_limit=0) == expected(recipes, 0)
+
+
+def test_previews_order_by_name_then_id(user_client, recipes):
+    author = recipes[0].author
+    extra = [
+        Recipe.objects.create(
+            author=author, name=name, text='Описание', cooking_time=5,
+            image='recipes/test.png'
+        ) for name in ('Аджика', 'Аджика', 'Яблоки')
+    ]
+    response = user_client.get(
+        '/api/users/subscriptions/', {'recipes_limit': 3}
+    )
+    by_author = {
+        author_data['id']: author_data['recipes']
+        for author_data in response.data['results']
+    }
+    assert [recipe['id'] for recipe in by_author[author.id]] == [
+        extra[0].id, extra[1].id, recipes[0].id
+    ]
+
+
+def test_previews_author_without_recipes(user, user_client, recipes):
+    author = FoodgramUser.objects.create_user(
+        email='empty@foodgram.ru', username='empty',
+        first_name='Без', last_name='Рецептов', password='Pass-1234'
+    )
+    user.follower.create(author=author)
+    assert previews(user_client, recipes_limit=2)[author.id] == ([], 0)
+
+
+def test_subscribe_previews(user, user_client, recipes):
+    author = recipes[0].author
+    user.follower.filter(author=author).delete()
+    response = user_client.post(
+        f'/api/users/{author.id}/subscribe/?recipes_limit=2'
+    )
+    assert response.status_code == 201
+    assert (
+        [recipe['name'] for recipe in response.data['recipes']],
+        response.data['recipes_count'],
+    ) == expected(recipes, 2)[author.id]
@@ -0,0 +1,84 @@
+import pytest
+
+from api.catalogue import tag_bits
+from recipes.models import Recipe, Tag
+from recipes.tag_masks import bits_to_mask, free_bit, update_tags_mask
+
+pytestmark = pytest.mark.django_db
+
+
+def filtered_ids(client, slugs):
+    response = client.get('/api/recipes/', {
+        'tags': slugs, 'pagination': 'cursor', 'limit': 100,
+    })
+    assert response.status_code == 200
+    return {recipe['id'] for recipe in response.data['results']}
+
+
+def slug_ids(slugs):
+    """Прежний фильтр: JOIN с тегами по слагам."""
+    return set(Recipe.objects.filter(
+        tags__slug__in=slugs
+    ).values_list('id', flat=True))
+
+
+def expected_masks():
+    return {
+        recipe.id: bits_to_mask(tag.bit for tag in recipe.tags.all())
+        for recipe in Recipe.objects.prefetch_related('tags')
+    }
+
+
+def actual_masks():
+    return dict(Recipe.objects.values_list('id', 'tags_mask'))
+
+
+@pytest.mark.parametrize('slugs', (
+    ['tag0'], ['tag1'], ['tag2'], ['tag0', 'tag2'],
+    ['tag2', 'tag1', 'tag0'], ['missing'], ['tag2', 'missing'],
+))
+def test_filter_matches_slug_join(user_client, recipes, slugs):
+    assert filtered_ids(user_client, slugs) == slug_ids(slugs)
+
+
+def test_filter_tag_without_bit(user_client, recipes):
+    # Тег сверх MAX_TAG_BITS: проверяется подзапросом.
+    Tag.objects.filter(slug='tag2').update(bit=None)
+    tag_bits.invalidate()
+    for slugs in (['tag2'], ['tag0', 'tag2']):
+        assert filtered_ids(user_client, slugs) == slug_ids(slugs)
+
+
+def test_masks_follow_recipe_tags(recipes):
+    tag0, tag1, tag2 = Tag.objects.order_by('slug')
+    recipe = recipes[0]
+    recipe.tags.set([tag1, tag2])
+    assert recipe.tags_mask == bits_to_mask((tag1.bit, tag2.bit))
+    recipe.tags.remove(tag1)
+    recipe.tags.add(tag0)
+    recipe.tags.clear()
+    assert recipe.tags_mask == 0
+    # Изменения со стороны тега.
+    tag1.recipe_set.add(*recipes[:3])
+    tag0.recipe_set.remove(recipes[1])
+    tag2.recipe_set.clear()
+    assert actual_masks() == expected_masks()
+
+
+def test_masks_follow_tag_deletion(user_client, recipes):
+    tag = Tag.objects.get(slug='tag1')
+    bit = tag.bit
+    tag.delete()
+    assert actual_masks() == expected_masks()
+    assert free_bit() == bit
+
+    new_tag = Tag.objects.create(name='Новый', color='#FFFFFF', slug='new')
+    assert new_tag.bit == bit
+    recipes[0].tags.add(new_tag)
+    assert filtered_ids(user_client, ['new']) == {recipes[0].id}
+
+
+def test_update_tags_mask_after_bulk_changes(recipes):
+    Recipe.tags.through.objects.all().delete()
+    update_tags_mask(recipe.id for recipe in recipes)
+    assert set(actual_masks().values()) == {0}
@@ -0,0 +1,75 @@
+import pytest
+
+from api.cache import token_cache
+from api.checks import check_token_cache
+from recipes.models import Follow
+from users.models import FoodgramUser
+
+pytestmark = pytest.mark.django_db
+
+
+def test_token_lookup_is_cached(user_client, query_budget):
+    user_client.get('/api/users/me/')
+    with query_budget(0):
+        response = user_client.get('/api/users/me/')
+    assert response.status_code == 200
+    assert token_cache.stats() == {'hits': 1, 'misses': 1}
+
+
+def test_logout_evicts_token(user_client):
+    user_client.get('/api/users/me/')
+    response = user_client.post('/api/auth/token/logout/')
+    assert response.status_code == 204
+    assert user_client.get('/api/users/me/').status_code == 401
+
+
+def test_password_change_evicts_user(user, user_client):
+    user_client.get('/api/users/me/')
+    response = user_client.post('/api/users/set_password/', {
+        'current_password': 'Pass-1234', 'new_password': 'Pass-5678-new',
+    })
+    assert response.status_code == 204
+    token_cache.reset_stats()
+    user_client.get('/api/users/me/')
+    assert token_cache.stats()['misses'] == 1
+
+
+def test_writes_use_fresh_user(user, user_client):
+    # Пока пользователь в кеше, на него подписываются: счётчик
+    # меняется UPDATE без сигналов пользователя и без сброса кеша.
+    user_client.get('/api/users/me/')
+    follower = FoodgramUser.objects.create_user(
+        email='follower@foodgram.ru', username='follower',
+        first_name='Подписчик', last_name='Подписчиков', password='Pass-1234'
+    )
+    Follow.objects.create(user=follower, author=user)
+    response = user_client.post('/api/users/set_password/', {
+        'current_password': 'Pass-1234', 'new_password': 'Pass-5678-new',
+    })
+    assert response.status_code == 204
+    user.refresh_from_db()
+    assert user.followers_count == 1
+    assert user.check_password('Pass-5678-new')
+
+
+def test_deactivation_evicts_user(user, user_client):
+    user_client.get('/api/users/me/')
+    user.is_active = False
+    user.save()
+    assert user_client.get('/api/users/me/').status_code == 401
+
+
+def test_last_login_keeps_cache(user, user_client):
+    user_client.get('/api/users/me/')
+    user.save(update_fields=['last_login'])
+    token_cache.reset_stats()
+    user_client.get('/api/users/me/')
+    assert token_cache.stats() == {'hits': 1, 'misses': 0}
+
+
+def test_process_local_token_cache_rejected(settings):
+    assert [error.id for error in check_token_cache(None)] == ['api.E001']
+    settings.CACHES = dict(settings.CACHES, tokens={
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    })
+    assert check_token_cache(None) == []
@@ -4,7 +4,11 @@ from .models import FoodgramUser
 
 
 class FoodgramUserAdmin(admin.ModelAdmin):
-    list_display = ('username', 'email', 'status', "password")
+    list_display = (
+        'username', 'email', 'status', "password",
+        'recipes_count', 'followers_count',
+    )
+    readonly_fields = ('recipes_count', 'followers_count')
     list_filter = ('username', 'email',)
     search_fields = ('username', 'email',)
     empty_value_display = '-пусто-'
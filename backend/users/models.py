@@ -7,7 +7,35 @@ USER_EMAIL_MAX_LENGTH = 254
 USER_USERNAME_MAX_LENGTH = 150
 
 
-class FoodgramUser(AbstractUser):
+class DenormalizedFieldsModel(models.Model):
+    """
+    Модель с производными полями (счётчики, маски), которые меняются
+    только отдельными UPDATE. Обычный save() существующей строки их
+    не записывает: иначе значение, загруженное до атомарного UPDATE,
+    затёрло бы его результат.
+    """
+
+    denormalized_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+            and not (args and args[0])
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.denormalized_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class FoodgramUser(DenormalizedFieldsModel, AbstractUser):
     """
     Модель пользователей.
     """
@@ -48,6 +76,16 @@ class FoodgramUser(AbstractUser):
         max_length=128,
         verbose_name='Пароль'
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество рецептов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписчиков'
+    )
+
+    denormalized_fields = ('recipes_count', 'followers_count')
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('username', 'first_name', 'last_name', 'password')
@@ -70,4 +108,4 @@ class FoodgramUser(AbstractUser):
 
     @property
     def get_recipes_count(self):
-        return self.recipe.count()
+        return self.recipes_count